@@ -0,0 +1,233 @@
+"""
+Benchmarks of the analyzer of missing_log_records_test on synthetic journal snapshots.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Optional
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "missing_log_records_test",
+                                "testing_system"))
+import analyzer  # noqa: E402
+import journal_file as jf  # noqa: E402
+from analysis_cache import AnalysisCache  # noqa: E402
+from records import find_lost_ranges, RecordIndex  # noqa: E402
+from snapshot_scanner import SnapshotScanner  # noqa: E402
+from generators import generate_journal_snapshots  # noqa: E402
+from recorder import BenchmarkRecorder  # noqa: E402
+
+
+CHECK_LOGS_MAX_LINES: int = 1000000
+FILE_NUMBERS = (1000, 10000)
+LOG_TYPES = ("general", "urmc", "xinet")
+
+
+def _check_logs_in_memory(dir_name: str) -> None:
+    """
+    Function checks journals as the analyzer did before streaming check: all journals are read into memory.
+    :param dir_name: directory with journals.
+    """
+
+    for log_type in LOG_TYPES:
+        log_data = list(analyzer.get_data_from_file_name(dir_name, log_type))
+        for item in log_data:
+            item["log"] = analyzer.read_file(os.path.join(dir_name, item["file_name"]))
+        analyzer.check_logs(log_type, log_data)
+
+
+def _compress_snapshots(dir_name: str, compression: Optional[str]) -> str:
+    """
+    :param dir_name: directory with plain text snapshots;
+    :param compression: compression method, if None, snapshots are saved to plain text files.
+    :return: directory where snapshots are saved by journal_file.write_text as the testing system saves them.
+    """
+
+    compressed_dir = f"{dir_name}_{compression or 'plain'}"
+    os.makedirs(compressed_dir, exist_ok=True)
+    for file_name in os.listdir(dir_name):
+        if file_name.endswith(".txt"):
+            jf.write_text(os.path.join(compressed_dir, file_name + (jf.EXTENSIONS[compression] if compression else "")),
+                          jf.read_text(os.path.join(dir_name, file_name)))
+    return compressed_dir
+
+
+def _get_dir_size(dir_name: str) -> int:
+    """
+    :param dir_name: directory.
+    :return: total size of files in directory.
+    """
+
+    return sum(entry.stat().st_size for entry in os.scandir(dir_name) if entry.is_file())
+
+
+def _get_losses(dir_name: str) -> Dict[str, List[Optional[bool]]]:
+    """
+    :param dir_name: directory with snapshots.
+    :return: dictionary with results of checks of snapshots sorted by time of saving for each log type.
+    """
+
+    losses = {}
+    for log_type in LOG_TYPES:
+        log_data = list(analyzer.get_data_from_file_name(dir_name, log_type))
+        analyzer.check_logs_in_files(dir_name, log_type, log_data)
+        losses[log_type] = [item.get("loss") for item in log_data]
+    return losses
+
+
+def _run_compression_benchmarks(dir_name: str, total_lines: int, recorder: BenchmarkRecorder, repeat: int) -> None:
+    """
+    Function compares saving and checking of plain text and compressed snapshots: size of files, time and results of
+    checks, which must be the same.
+    :param dir_name: directory with plain text snapshots;
+    :param total_lines: total number of lines in snapshots;
+    :param recorder: object to measure and save results;
+    :param repeat: number of runs of each benchmark.
+    """
+
+    losses = None
+    plain_size = None
+    for compression in [None, "gzip"] + (["zstd"] if jf.zstandard is not None else []):
+        name = compression or "plain"
+        recorder.measure(f"write_text ({name})", total_lines, lambda: _compress_snapshots(dir_name, compression),
+                         repeat)
+        compressed_dir = f"{dir_name}_{name}"
+        size = _get_dir_size(compressed_dir)
+        plain_size = plain_size or size
+        logging.info("Snapshots saved to %s files: %d bytes (%.1f%% of plain text)", name, size,
+                     100 * size / plain_size if plain_size else 0)
+        recorder.measure(f"analyze_logs_in_dir ({name} files, no cache)", total_lines,
+                         lambda: analyzer.analyze_logs_in_dir(compressed_dir, False, False), repeat)
+        logging.disable(logging.CRITICAL)
+        try:
+            new_losses = _get_losses(compressed_dir)
+        finally:
+            logging.disable(logging.NOTSET)
+        if losses is not None and new_losses != losses:
+            raise RuntimeError(f"Results of checks of {name} snapshots differ from results for plain text")
+        losses = new_losses
+        shutil.rmtree(compressed_dir, ignore_errors=True)
+
+
+def _create_empty_snapshots(dir_name: str, file_number: int) -> None:
+    """
+    :param dir_name: directory where to create files;
+    :param file_number: number of files.
+    """
+
+    os.makedirs(dir_name, exist_ok=True)
+    for index in range(file_number):
+        _create_empty_snapshot(dir_name, index)
+    # Directory is made older than SnapshotScanner.UNSTABLE_TIME, so that the result of its scan can be cached
+    os.utime(dir_name, ns=(0, 0))
+
+
+def _create_empty_snapshot(dir_name: str, index: int) -> None:
+    """
+    :param dir_name: directory where to create file;
+    :param index: number of snapshot, it determines time of saving in file name.
+    """
+
+    file_name = f"general 2024-01-{1 + index // 1440 % 28:0>2}_{index // 60 % 24:0>2}-{index % 60:0>2}-00 1.0M.txt"
+    open(os.path.join(dir_name, file_name), "w").close()
+
+
+def _run_scanner_benchmarks(dir_name: str, file_number: int, recorder: BenchmarkRecorder, repeat: int) -> None:
+    """
+    Function measures finding of snapshots by SnapshotScanner without saved list of snapshots, with list of
+    snapshots saved at the previous scan of unchanged directory and after a new snapshot is added to directory.
+    :param dir_name: directory with empty snapshots;
+    :param file_number: number of snapshots in directory;
+    :param recorder: object to measure and save results;
+    :param repeat: number of runs of each benchmark.
+    """
+
+    cache_dir = os.path.join(dir_name, AnalysisCache.DIR_NAME)
+    recorder.measure("SnapshotScanner.scan (no cache)", file_number, lambda: SnapshotScanner(dir_name).scan(), repeat)
+    recorder.measure("SnapshotScanner.scan (cold cache)", file_number,
+                     lambda: SnapshotScanner(dir_name, cache_dir).scan())
+    os.utime(dir_name, ns=(0, 0))
+    recorder.measure("SnapshotScanner.scan (warm cache)", file_number,
+                     lambda: SnapshotScanner(dir_name, cache_dir).scan(), repeat)
+    new_indexes = iter(range(file_number, file_number + repeat))
+
+    def scan_with_new_snapshot() -> None:
+        _create_empty_snapshot(dir_name, next(new_indexes))
+        SnapshotScanner(dir_name, cache_dir).scan()
+
+    recorder.measure("SnapshotScanner.scan (new snapshot)", file_number, scan_with_new_snapshot, repeat)
+
+
+def run_benchmarks(sizes: List[int], snapshot_number: int, work_dir: str, recorder: BenchmarkRecorder,
+                   repeat: int) -> None:
+    """
+    :param sizes: total numbers of lines in snapshots of each log type;
+    :param snapshot_number: number of snapshots of each log type;
+    :param work_dir: directory for generated data;
+    :param recorder: object to measure and save results;
+    :param repeat: number of runs of each benchmark.
+    """
+
+    for file_number in FILE_NUMBERS:
+        dir_name = os.path.join(work_dir, f"names_{file_number}")
+        _create_empty_snapshots(dir_name, file_number)
+        recorder.measure("get_data_from_file_name", file_number,
+                         lambda: list(analyzer.get_data_from_file_name(dir_name, "general")), repeat)
+        _run_scanner_benchmarks(dir_name, file_number, recorder, repeat)
+
+    for size in sizes:
+        dir_name = os.path.join(work_dir, f"journals_{size}")
+        logging.info("Generating %d snapshots with %d lines for each log type...", snapshot_number, size)
+        file_names = generate_journal_snapshots(dir_name, snapshot_number, max(1, size // snapshot_number))
+        total_lines = size * len(LOG_TYPES)
+        if size <= CHECK_LOGS_MAX_LINES:
+            recorder.measure("read_file + check_logs", total_lines, lambda: _check_logs_in_memory(dir_name), repeat)
+        recorder.measure("analyze_logs_in_dir (no cache)", total_lines,
+                         lambda: analyzer.analyze_logs_in_dir(dir_name, False, False), repeat)
+        _run_compression_benchmarks(dir_name, total_lines, recorder, repeat)
+        if len(file_names) > 1:
+            previous_index = RecordIndex.from_file(file_names[0])
+            index = RecordIndex.from_file(file_names[1])
+            recorder.measure("find_lost_ranges", len(previous_index) + len(index),
+                             lambda: find_lost_ranges(previous_index.digests, index.digests), repeat)
+        shutil.rmtree(os.path.join(dir_name, AnalysisCache.DIR_NAME), ignore_errors=True)
+        recorder.measure("analyze_logs_in_dir (cold cache)", total_lines,
+                         lambda: analyzer.analyze_logs_in_dir(dir_name, False, True))
+        recorder.measure("analyze_logs_in_dir (warm cache)", total_lines,
+                         lambda: analyzer.analyze_logs_in_dir(dir_name, False, True), repeat)
+        shutil.rmtree(dir_name, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmarks of the analyzer of missing_log_records_test")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="Total numbers of lines in snapshots of each log type (up to 10000000)")
+    parser.add_argument("--snapshots", type=int, default=10, help="Number of snapshots of each log type")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each benchmark, the best is taken")
+    parser.add_argument("--output", type=str, default="benchmark_results.jsonl",
+                        help="JSON lines file to which results are appended")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON lines file with previous results to compare with")
+    parser.add_argument("--work_dir", type=str, default=None,
+                        help="Directory for generated data (by default temporary directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="[%(asctime)s %(levelname)s] %(message)s", level=logging.INFO,
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    recorder = BenchmarkRecorder("missing_log_records_test")
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bvvu_bench_")
+    try:
+        run_benchmarks(args.sizes, args.snapshots, work_dir, recorder, args.repeat)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    regressions = recorder.compare(args.baseline) if args.baseline else []
+    recorder.save(args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of iteration throughput of missing_log_records_test on simulated BVVU.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from bvvu_simulator import add_simulator_arguments, create_simulated_bvvu, SimulatedUiob
+from recorder import BenchmarkRecorder
+from ssh_server import SshServer
+SimulatedUiob.install()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "missing_log_records_test",
+                                "testing_system"))
+from results import ResultStore  # noqa: E402
+from testing_system import TestingSystem  # noqa: E402
+
+
+HOST: str = "127.0.0.1"
+PASSWORD: str = "bench"
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: str, recorder: BenchmarkRecorder) -> None:
+    """
+    :param args: command line arguments;
+    :param work_dir: directory where testing system saves logs;
+    :param recorder: object to save results.
+    """
+
+    device = create_simulated_bvvu(HOST, args)
+    ssh_server = SshServer(device, password=PASSWORD)
+    ssh_server.start()
+    current_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        testing_system = TestingSystem(HOST, ssh_server.port, "root", PASSWORD, args.reboots, args.store,
+                                       jobs=args.jobs, incremental=args.incremental, pipeline=args.pipeline,
+                                       compress=args.compress)
+        start_time = time.monotonic()
+        try:
+            testing_system.run_test()
+        except Exception as exc:
+            logging.error("Test failed: %s", exc)
+        seconds = time.monotonic() - start_time
+    finally:
+        os.chdir(current_dir)
+        ssh_server.stop()
+
+    connection = sqlite3.connect(os.path.join(work_dir, HOST, ResultStore.FILE_NAME))
+    iterations, losses = connection.execute("SELECT COUNT(DISTINCT iteration), COUNT(DISTINCT CASE WHEN loss THEN "
+                                            "iteration END) FROM snapshots").fetchone()
+    connection.close()
+    modes = [mode for mode in ("incremental", "pipeline", "compress") if getattr(args, mode)]
+    name = "TestingSystem.run_test" + (f" ({', '.join(modes)})" if modes else "")
+    recorder.add(name, iterations, seconds)
+    logging.info("%d iterations in %.1f s: %.0f iterations per hour (iterations with loss: %d, lost records: %d)",
+                 iterations, seconds, 3600 * iterations / seconds if seconds else 0, losses, device.lost_records)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmark of iteration throughput of missing_log_records_test on simulated BVVU")
+    parser.add_argument("--reboots", type=int, default=20, help="Number of test iterations")
+    parser.add_argument("--store", action="store_true", help="Save logs to deduplicated compressed snapshot store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Download only records that appeared since the previous reboot")
+    parser.add_argument("--compress", action="store_true", help="Save logs to compressed files")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Reboot BVVU as soon as logs are downloaded, save and check logs in background")
+    parser.add_argument("--jobs", type=int, default=3,
+                        help="Maximum number of logs that are downloaded at the same time")
+    add_simulator_arguments(parser)
+    parser.add_argument("--output", type=str, default="benchmark_results.jsonl",
+                        help="JSON lines file to which results are appended")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON lines file with previous results to compare with")
+    parser.add_argument("--work_dir", type=str, default=None,
+                        help="Directory where testing system saves logs (by default temporary directory)")
+    args = parser.parse_args()
+
+    recorder = BenchmarkRecorder("missing_log_records_test_iterations")
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bvvu_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        run_benchmark(args, os.path.abspath(work_dir), recorder)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    regressions = recorder.compare(args.baseline) if args.baseline else []
+    recorder.save(args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmarks of the analyzer of usb_slot_test on synthetic test logs.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import List, Optional
+import numpy as np
+from bvvu_simulator import SimulatedUiob
+SimulatedUiob.install()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "usb_slot_test"))
+from analyzer.analyzer import Analyzer, parse_log_file  # noqa: E402
+from analyzer.cache import EngineCache  # noqa: E402
+from analyzer.compression import COMPRESSIONS, zstandard  # noqa: E402
+from analyzer.engine import LogEngine  # noqa: E402
+from generators import generate_usb_log  # noqa: E402
+from recorder import BenchmarkRecorder  # noqa: E402
+from testing_system.logger import CompressedFileHandler  # noqa: E402
+
+
+def _analyze_log(log_file: str, use_cache: bool) -> None:
+    """
+    :param log_file: name of file with log;
+    :param use_cache: if True, the analysis cache is used.
+    """
+
+    analyzer = Analyzer(use_cache)
+    analyzer._analyze_log(log_file)
+    for history in analyzer._engine.histories.values():
+        history.get_drop_percentages()
+
+
+def _check_parity(engine: LogEngine, other_engine: LogEngine, name: str) -> None:
+    """
+    :param engine: engine with parsed plain text log;
+    :param other_engine: engine with parsed compressed log;
+    :param name: name of compression method.
+    """
+
+    for source, history in engine.histories.items():
+        other_history = other_engine.histories[source]
+        if not np.array_equal(history.times, other_history.times) or \
+                not np.array_equal(history.masks, other_history.masks):
+            raise RuntimeError(f"Results of parsing of {name} log differ from results for plain text ({source})")
+
+
+def _write_log(lines: List[str], log_file: str, compression: Optional[str]) -> None:
+    """
+    Function writes lines to log through the same handler as the testing system.
+    :param lines: lines of log;
+    :param log_file: name of file with log;
+    :param compression: compression method, if None, log is written by logging.FileHandler.
+    """
+
+    if os.path.exists(log_file):
+        os.remove(log_file)
+    handler = CompressedFileHandler(log_file) if compression else logging.FileHandler(log_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for line in lines:
+        handler.emit(logging.makeLogRecord({"msg": line}))
+    handler.close()
+
+
+def _run_compression_benchmarks(log_file: str, size: int, recorder: BenchmarkRecorder, repeat: int) -> None:
+    """
+    Function compares writing and parsing of plain text and compressed logs: size of files, time and results of
+    parsing, which must be the same.
+    :param log_file: name of file with plain text log;
+    :param size: number of lines in log;
+    :param recorder: object to measure and save results;
+    :param repeat: number of runs of each benchmark.
+    """
+
+    with open(log_file, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    engine = parse_log_file(log_file)
+    plain_size = None
+    extensions = {compression: extension for extension, compression in COMPRESSIONS.items()}
+    for compression in [None, "gzip"] + (["zstd"] if zstandard is not None else []):
+        name = compression or "plain"
+        root, ext = os.path.splitext(log_file)
+        new_log_file = f"{root}_{name}{ext}" + (extensions[compression] if compression else "")
+        recorder.measure(f"{'CompressedFileHandler' if compression else 'FileHandler'} ({name})", size,
+                         lambda: _write_log(lines, new_log_file, compression), repeat)
+        file_size = os.path.getsize(new_log_file)
+        plain_size = plain_size or file_size
+        logging.info("Log saved to %s file: %d bytes (%.1f%% of plain text)", name, file_size,
+                     100 * file_size / plain_size if plain_size else 0)
+        recorder.measure(f"parse_log_file ({name} file)", size, lambda: parse_log_file(new_log_file), repeat)
+        _check_parity(engine, parse_log_file(new_log_file), name)
+        os.remove(new_log_file)
+
+
+def run_benchmarks(sizes: List[int], drop_rate: float, work_dir: str, recorder: BenchmarkRecorder,
+                   repeat: int) -> None:
+    """
+    :param sizes: numbers of lines in logs;
+    :param drop_rate: probability that module is missing in a slot at a check;
+    :param work_dir: directory for generated data;
+    :param recorder: object to measure and save results;
+    :param repeat: number of runs of each benchmark.
+    """
+
+    for size in sizes:
+        log_file = os.path.join(work_dir, f"log_{size}.txt")
+        logging.info("Generating log with %d lines...", size)
+        generate_usb_log(log_file, size, drop_rate)
+        recorder.measure("parse_log_file", size, lambda: parse_log_file(log_file), repeat)
+        _run_compression_benchmarks(log_file, size, recorder, repeat)
+        recorder.measure("Analyzer._analyze_log (no cache)", size, lambda: _analyze_log(log_file, False), repeat)
+        recorder.measure("Analyzer._analyze_log (cold cache)", size, lambda: _analyze_log(log_file, True))
+        recorder.measure("Analyzer._analyze_log (warm cache)", size, lambda: _analyze_log(log_file, True), repeat)
+        engine = parse_log_file(log_file)
+        for source, history in engine.histories.items():
+            recorder.measure(f"get_binned_presence ({source})", size, lambda: history.get_binned_presence(2000),
+                             repeat)
+        os.remove(log_file)
+        shutil.rmtree(os.path.join(work_dir, EngineCache.DIR_NAME), ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmarks of the analyzer of usb_slot_test")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="Numbers of lines in logs (up to 10000000)")
+    parser.add_argument("--drop_rate", type=float, default=0.01,
+                        help="Probability that module is missing in a slot at a check")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each benchmark, the best is taken")
+    parser.add_argument("--output", type=str, default="benchmark_results.jsonl",
+                        help="JSON lines file to which results are appended")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON lines file with previous results to compare with")
+    parser.add_argument("--work_dir", type=str, default=None,
+                        help="Directory for generated data (by default temporary directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="[%(asctime)s %(levelname)s] %(message)s", level=logging.INFO,
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    recorder = BenchmarkRecorder("usb_slot_test")
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bvvu_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        run_benchmarks(args.sizes, args.drop_rate, work_dir, recorder, args.repeat)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    regressions = recorder.compare(args.baseline) if args.baseline else []
+    recorder.save(args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark of iteration throughput of usb_slot_test on simulated BVVU.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from bvvu_simulator import add_simulator_arguments, create_simulated_bvvu, SimulatedUiob
+from energenie_server import EnerGenieServer
+from recorder import BenchmarkRecorder
+from ssh_server import SshServer
+SimulatedUiob.install()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "usb_slot_test"))
+from testing_system.energeniehttp import EnerGenieHttp  # noqa: E402
+from testing_system.testingsystem import TestingSystem  # noqa: E402
+
+
+HOST: str = "127.0.0.1"
+PASSWORD: str = "bench"
+SOCKET: int = 1
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: str, recorder: BenchmarkRecorder) -> None:
+    """
+    :param args: command line arguments;
+    :param work_dir: directory for results of testing system;
+    :param recorder: object to save results.
+    """
+
+    device = create_simulated_bvvu(HOST, args)
+    ssh_server = SshServer(device, password=PASSWORD)
+    ssh_server.start()
+    energenie_server = EnerGenieServer(HOST, password=PASSWORD, expiry_rate=args.expiry_rate, seed=args.seed)
+    energenie_server.connect(SOCKET, device)
+    energenie_server.start()
+    power_manager = EnerGenieHttp(HOST, PASSWORD, SOCKET, energenie_server.port)
+    result_file = os.path.join(work_dir, "log_test.sqlite")
+    try:
+        power_manager.connect()
+        testing_system = TestingSystem(HOST, ssh_server.port, "root", PASSWORD, power_manager, SOCKET, args.reboots,
+                                       False, result_file)
+        start_time = time.monotonic()
+        testing_system.run_tests()
+        seconds = time.monotonic() - start_time
+        power_manager.close_connection()
+    finally:
+        ssh_server.stop()
+        energenie_server.stop()
+
+    connection = sqlite3.connect(result_file)
+    iterations = connection.execute("SELECT COUNT(DISTINCT iteration) FROM checks").fetchone()[0]
+    connection.close()
+    recorder.add("TestingSystem.run_tests", iterations, seconds)
+    logging.info("%d iterations in %.1f s: %.0f iterations per hour (boots: %d, power switches: %d)", iterations,
+                 seconds, 3600 * iterations / seconds if seconds else 0, device.boot_number,
+                 energenie_server.switches)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmark of iteration throughput of usb_slot_test on simulated BVVU")
+    parser.add_argument("--reboots", type=int, default=20, help="Number of test iterations")
+    parser.add_argument("--expiry_rate", type=float, default=0,
+                        help="Probability that session of EnerGenie web interface expires before a request")
+    add_simulator_arguments(parser)
+    parser.add_argument("--output", type=str, default="benchmark_results.jsonl",
+                        help="JSON lines file to which results are appended")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON lines file with previous results to compare with")
+    parser.add_argument("--work_dir", type=str, default=None,
+                        help="Directory for results of testing system (by default temporary directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="[%(asctime)s %(levelname)s] %(message)s", level=logging.INFO,
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    recorder = BenchmarkRecorder("usb_slot_test_iterations")
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bvvu_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        run_benchmark(args, work_dir, recorder)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    regressions = recorder.compare(args.baseline) if args.baseline else []
+    recorder.save(args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import argparse
+import random
+import sys
+import threading
+import time
+import types
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+
+class SimulatedBvvu:
+    """
+    Class simulates BVVU without hardware: power state, boot phases (ssh server starts first, then the admin panel),
+    modules in slots and logging journals. State is updated lazily when it is requested, so no background threads
+    are needed. Boot delays and failure rates are configurable.
+    """
+
+    ADMIN_DELAY: float = 1
+    JITTER: float = 0.2
+    JOURNAL_SERVICES = ("systemd[1]", "tango-urmc[412]", "xinetd[388]", "kernel", "sshd[927]")
+    # Services of records that are selected by journal of each type
+    JOURNAL_TYPES: Dict[str, Optional[str]] = {"general": None,
+                                               "urmc": "tango-urmc[412]",
+                                               "xinet": "xinetd[388]"}
+    LOSS_WINDOW: float = 2
+    RECORDS_PER_SECOND: float = 50
+    SHUTDOWN_DELAY: float = 0.5
+    SLOT_NUMBER: int = 16
+    SSH_DELAY: float = 2
+
+    def __init__(self, host: str, ssh_delay: float = SSH_DELAY, admin_delay: float = ADMIN_DELAY,
+                 jitter: float = JITTER, drop_rate: float = 0.01, loss_rate: float = 0.05,
+                 boot_failure_rate: float = 0, records_per_second: float = RECORDS_PER_SECOND, seed: int = 0) -> None:
+        """
+        :param host: IP address of simulated device;
+        :param ssh_delay: time from power on until ssh server is started;
+        :param admin_delay: time from start of ssh server until the admin panel is alive;
+        :param jitter: maximum relative random deviation of delays;
+        :param drop_rate: probability that module is missing in a slot after boot;
+        :param loss_rate: probability that records written shortly before reboot are lost;
+        :param boot_failure_rate: probability that device does not boot until the next power cycle;
+        :param records_per_second: number of records written to journal per second while device is up;
+        :param seed: seed of random generator.
+        """
+
+        self._admin_delay: float = admin_delay
+        self._boot_delays: Dict[str, float] = {"ssh": 0, "admin": 0}
+        self._boot_failed: bool = False
+        self._boot_failure_rate: float = boot_failure_rate
+        self._boot_number: int = 0
+        self._boot_time: Optional[float] = time.monotonic() - ssh_delay - admin_delay
+        self._drop_rate: float = drop_rate
+        self._jitter: float = jitter
+        self._last_record_time: float = time.time()
+        self._lock: threading.RLock = threading.RLock()
+        self._loss_rate: float = loss_rate
+        self._lost: Set[int] = set()
+        self._missing: Set[int] = set()
+        self._reboot_time: Optional[float] = None
+        self._record_times: List[float] = []
+        self._records_per_second: float = records_per_second
+        self._rng: random.Random = random.Random(seed)
+        self._ssh_delay: float = ssh_delay
+        self.host: str = host
+        self.lost_records: int = 0
+
+    @property
+    def boot_number(self) -> int:
+        return self._boot_number
+
+    @property
+    def missing_slots(self) -> List[int]:
+        """
+        :return: numbers of slots (from 1) in which modules are missing after the last boot.
+        """
+
+        return sorted(self._missing)
+
+    def _advance(self, now: float) -> None:
+        """
+        Method writes to journal records that appeared since the last update.
+        :param now: current time (by time.time).
+        """
+
+        if not self._is_up("ssh"):
+            self._last_record_time = now
+            return
+
+        number = int((now - self._last_record_time) * self._records_per_second)
+        if number > 0:
+            step = 1 / self._records_per_second
+            self._record_times.extend(self._last_record_time + step * (index + 1) for index in range(number))
+            self._last_record_time += step * number
+
+    def _boot(self, start_time: float) -> None:
+        """
+        :param start_time: time of power on (by time.monotonic).
+        """
+
+        self._boot_number += 1
+        self._boot_time = start_time
+        self._boot_failed = self._rng.random() < self._boot_failure_rate
+        self._boot_delays = {"ssh": self._get_delay(self._ssh_delay),
+                             "admin": self._get_delay(self._admin_delay)}
+        self._missing = {slot for slot in range(1, SimulatedBvvu.SLOT_NUMBER + 1)
+                         if self._rng.random() < self._drop_rate}
+
+    def _get_delay(self, delay: float) -> float:
+        return max(0.0, delay * (1 + self._jitter * (2 * self._rng.random() - 1)))
+
+    def _is_up(self, phase: str) -> bool:
+        """
+        :param phase: boot phase ('ssh' or 'admin').
+        :return: True if boot phase is completed.
+        """
+
+        if self._boot_time is None or self._boot_failed:
+            return False
+        delay = self._boot_delays["ssh"] + (self._boot_delays["admin"] if phase == "admin" else 0)
+        return time.monotonic() - self._boot_time >= delay
+
+    def _shut_down(self) -> None:
+        self._advance(time.time())
+        if self._record_times and self._rng.random() < self._loss_rate:
+            # Records that were not flushed to disk before power off are lost
+            first_lost = len(self._record_times)
+            while first_lost > 0 and self._record_times[first_lost - 1] >= time.time() - SimulatedBvvu.LOSS_WINDOW:
+                first_lost -= 1
+            self._lost.update(range(first_lost, len(self._record_times)))
+            self.lost_records += len(self._record_times) - first_lost
+        self._boot_time = None
+
+    def _update(self) -> None:
+        if self._reboot_time is not None and time.monotonic() >= self._reboot_time:
+            self._shut_down()
+            self._boot(self._reboot_time)
+            self._reboot_time = None
+        self._advance(time.time())
+
+    def get_disk_usage(self) -> str:
+        """
+        :return: size of journals in the format of journalctl.
+        """
+
+        with self._lock:
+            self._update()
+            size = 8 * 1024 * 1024 + 120 * len(self._record_times)
+        return f"{size / 1024 / 1024:.1f}M"
+
+    def get_journal(self, log_name: str, start: int = 0, iso: bool = False) -> List[Dict[str, str]]:
+        """
+        :param log_name: log type (may be 'general', 'urmc' and 'xinet');
+        :param start: number of the first record to be returned;
+        :param iso: if True, time of records is given in ISO format (as by journalctl -o short-iso).
+        :return: list of records with their cursors.
+        """
+
+        service = SimulatedBvvu.JOURNAL_TYPES[log_name]
+        with self._lock:
+            self._update()
+            record_times = self._record_times[start:]
+            lost = set(self._lost)
+        records = []
+        for index, record_time in enumerate(record_times, start=start):
+            record_service = SimulatedBvvu.JOURNAL_SERVICES[index % len(SimulatedBvvu.JOURNAL_SERVICES)]
+            if index in lost or (service is not None and record_service != service):
+                continue
+            moment = datetime.fromtimestamp(record_time)
+            stamp = moment.astimezone().strftime("%Y-%m-%dT%H:%M:%S%z") if iso else moment.strftime("%b %d %H:%M:%S")
+            records.append({"cursor": f"s={index}",
+                            "record": f"{stamp} bvvu {record_service}: message #{index}"})
+        return records
+
+    def is_admin_alive(self) -> bool:
+        with self._lock:
+            self._update()
+            return self._is_up("admin")
+
+    def is_ssh_alive(self) -> bool:
+        with self._lock:
+            self._update()
+            return self._is_up("ssh")
+
+    def reboot(self) -> None:
+        """
+        Method simulates reboot command: device goes down after a short delay and boots again.
+        """
+
+        with self._lock:
+            self._update()
+            if self._is_up("ssh") and self._reboot_time is None:
+                self._reboot_time = time.monotonic() + SimulatedBvvu.SHUTDOWN_DELAY
+
+    def set_power(self, turn_on: bool) -> None:
+        """
+        :param turn_on: if True, power is turned on.
+        """
+
+        with self._lock:
+            self._update()
+            powered = self._boot_time is not None
+            if turn_on and not powered:
+                self._boot(time.monotonic())
+            elif not turn_on and powered:
+                self._reboot_time = None
+                self._shut_down()
+                self._boot_failed = False
+
+
+class _Journal:
+
+    def __init__(self, device: SimulatedBvvu) -> None:
+        self._device: SimulatedBvvu = device
+
+    def _get_logs(self, log_name: str) -> str:
+        if not self._device.is_admin_alive():
+            raise ConnectionError(f"Admin panel of BVVU {self._device.host} is not available")
+        return "\n".join(record["record"] for record in self._device.get_journal(log_name))
+
+    def general_logs(self) -> str:
+        return self._get_logs("general")
+
+    def tango_urmc_logs(self) -> str:
+        return self._get_logs("urmc")
+
+    def xinet_logs(self) -> str:
+        return self._get_logs("xinet")
+
+
+class _Os:
+
+    def __init__(self, device: SimulatedBvvu) -> None:
+        self._device: SimulatedBvvu = device
+        self.journal: _Journal = _Journal(device)
+
+    def reboot(self) -> None:
+        if not self._device.is_admin_alive():
+            raise ConnectionError(f"Admin panel of BVVU {self._device.host} is not available")
+        self._device.reboot()
+
+
+class _Slot:
+
+    def __init__(self, device: SimulatedBvvu) -> None:
+        self._device: SimulatedBvvu = device
+
+    def get_slots_info(self) -> List[Optional[Dict[str, str]]]:
+        if not self._device.is_admin_alive():
+            raise ConnectionError(f"Admin panel of BVVU {self._device.host} is not available")
+        missing = self._device.missing_slots
+        return [None if slot in missing else {"serial": f"{slot:0>8}"}
+                for slot in range(1, SimulatedBvvu.SLOT_NUMBER + 1)]
+
+
+class SimulatedUiob:
+    """
+    Class replaces uiobapi.Uiob for simulated devices. It provides only the part of the admin panel API that is used
+    by the testing systems.
+    """
+
+    DEVICES: Dict[str, SimulatedBvvu] = {}
+
+    def __init__(self, ip_address: str = None) -> None:
+        """
+        :param ip_address: IP address of simulated device, device must be registered with register method.
+        """
+
+        device = SimulatedUiob.DEVICES.get(str(ip_address))
+        if device is None:
+            raise ValueError(f"Simulated BVVU {ip_address} is not registered")
+        self._device: SimulatedBvvu = device
+        self.os: _Os = _Os(device)
+        self.slot: _Slot = _Slot(device)
+
+    @staticmethod
+    def install() -> None:
+        """
+        Method installs module uiobapi with SimulatedUiob, so testing systems work with simulated devices. It must be
+        called before testing systems are imported.
+        """
+
+        module = types.ModuleType("uiobapi")
+        module.Uiob = SimulatedUiob
+        sys.modules["uiobapi"] = module
+
+    @staticmethod
+    def register(device: SimulatedBvvu) -> None:
+        """
+        :param device: simulated device.
+        """
+
+        SimulatedUiob.DEVICES[device.host] = device
+
+    def check_alive(self) -> bool:
+        return self._device.is_admin_alive()
+
+
+def add_simulator_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    :param parser: parser to which arguments with settings of simulated device are added.
+    """
+
+    parser.add_argument("--ssh_delay", type=float, default=SimulatedBvvu.SSH_DELAY,
+                        help="Time in seconds from power on until ssh server is started")
+    parser.add_argument("--admin_delay", type=float, default=SimulatedBvvu.ADMIN_DELAY,
+                        help="Time in seconds from start of ssh server until the admin panel is alive")
+    parser.add_argument("--jitter", type=float, default=SimulatedBvvu.JITTER,
+                        help="Maximum relative random deviation of boot delays")
+    parser.add_argument("--drop_rate", type=float, default=0.01,
+                        help="Probability that module is missing in a slot after boot")
+    parser.add_argument("--loss_rate", type=float, default=0.05,
+                        help="Probability that records written shortly before reboot are lost")
+    parser.add_argument("--boot_failure_rate", type=float, default=0,
+                        help="Probability that device does not boot until the next power cycle")
+    parser.add_argument("--records_per_second", type=float, default=SimulatedBvvu.RECORDS_PER_SECOND,
+                        help="Number of records written to journal per second")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of random generator")
+
+
+def create_simulated_bvvu(host: str, args: argparse.Namespace) -> SimulatedBvvu:
+    """
+    :param host: IP address of simulated device;
+    :param args: arguments added by add_simulator_arguments.
+    :return: simulated device registered for SimulatedUiob.
+    """
+
+    device = SimulatedBvvu(host, args.ssh_delay, args.admin_delay, args.jitter, args.drop_rate, args.loss_rate,
+                           args.boot_failure_rate, args.records_per_second, args.seed)
+    SimulatedUiob.register(device)
+    return device
@@ -0,0 +1,144 @@
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from bvvu_simulator import SimulatedBvvu
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    server: "EnerGenieServer"
+
+    def _handle(self, form: Dict[str, List[str]]) -> None:
+        """
+        :param form: form data of request.
+        """
+
+        path = urlparse(self.path).path
+        if path == EnerGenieServer.LOGIN_PAGE:
+            logged_in = self.server.login(form.get("pw", [None])[0])
+        else:
+            logged_in = self.server.control(form)
+        page = self.server.get_control_page() if logged_in else EnerGenieServer.LOGIN_PAGE_TEXT
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        self._handle(parse_qs(self.rfile.read(length).decode("utf-8")))
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class EnerGenieServer(ThreadingHTTPServer):
+    """
+    Class simulates LAN web interface of EnerGenie surge protector. Turning socket power off and on turns off and on
+    simulated devices connected to the socket. The session can expire with the given probability, then the login page
+    is returned instead of the control page, as the real surge protector does.
+    """
+
+    LOGIN_PAGE: str = "/login.html"
+    LOGIN_PAGE_TEXT: str = ("<html><body><form method=\"post\" action=\"/login.html\">"
+                            "<input type=\"password\" name=\"pw\"></form></body></html>")
+    SOCKET_NUMBER: int = 4
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: str = "", expiry_rate: float = 0,
+                 seed: int = 0) -> None:
+        """
+        :param host: IP address of web interface;
+        :param port: port of web interface. If 0, free port is chosen;
+        :param password: password to login;
+        :param expiry_rate: probability that session expires before a request;
+        :param seed: seed of random generator.
+        """
+
+        super().__init__((host, port), _RequestHandler)
+        self._devices: Dict[int, SimulatedBvvu] = {}
+        self._expiry_rate: float = expiry_rate
+        self._lock: threading.Lock = threading.Lock()
+        self._logged_in: bool = False
+        self._password: str = password
+        self._rng: random.Random = random.Random(seed)
+        self._states: List[bool] = [True] * EnerGenieServer.SOCKET_NUMBER
+        self._thread: Optional[threading.Thread] = None
+        self.switches: int = 0
+
+    @property
+    def port(self) -> int:
+        """
+        :return: port of web interface.
+        """
+
+        return self.server_address[1]
+
+    def connect(self, socket_number: int, device: SimulatedBvvu) -> None:
+        """
+        :param socket_number: socket number (from 1 to 4);
+        :param device: simulated device connected to the socket.
+        """
+
+        self._devices[socket_number] = device
+
+    def control(self, form: Dict[str, List[str]]) -> bool:
+        """
+        :param form: form data of request to the control page.
+        :return: True if session is active.
+        """
+
+        with self._lock:
+            if not self._logged_in or self._rng.random() < self._expiry_rate:
+                self._logged_in = False
+                return False
+            for socket_number in range(1, EnerGenieServer.SOCKET_NUMBER + 1):
+                value = form.get(f"cte{socket_number}")
+                if value is None:
+                    continue
+                turn_on = value[0] == "1"
+                self._states[socket_number - 1] = turn_on
+                self.switches += 1
+                device = self._devices.get(socket_number)
+                if device is not None:
+                    device.set_power(turn_on)
+            return True
+
+    def get_control_page(self) -> str:
+        """
+        :return: text of control page with socket states and buttons for selenium backend.
+        """
+
+        with self._lock:
+            states = list(self._states)
+        sockets = "".join(f"<div id=\"stCont{index}\"><a class=\"onoffbtn\" href=\"/?cte{index + 1}={int(not state)}\">"
+                          f"{'off' if state else 'on'}</a></div>" for index, state in enumerate(states))
+        return (f"<html><head><script>var sockstates = [{','.join(str(int(state)) for state in states)}];</script>"
+                f"</head><body>{sockets}</body></html>")
+
+    def login(self, password: Optional[str]) -> bool:
+        """
+        :param password: password from the login form. If None, it is logout request.
+        :return: True if logged in.
+        """
+
+        with self._lock:
+            self._logged_in = password is not None and password == self._password
+            return self._logged_in
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,96 @@
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+
+JOURNAL_SERVICES = ("systemd[1]", "tango-urmc[412]", "xinetd[388]", "kernel", "sshd[927]")
+SLOT_NUMBER: int = 16
+
+
+def _get_journal_record(index: int, record_time: datetime) -> str:
+    """
+    :param index: record number;
+    :param record_time: time of record.
+    :return: record of journal in the format of journalctl.
+    """
+
+    service = JOURNAL_SERVICES[index % len(JOURNAL_SERVICES)]
+    return f"{record_time.strftime('%b %d %H:%M:%S')} bvvu {service}: message #{index} state={index * 7919 % 1000}"
+
+
+def generate_journal_snapshots(dir_name: str, snapshot_number: int, lines_per_snapshot: int, loss_rate: float = 0.05,
+                               log_types: List[str] = ("general", "urmc", "xinet"), seed: int = 0) -> List[str]:
+    """
+    Function generates snapshots of BVVU journals as they are saved by missing_log_records_test. Journal grows
+    between snapshots, each snapshot contains the last lines_per_snapshot records. With the given probability
+    records written around the previous snapshot are lost, so the last record of the previous snapshot is missing.
+    :param dir_name: directory where to save snapshots;
+    :param snapshot_number: number of snapshots of each log type;
+    :param lines_per_snapshot: number of records in each snapshot;
+    :param loss_rate: probability of loss between two snapshots;
+    :param log_types: log types for which to generate snapshots;
+    :param seed: seed of random generator.
+    :return: names of created files.
+    """
+
+    os.makedirs(dir_name, exist_ok=True)
+    rng = random.Random(seed)
+    start_time = datetime(2024, 1, 1)
+    step = max(1, lines_per_snapshot // 10)
+    file_names = []
+    for log_type in log_types:
+        end = lines_per_snapshot
+        lost = set()
+        for snapshot_index in range(snapshot_number):
+            saved_at = start_time + timedelta(minutes=5 * snapshot_index)
+            if snapshot_index and rng.random() < loss_rate:
+                lost.add(end - step - 1)
+            size = 10 + 0.1 * snapshot_index
+            file_name = os.path.join(dir_name, f"{log_type} {saved_at.strftime('%Y-%m-%d_%H-%M-%S')} {size:.1f}M.txt")
+            with open(file_name, "w", encoding="utf-8") as file:
+                for index in range(end - lines_per_snapshot, end):
+                    if index not in lost:
+                        file.write(_get_journal_record(index, start_time + timedelta(seconds=index)) + "\n")
+            file_names.append(file_name)
+            end += step
+    return file_names
+
+
+def generate_usb_log(file_name: str, line_number: int, drop_rate: float = 0.01, seed: int = 0) -> int:
+    """
+    Function generates log of usb_slot_test in the format written by logger.add_file_handler. Each test iteration
+    contains records about missing modules from all sources and other records of the testing system.
+    :param file_name: name of file with log;
+    :param line_number: approximate number of lines in the log;
+    :param drop_rate: probability that module is missing in a slot at a check;
+    :param seed: seed of random generator.
+    :return: number of test iterations in the log.
+    """
+
+    rng = random.Random(seed)
+    check_time = datetime(2024, 1, 1)
+    lines = 0
+    iteration = 0
+    with open(file_name, "w", encoding="utf-8") as file:
+        while lines < line_number:
+            iteration += 1
+            stamp = check_time.strftime("%Y-%m-%d %H:%M:%S")
+            missing = [slot for slot in range(1, SLOT_NUMBER + 1) if rng.random() < drop_rate]
+            records = [f"Test #{iteration}",
+                       f"[UIOB] Number of missing modules: {len(missing)}, missing modules: {missing}",
+                       "[SSH] Probe 'STATUS' took 0.004 s",
+                       f"Reboot number from '/home/cubielord_status.txt' file = {iteration}",
+                       "CUBIELORD is inactive"]
+            for source in ("SSH_BEFORE", "SSH_DEV", "SSH_DEV_XIMC"):
+                missing = sorted(f"ttyACM{slot - 1}" if source == "SSH_DEV" else f"{slot:0>8}"
+                                 for slot in range(1, SLOT_NUMBER + 1) if rng.random() < drop_rate)
+                records.append(f"[{source}] Number of missing modules: {len(missing)}, missing modules: {missing}")
+            records.append("Power turned off, socket = 1")
+            records.append("Power turned on, socket = 1")
+            records.append(f"BVVU rebooted in {40 + rng.random() * 10:.1f} s (down: 1.2 s, ssh: 35.0 s, admin: 4.1 s)")
+            for record in records:
+                file.write(f"[{stamp} INFO] {record}\n")
+            lines += len(records)
+            check_time += timedelta(seconds=60)
+    return iteration
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchmarkRecorder:
+    """
+    Class measures execution time of benchmarks, saves results to a JSON lines file and compares them with results
+    saved earlier, so that slowdowns of the analyzers are noticed.
+    """
+
+    THRESHOLD: float = 1.2
+
+    def __init__(self, suite: str) -> None:
+        """
+        :param suite: name of benchmark suite.
+        """
+
+        self._results: List[Dict[str, Any]] = []
+        self._suite: str = suite
+
+    @staticmethod
+    def _get_commit() -> Optional[str]:
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    @staticmethod
+    def _load(file_name: str) -> List[Dict[str, Any]]:
+        """
+        :param file_name: name of file with results.
+        :return: list of results from file.
+        """
+
+        with open(file_name, "r", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def add(self, name: str, size: int, seconds: float) -> None:
+        """
+        :param name: name of benchmark;
+        :param size: size of data (number of lines or iterations);
+        :param seconds: execution time in seconds.
+        """
+
+        self._results.append({"suite": self._suite,
+                              "name": name,
+                              "size": size,
+                              "seconds": seconds,
+                              "lines_per_second": size / seconds if seconds else None})
+
+    def compare(self, baseline_file: str, threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        :param baseline_file: name of file with results to compare with. For each benchmark the last result is used;
+        :param threshold: ratio of times above which the result is considered a regression.
+        :return: list of results that are slower than baseline.
+        """
+
+        baseline = {(result["suite"], result["name"], result["size"]): result for result in self._load(baseline_file)}
+        regressions = []
+        for result in self._results:
+            base_result = baseline.get((result["suite"], result["name"], result["size"]))
+            if base_result is None or not base_result["seconds"]:
+                continue
+            ratio = result["seconds"] / base_result["seconds"]
+            if ratio > threshold:
+                logging.warning("Regression in '%s' (size %d): %.3f s, baseline %.3f s (x%.2f)", result["name"],
+                                result["size"], result["seconds"], base_result["seconds"], ratio)
+                regressions.append(result)
+        return regressions
+
+    def measure(self, name: str, size: int, function: Callable[[], Any], repeat: int = 1) -> float:
+        """
+        :param name: name of benchmark;
+        :param size: size of data (number of lines);
+        :param function: function to be measured;
+        :param repeat: number of runs, the best time is taken.
+        :return: execution time in seconds.
+        """
+
+        times = []
+        for _ in range(repeat):
+            # Logging of analyzers is disabled so that only the analysis itself is measured
+            logging.disable(logging.CRITICAL)
+            try:
+                start_time = time.perf_counter()
+                function()
+                times.append(time.perf_counter() - start_time)
+            finally:
+                logging.disable(logging.NOTSET)
+        seconds = min(times)
+        self.add(name, size, seconds)
+        logging.info("%s (size %d): %.3f s, %.0f lines/s", name, size, seconds, size / seconds if seconds else 0)
+        return seconds
+
+    def save(self, file_name: str) -> None:
+        """
+        :param file_name: name of JSON lines file to which results are appended.
+        """
+
+        common = {"commit": self._get_commit(),
+                  "datetime": datetime.now().isoformat(sep=" ", timespec="seconds"),
+                  "python": platform.python_version()}
+        with open(file_name, "a", encoding="utf-8") as file:
+            for result in self._results:
+                file.write(json.dumps({**common, **result}) + "\n")
+        logging.info("Results saved to '%s'", file_name)
@@ -0,0 +1,245 @@
+import logging
+import re
+import select
+import shlex
+import socket
+import threading
+import time
+from typing import List, Optional
+import paramiko
+from bvvu_simulator import SimulatedBvvu
+
+
+class _ServerInterface(paramiko.ServerInterface):
+
+    def __init__(self, server: "SshServer") -> None:
+        self._server: SshServer = server
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        if username == self._server.username and password == self._server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        threading.Thread(target=self._server.run_exec, args=(channel, command.decode("utf-8")), daemon=True).start()
+        return True
+
+    def check_channel_pty_request(self, *args) -> bool:
+        return True
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_shell_request(self, channel: paramiko.Channel) -> bool:
+        threading.Thread(target=self._server.run_shell, args=(channel,), daemon=True).start()
+        return True
+
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+
+
+class SshServer:
+    """
+    Class simulates ssh server of BVVU. Server listens only while simulated device is up, so the port is closed
+    during reboot, and all sessions are dropped when device goes down. Commands used by the testing systems are
+    supported both in exec requests (usb_slot_test) and in the interactive CLI (missing_log_records_test).
+    """
+
+    CHECK_INTERVAL: float = 0.05
+    LOG_CHANNEL: str = "ssh_server"
+    CURSOR_PATTERN = re.compile(r"--cursor='s=(?P<index>\d+)'")
+    DATE_COMMAND: str = "$(date +%s%N)"
+    JOURNAL_UNITS = {"-u tango-urmc": "urmc",
+                     "-u xinet": "xinet"}
+    PROMPT: str = "bvvu"
+
+    def __init__(self, device: SimulatedBvvu, port: int = 0, username: str = "root", password: str = "") -> None:
+        """
+        :param device: simulated device;
+        :param port: port for ssh connection. If 0, free port is chosen;
+        :param username: username for connecting via ssh;
+        :param password: password for connecting via ssh.
+        """
+
+        # Port checks of reboot waiter are seen by server as broken connections, errors about them are not logged
+        logging.getLogger(SshServer.LOG_CHANNEL).setLevel(logging.CRITICAL)
+        self._device: SimulatedBvvu = device
+        self._host_key: paramiko.RSAKey = paramiko.RSAKey.generate(2048)
+        self._listener: Optional[socket.socket] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._transports: List[paramiko.Transport] = []
+        self.password: str = password
+        self.port: int = port
+        self.username: str = username
+
+    def _accept(self) -> None:
+        try:
+            client, _ = self._listener.accept()
+        except OSError:
+            return
+        transport = paramiko.Transport(client)
+        transport.set_log_channel(SshServer.LOG_CHANNEL)
+        transport.add_server_key(self._host_key)
+        try:
+            transport.start_server(server=_ServerInterface(self))
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+            return
+        with self._lock:
+            self._transports = [item for item in self._transports if item.is_active()]
+            self._transports.append(transport)
+
+    @staticmethod
+    def _close_channel(channel: paramiko.Channel) -> None:
+        """
+        :param channel: channel to be closed. Transport may be already dropped by simulated reboot.
+        """
+
+        try:
+            channel.close()
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+
+    def _close_sessions(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        with self._lock:
+            for transport in self._transports:
+                transport.close()
+            self._transports = []
+
+    def _execute(self, command: str) -> str:
+        """
+        :param command: command of BVVU shell or CLI.
+        :return: command output.
+        """
+
+        if command.startswith("journalctl --disk-usage"):
+            return f"Archived and active journals take up {self._device.get_disk_usage()} in the file system.\n"
+        if command.startswith("journalctl"):
+            return self._get_journal(command)
+        if command.startswith("echo "):
+            return command[5:].replace(SshServer.DATE_COMMAND, str(time.time_ns())).strip("\"") + "\n"
+        if command.startswith("printf "):
+            text, *args = shlex.split(command[7:].replace(SshServer.DATE_COMMAND, str(time.time_ns())))
+            return text.replace("\\n", "\n") % tuple(args)
+
+        boot_number = self._device.boot_number
+        modules = [slot for slot in range(1, SimulatedBvvu.SLOT_NUMBER + 1) if slot not in self._device.missing_slots]
+        if command == "cat /home/cubielord_status.txt":
+            return (f"reboot_number={boot_number}\nstatus\n* cubielord.service - Cubielord\n"
+                    f"   Loaded: loaded (/lib/systemd/system/cubielord.service; disabled)\n"
+                    f"   Active: inactive (dead)\n")
+        if command == "cat /home/before_usbreset.txt":
+            return f"reboot_number={boot_number}\nmodules\n" + "\n".join(f"{slot:0>8}" for slot in modules) + "\n"
+        if command == "ls /dev | grep ttyACM":
+            return "".join(f"ttyACM{slot - 1}\n" for slot in modules)
+        if command == "ls /dev/ximc":
+            return "  ".join(f"{slot:0>8}" for slot in modules) + "\n"
+        if command in ("enable", "terminal length 0"):
+            return ""
+        return f"sh: {command.split(' ')[0]}: not found\n"
+
+    def _get_journal(self, command: str) -> str:
+        """
+        :param command: journalctl command.
+        :return: records of journal in the format of journalctl with cursor of the last record.
+        """
+
+        log_name = next((name for unit, name in SshServer.JOURNAL_UNITS.items() if unit in command), "general")
+        result = SshServer.CURSOR_PATTERN.search(command)
+        records = self._device.get_journal(log_name, int(result["index"]) if result else 0, "short-iso" in command)
+        if not records:
+            return "-- No entries --\n"
+        lines = ["-- Journal begins at simulated BVVU. --"]
+        lines.extend(record["record"] for record in records)
+        if "--show-cursor" in command:
+            lines.append(f"-- cursor: {records[-1]['cursor']}")
+        return "\n".join(lines) + "\n"
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self._device.is_ssh_alive():
+                if self._listener is None:
+                    self._start_listening()
+                readable, _, _ = select.select([self._listener], [], [], SshServer.CHECK_INTERVAL)
+                if readable:
+                    self._accept()
+            else:
+                if self._listener is not None:
+                    logging.debug("Simulated BVVU %s is down, ssh server stopped", self._device.host)
+                    self._close_sessions()
+                time.sleep(SshServer.CHECK_INTERVAL)
+        self._close_sessions()
+
+    def _start_listening(self) -> None:
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self._device.host, self.port))
+        self._listener.listen(5)
+        self.port = self._listener.getsockname()[1]
+
+    def run_exec(self, channel: paramiko.Channel, command: str) -> None:
+        """
+        :param channel: channel of exec request;
+        :param command: command, several commands can be separated by '; '.
+        """
+
+        try:
+            output = ""
+            for part in command.split("; "):
+                output += self._execute(part.replace(" 2>&1", "").strip())
+            channel.sendall(output.encode("utf-8"))
+            channel.send_exit_status(0)
+            # Channel is closed by client, otherwise it could be closed before reply to exec request is sent
+            channel.shutdown_write()
+            while channel.recv(1024):
+                pass
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            self._close_channel(channel)
+
+    def run_shell(self, channel: paramiko.Channel) -> None:
+        """
+        Method simulates BVVU CLI: command is echoed, its output is sent with CRLF line endings and then prompt.
+        :param channel: channel of shell request.
+        """
+
+        prompt = f"{SshServer.PROMPT}> "
+        try:
+            channel.sendall(f"Welcome to simulated BVVU\r\n{prompt}".encode("utf-8"))
+            buffer = ""
+            while True:
+                data = channel.recv(4096)
+                if not data:
+                    break
+                buffer += data.decode("utf-8", errors="replace")
+                while "\n" in buffer:
+                    command, buffer = buffer.split("\n", 1)
+                    command = command.strip("\r ")
+                    if command == "enable":
+                        prompt = f"{SshServer.PROMPT}# "
+                    output = self._execute(command) if command else ""
+                    channel.sendall(f"{command}\r\n{output.replace(chr(10), chr(13) + chr(10))}{prompt}"
+                                    .encode("utf-8"))
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            self._close_channel(channel)
+
+    def start(self) -> None:
+        if self._device.is_ssh_alive():
+            self._start_listening()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from records import RecordIndex
+
+
+class AnalysisCache:
+    """
+    Class keeps results of checking snapshots between runs of the analyzer. For each snapshot the size and
+    modification time of its file, the last record and the result of the check against the previous snapshot are
+    saved in the state file together with ranges of records lost since the previous snapshot, and digests of its
+    records are saved in a separate index file. Snapshots whose files have not changed since the last run are not
+    read again.
+    """
+
+    DIR_NAME: str = "analysis_cache"
+    INDEX_EXTENSION: str = ".idx"
+    STATE_FILE: str = "state.json"
+    VERSION: int = 3
+
+    def __init__(self, dir_name: str) -> None:
+        """
+        :param dir_name: directory with logs.
+        """
+
+        self._dir_name: str = dir_name
+        self._cache_dir: str = os.path.join(dir_name, AnalysisCache.DIR_NAME)
+        self._changed: bool = False
+        self._read_number: int = 0
+        self._snapshots: Dict[str, Dict[str, Any]] = self._read_state()
+
+    def _get_entry(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        :param file_name: name of snapshot file.
+        :return: saved data of snapshot if file of snapshot has not changed since it was saved.
+        """
+
+        entry = self._snapshots.get(file_name)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(os.path.join(self._dir_name, file_name))
+        except OSError:
+            return None
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime"]:
+            return None
+        return entry
+
+    def _get_index_path(self, file_name: str) -> str:
+        return os.path.join(self._cache_dir, file_name + AnalysisCache.INDEX_EXTENSION)
+
+    def _read_state(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: saved data of snapshots.
+        """
+
+        try:
+            with open(os.path.join(self._cache_dir, AnalysisCache.STATE_FILE), "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if state.get("version") != AnalysisCache.VERSION:
+            return {}
+        return state.get("snapshots", {})
+
+    def get_index(self, file_name: str) -> RecordIndex:
+        """
+        :param file_name: name of snapshot file.
+        :return: index of records of snapshot. It is loaded from cache or built from file and saved to cache.
+        """
+
+        entry = self._get_entry(file_name)
+        index_path = self._get_index_path(file_name)
+        if entry is not None and os.path.exists(index_path):
+            try:
+                index = RecordIndex.load(index_path, entry["last_record"])
+                if len(index) == entry["records"]:
+                    return index
+            except OSError:
+                pass
+
+        self._read_number += 1
+        file_path = os.path.join(self._dir_name, file_name)
+        stat = os.stat(file_path)
+        index = RecordIndex.from_file(file_path)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        index.save(index_path)
+        self._snapshots[file_name] = {"size": stat.st_size,
+                                      "mtime": stat.st_mtime_ns,
+                                      "records": len(index),
+                                      "last_record": index.last_record}
+        self._changed = True
+        return index
+
+    def get_last_record(self, file_name: str) -> Optional[str]:
+        """
+        :param file_name: name of snapshot file.
+        :return: last record of snapshot.
+        """
+
+        entry = self._get_entry(file_name)
+        if entry is not None:
+            return entry["last_record"]
+        return self.get_index(file_name).last_record
+
+    def get_loss(self, file_name: str, previous_file_name: str) -> Optional[Dict[str, Optional[bool]]]:
+        """
+        :param file_name: name of snapshot file;
+        :param previous_file_name: name of file of the previous snapshot.
+        :return: dictionary with saved result of check and lost ranges if the snapshot was checked against the same
+        unchanged previous snapshot, otherwise None.
+        """
+
+        entry = self._get_entry(file_name)
+        if entry is None or "loss" not in entry or entry.get("previous") != previous_file_name:
+            return None
+        previous_entry = self._get_entry(previous_file_name)
+        if previous_entry is None or previous_entry["last_record"] != entry.get("previous_record"):
+            return None
+        return {"loss": entry["loss"],
+                "lost_ranges": entry["lost_ranges"]}
+
+    def save(self) -> None:
+        logging.info("Snapshots read from files (not found in analysis cache): %d", self._read_number)
+        if not self._changed:
+            return
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        state_path = os.path.join(self._cache_dir, AnalysisCache.STATE_FILE)
+        tmp_path = f"{state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": AnalysisCache.VERSION, "snapshots": self._snapshots}, file)
+        os.replace(tmp_path, state_path)
+        self._changed = False
+
+    def set_loss(self, file_name: str, previous_file_name: str, previous_record: Optional[str],
+                 loss: Optional[bool], lost_ranges: List[Dict[str, Any]]) -> None:
+        """
+        :param file_name: name of snapshot file;
+        :param previous_file_name: name of file of the previous snapshot;
+        :param previous_record: last record of the previous snapshot;
+        :param loss: True if the last record of the previous snapshot was not found, None if previous snapshot is
+        empty;
+        :param lost_ranges: ranges of records of the previous snapshot lost in the snapshot.
+        """
+
+        entry = self._get_entry(file_name)
+        if entry is None:
+            self.get_index(file_name)
+            entry = self._snapshots[file_name]
+        entry.update({"previous": previous_file_name,
+                      "previous_record": previous_record,
+                      "loss": loss,
+                      "lost_ranges": lost_ranges})
+        self._changed = True
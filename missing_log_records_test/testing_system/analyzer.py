@@ -1,21 +1,79 @@
 import argparse
+import json
 import logging
 import os
-import re
-from datetime import datetime
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
+import journal_file as jf
+from analysis_cache import AnalysisCache
+from loss_statistics import LossStatistics
+from records import describe_lost_ranges, find_lost_ranges, RecordIndex
+from report import ReportWriter
+from results import ResultStore
+from snapshot_scanner import SnapshotScanner
 
 
+MAX_POINTS: int = 5000
 logging.basicConfig(format="[%(asctime)s %(levelname)s] %(message)s", level=logging.INFO, datefmt="%Y-%m-%d %H:%M:%S")
 
 
-def analyze_logs_in_dir(dir_name: str) -> Optional[Dict[str, List]]:
+def _downsample(times: np.ndarray, sizes: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param times: dates and times when logs were saved;
+    :param sizes: sizes of logs;
+    :param max_points: maximum number of points.
+    :return: arrays with times and sizes in which every n-th point is left so that there are at most max_points
+    points. The points with the minimum and maximum size are always left.
+    """
+
+    if len(times) <= max_points:
+        return times, sizes
+
+    indexes = np.linspace(0, len(times) - 1, max_points - 2).astype(np.int64)
+    if not np.isnan(sizes).all():
+        indexes = np.unique(np.concatenate((indexes, [np.nanargmin(sizes), np.nanargmax(sizes)])))
+    return times[indexes], sizes[indexes]
+
+
+def _show_figure(figure: plt.Figure, report: Optional[ReportWriter], name: str, caption: str) -> None:
+    """
+    :param figure: chart;
+    :param report: if given, the chart is saved to files by the report writer, otherwise it is shown;
+    :param name: name of files for the chart;
+    :param caption: caption of the chart in the report.
+    """
+
+    if report is not None:
+        report.add_figure(figure, name, caption)
+    else:
+        plt.show()
+
+
+def _get_record_index(dir_name: str, file_name: str, cache: Optional[AnalysisCache] = None) -> RecordIndex:
+    """
+    :param dir_name: directory where files are stored;
+    :param file_name: name of log file;
+    :param cache: analysis cache.
+    :return: index of records from log file.
+    """
+
+    if cache is not None:
+        return cache.get_index(file_name)
+    return RecordIndex.from_file(os.path.join(dir_name, file_name))
+
+
+def analyze_logs_in_dir(dir_name: str, use_results: bool = True, use_cache: bool = True
+                        ) -> Optional[Dict[str, List]]:
     """
     Function analyzes logs from a given directory. Function creates a dictionary with data for three types of log:
     'general', 'urmc', 'xinet'.
-    :param dir_name: directory name.
+    :param dir_name: directory name;
+    :param use_results: if True and the directory contains database with results written by the testing system,
+    data is loaded from the database without reading logs;
+    :param use_cache: if True, results of checks from the previous runs are taken from the analysis cache, so only
+    new or changed snapshots are read.
     :return: dictionary with data for three types of log.
     """
 
@@ -23,14 +81,24 @@ def analyze_logs_in_dir(dir_name: str) -> Optional[Dict[str, List]]:
         logging.error("Directory '%s' does not exist", dir_name)
         return
 
+    if use_results and ResultStore.exists(dir_name):
+        logging.info("Loading results from '%s'", ResultStore.FILE_NAME)
+        results = ResultStore(os.path.join(dir_name, ResultStore.FILE_NAME))
+        try:
+            return {log_type: [snapshot for snapshot in results.load_snapshots(log_type)
+                               if snapshot["size"] is not None]
+                    for log_type in ("general", "urmc", "xinet")}
+        finally:
+            results.close()
+
+    cache = AnalysisCache(dir_name) if use_cache else None
+    scanner = SnapshotScanner(dir_name, os.path.join(dir_name, AnalysisCache.DIR_NAME) if use_cache else None)
     total_data = {}
-    for log_type in ("general", "urmc", "xinet"):
-        log_data = []
-        for data_from_file_name in get_data_from_file_name(dir_name, log_type):
-            data_from_file_name["log"] = read_file(os.path.join(dir_name, data_from_file_name["file_name"]))
-            log_data.append(data_from_file_name)
-        check_logs(log_type, log_data)
+    for log_type, log_data in scanner.scan().items():
+        check_logs_in_files(dir_name, log_type, log_data, cache)
         total_data[log_type] = log_data
+    if cache is not None:
+        cache.save()
     return total_data
 
 
@@ -63,58 +131,116 @@ def check_logs(log_name: str, list_of_logs: List[Dict[str, Any]]) -> None:
     logging.info("Checking %s log completed", log_name)
 
 
-def draw_data(data: Dict[str, List[Dict[str, Any]]], device_name: str = "") -> None:
+def check_logs_in_files(dir_name: str, log_name: str, list_of_logs: List[Dict[str, Any]],
+                        cache: Optional[AnalysisCache] = None) -> None:
+    """
+    Function checks logging journals in the same way as check_logs, but journals are not loaded into memory. Each
+    file is read line by line once, and the presence of the last record from the journal with number i is checked
+    in the compact index of digests of the journal with number i+1. Indexes of two consecutive journals are also
+    aligned to find all records of the journal with number i lost in the journal with number i+1: their number and
+    ranges with the first and the last lost record are saved in the log data. So only two indexes are kept in
+    memory at a time.
+    :param dir_name: directory where files are stored;
+    :param log_name: log type (may be 'general', 'urmc' and 'xinet') to check;
+    :param list_of_logs: log data list;
+    :param cache: analysis cache with results of checks from the previous runs.
+    """
+
+    logging.info("")
+    logging.info("%s log checking...", log_name)
+    previous_index = None
+    for index, log_data in enumerate(list_of_logs[1:], 1):
+        file_name = log_data["file_name"]
+        next_index = None
+        first_file_name = list_of_logs[index - 1]["file_name"]
+        cached = cache.get_loss(file_name, first_file_name) if cache is not None else None
+        if cached is not None:
+            loss = cached["loss"]
+            lost_ranges = cached["lost_ranges"]
+        else:
+            if previous_index is None:
+                previous_index = _get_record_index(dir_name, first_file_name, cache)
+            next_index = _get_record_index(dir_name, file_name, cache)
+            last_record = previous_index.last_record
+            loss = None if last_record is None else last_record not in next_index
+            lost_ranges = describe_lost_ranges(os.path.join(dir_name, first_file_name),
+                                               find_lost_ranges(previous_index.digests, next_index.digests))
+            if cache is not None:
+                cache.set_loss(file_name, first_file_name, last_record, loss, lost_ranges)
+        previous_index = next_index
+
+        if loss is None:
+            logging.debug("File '%s' is empty", first_file_name)
+            continue
+
+        if loss:
+            # The last record of the journal is not found, so it is the last record of the last lost range
+            logging.error("Last record '%s' from '%s' not found in '%s'", lost_ranges[-1]["last_record"],
+                          first_file_name, file_name)
+        else:
+            logging.debug("Last record from '%s' found in '%s'", first_file_name, file_name)
+        for lost_range in lost_ranges:
+            logging.warning("%d records lost from '%s' (records %d-%d): from '%s' to '%s'", lost_range["count"],
+                            first_file_name, lost_range["start"], lost_range["start"] + lost_range["count"] - 1,
+                            lost_range["first_record"], lost_range["last_record"])
+        log_data["loss"] = loss
+        log_data["lost"] = sum(lost_range["count"] for lost_range in lost_ranges)
+        log_data["lost_ranges"] = lost_ranges
+    logging.info("Checking %s log completed", log_name)
+
+
+def draw_data(statistics: LossStatistics, device_name: str = "", report: Optional[ReportWriter] = None,
+              max_points: int = MAX_POINTS) -> None:
     """
     Function visualizes data about the loss of records in the logs.
-    :param data: dictionary with data for three types of log;
-    :param device_name: name of device that owns the collected data.
-    """
-
-    total_log_size_over_time = {"datetime": [],
-                                "size": []}
-    log_loss_cases = {}
-    for log_type, log_type_data in data.items():
-        log_loss_cases[log_type] = {"datetime": [],
-                                    "size": []}
-        for item in log_type_data:
-            if log_type == "general":
-                total_log_size_over_time["datetime"].append(item["datetime"])
-                total_log_size_over_time["size"].append(item["size"])
-            if item.get("loss", False):
-                log_loss_cases[log_type]["datetime"].append(item["datetime"])
-                log_loss_cases[log_type]["size"].append(item["size"])
-
-    number_of_cases_without_loss_at_all = 0
-    for item in total_log_size_over_time["datetime"]:
-        item_good = True
-        for log_type_data in log_loss_cases.values():
-            if item in log_type_data["datetime"]:
-                item_good = False
-                break
-        if item_good:
-            number_of_cases_without_loss_at_all += 1
-    total_number_of_cases = len(total_log_size_over_time["datetime"])
-
-    _, ax = plt.subplots()
-    ax.scatter(total_log_size_over_time["datetime"], total_log_size_over_time["size"], facecolors="none",
-               edgecolors="black")
+    :param statistics: statistics of losses for three types of log;
+    :param device_name: name of device that owns the collected data;
+    :param report: if given, charts are saved to files by the report writer instead of being shown;
+    :param max_points: maximum number of points for sizes of logs on the chart.
+    """
+
+    total_number_of_cases = statistics.total
+    if not total_number_of_cases:
+        logging.info("There is no data for the chart")
+        return
+
+    figure, ax = plt.subplots()
+    times, sizes = _downsample(statistics.times, statistics.sizes, max_points)
+    ax.scatter(times, sizes, facecolors="none", edgecolors="black")
     colors = {"general": "red",
               "urmc": "blue",
               "xinet": "green"}
-    for log_type, log_type_data in log_loss_cases.items():
-        number = len(log_type_data["size"])
-        percentage = 100 * number / total_number_of_cases
-        ax.scatter(log_type_data["datetime"], log_type_data["size"], c=colors[log_type], alpha=0.5,
-                   label=f"{log_type} ({number}/{total_number_of_cases} = {percentage:.1f}%)")
+    for log_type, (loss_times, loss_sizes) in statistics.loss_points.items():
+        number = statistics.get_loss_number(log_type)
+        ax.scatter(loss_times, loss_sizes, c=colors[log_type], alpha=0.5,
+                   label=f"{log_type} ({number}/{total_number_of_cases} = {statistics.get_loss_rate(log_type):.1f}%)")
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-    ax.set_xlabel(f"Время ({get_start_date(total_log_size_over_time)})")
+    ax.set_xlabel(f"Время ({statistics.get_start_date()})")
     ax.set_ylabel("Размер журналов, Мбайт")
     ax.set_title(f"Потери записей в журналах БВВУ{f' {device_name}' if device_name else ''}\n"
-                 f"(всего журналов - {total_number_of_cases}, журналов без потерь - "
-                 f"{number_of_cases_without_loss_at_all}, "
-                 f"{number_of_cases_without_loss_at_all / total_number_of_cases * 100:.1f}%)")
+                 f"(всего журналов - {total_number_of_cases}, журналов без потерь - {statistics.without_loss}, "
+                 f"{statistics.without_loss / total_number_of_cases * 100:.1f}%)")
     ax.legend()
-    plt.show()
+    _show_figure(figure, report, "losses", "Потери записей в журналах")
+
+    figure, axs = plt.subplots(2, 1)
+    by_time = statistics.get_rates_by_time()
+    width = by_time["starts"][1] - by_time["starts"][0] if len(by_time["starts"]) > 1 else np.timedelta64(1, "s")
+    axs[0].bar(by_time["starts"], by_time["rate"], width=width, align="edge", color="red", alpha=0.5)
+    axs[0].xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+    axs[0].set_xlabel(f"Время ({statistics.get_start_date()})")
+    axs[0].set_ylabel("Журналы с потерями, %")
+    by_size = statistics.get_rates_by_size()
+    if len(by_size["edges"]):
+        axs[1].bar(by_size["edges"][:-1], by_size["rate"], width=np.diff(by_size["edges"]), align="edge",
+                   color="red", alpha=0.5)
+    axs[1].set_xlabel("Размер журналов, Мбайт")
+    axs[1].set_ylabel("Журналы с потерями, %")
+    figure.tight_layout()
+    _show_figure(figure, report, "loss_rates", "Доля журналов с потерями по времени и по размеру журналов")
+    if report is not None:
+        report.add_text(json.dumps(statistics.get_summary(), indent=2))
+        report.save()
 
 
 def get_data_from_file_name(dir_name: str, log_type: str) -> Generator[Dict[str, Any], None, None]:
@@ -122,40 +248,49 @@ def get_data_from_file_name(dir_name: str, log_type: str) -> Generator[Dict[str,
     Function extracts useful information from the filename.
     :param dir_name: directory where files are stored;
     :param log_type: type of log file belongs to.
-    :return: generator with dictionary with filename, date and time of log was saved and full log size.
+    :return: generator with dictionary with filename, date and time of log was saved and full log size. Files are
+    sorted by date and time of saving.
     """
 
-    pattern = re.compile(rf"{log_type} (\d+-\d+-\d+_\d+-\d+-\d+) (.*[kKMG])\.txt")
-    for file_name in os.listdir(dir_name):
-        result = pattern.search(file_name)
-        if result:
-            multiplier = {"M": 1,
-                          "G": 1024,
-                          "K": 0.00097656}.get(result.group(2)[-1].upper(), 1)
-            yield {"file_name": file_name,
-                   "datetime": datetime.strptime(result.group(1), "%Y-%m-%d_%H-%M-%S"),
-                   "size": multiplier * float(result.group(2)[:-1])}
-
-
-def get_start_date(data: Dict[str, List[Any]]) -> str:
-    return data["datetime"][0].strftime("%d.%m.%Y")
+    yield from SnapshotScanner(dir_name).scan()[log_type]
 
 
 def read_file(file_path: str) -> List[str]:
     """
-    Function reads file.
+    Function reads file, compressed files are decompressed.
     :param file_path: path to file.
     :return: list with lines from file.
     """
 
-    with open(file_path, "r", encoding="utf-8") as file:
-        return [log for log in file.read().split("\n") if log]
+    return [log for log in jf.read_text(file_path).split("\n") if log]
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Script to analyze logs")
     parser.add_argument("dir_name", type=str, help="Directory name containing logs")
     parser.add_argument("--device_name", type=str, default="", help="The name of device from which logs were collected")
+    parser.add_argument("--recheck", action="store_true",
+                        help="Check logs from files even if the directory contains database with results")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Do not use results of checks from the previous runs of the analyzer")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Directory where to save the chart. If given, the chart is saved to files and not shown, "
+                             "so the analyzer can run without a display")
+    parser.add_argument("--formats", type=str, nargs="+", default=["png", "html"], choices=ReportWriter.FORMATS,
+                        help="Formats of files with the chart")
+    parser.add_argument("--max_points", type=int, default=MAX_POINTS,
+                        help="Maximum number of points for sizes of logs on the chart")
+    parser.add_argument("--summary", type=str, default=None, help="Name of JSON file where to save loss statistics")
     args = parser.parse_args()
 
-    draw_data(analyze_logs_in_dir(os.path.join(os.path.curdir, args.dir_name)), args.device_name)
+    report_writer = None
+    if args.output:
+        plt.switch_backend("Agg")
+        report_writer = ReportWriter(args.output, args.formats, "Потери записей в журналах БВВУ")
+    data = analyze_logs_in_dir(os.path.join(os.path.curdir, args.dir_name), not args.recheck, not args.no_cache)
+    if data is not None:
+        loss_statistics = LossStatistics(data)
+        if args.summary:
+            loss_statistics.save_summary(args.summary)
+            logging.info("Loss statistics saved to '%s'", args.summary)
+        draw_data(loss_statistics, args.device_name, report_writer, args.max_points)
@@ -0,0 +1,92 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+
+
+class FleetProgress:
+    """
+    Class collects progress of tests running on several BVVUs at the same time.
+    """
+
+    def __init__(self, hosts: List[str], reboots: int) -> None:
+        """
+        :param hosts: IP addresses of tested devices;
+        :param reboots: number of reboots for each device.
+        """
+
+        self._lock: threading.Lock = threading.Lock()
+        self._reboots: int = reboots
+        self._states: Dict[str, Dict[str, Any]] = {host: {"done": 0, "status": "waiting"} for host in hosts}
+
+    def get_summary(self) -> str:
+        """
+        :return: string with progress of all devices.
+        """
+
+        with self._lock:
+            done = sum(state["done"] for state in self._states.values())
+            total = self._reboots * len(self._states)
+            devices = ", ".join(f"{host} {state['done']}/{self._reboots} ({state['status']})"
+                                for host, state in self._states.items())
+        return f"Fleet progress {done}/{total}: {devices}"
+
+    def set_status(self, host: str, status: str) -> None:
+        """
+        :param host: IP address of device;
+        :param status: new status of test on device.
+        """
+
+        with self._lock:
+            self._states[host]["status"] = status
+
+    def update(self, host: str, done: int) -> None:
+        """
+        :param host: IP address of device;
+        :param done: number of completed reboots.
+        """
+
+        with self._lock:
+            self._states[host]["done"] = done
+            self._states[host]["status"] = "running"
+
+
+def _run_device(testing_system: Any, host: str, progress: FleetProgress) -> None:
+    """
+    :param testing_system: testing system for device;
+    :param host: IP address of device;
+    :param progress: object with progress of all devices.
+    """
+
+    threading.current_thread().name = host
+    progress.set_status(host, "running")
+    try:
+        testing_system.run_test()
+    except Exception as exc:
+        progress.set_status(host, "failed")
+        logging.error("Test failed", exc_info=exc)
+    else:
+        progress.set_status(host, "passed")
+
+
+def run_fleet(testing_systems: Dict[str, Any], progress: FleetProgress, summary_period: float = 60) -> None:
+    """
+    Function runs independent tests on several BVVUs at the same time. Each device has its own testing system, so
+    logs of each device are saved to its own directory.
+    :param testing_systems: dictionary with testing system for each device;
+    :param progress: object with progress of all devices, testing systems should report their progress to it;
+    :param summary_period: period in seconds with which the combined progress is printed.
+    """
+
+    # Handlers are removed explicitly, since basicConfig(force=True) requires Python 3.8
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    logging.basicConfig(format="[%(asctime)s %(levelname)s] [%(threadName)s] %(message)s", level=logging.INFO)
+    with ThreadPoolExecutor(max_workers=len(testing_systems)) as executor:
+        not_done = {executor.submit(_run_device, testing_system, host, progress)
+                    for host, testing_system in testing_systems.items()}
+        while not_done:
+            _, not_done = wait(not_done, timeout=summary_period)
+            logging.info(progress.get_summary())
@@ -0,0 +1,198 @@
+import logging
+import os
+import zlib
+from typing import Any, BinaryIO, Dict, Generator, Optional, Tuple
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+EXTENSIONS: Dict[str, str] = {"gzip": ".gz",
+                              "zstd": ".zst"}
+FRAME_SIZE: int = 1024 * 1024
+READ_SIZE: int = 64 * 1024
+
+
+def _create_compressor(compression: str) -> Any:
+    """
+    :param compression: compression method ('zstd' or 'gzip').
+    :return: object that compresses one frame.
+    """
+
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    return zlib.compressobj(wbits=31)
+
+
+def _create_decompressor(compression: str) -> Any:
+    """
+    :param compression: compression method ('zstd' or 'gzip').
+    :return: object that decompresses one frame. Its attributes eof and unused_data show the end of frame.
+    """
+
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard package is required to read zstd compressed logs")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(wbits=31)
+
+
+def compress_frame(data: bytes, compression: str) -> bytes:
+    """
+    :param data: data of frame;
+    :param compression: compression method ('zstd' or 'gzip').
+    :return: independent compressed frame (gzip member or zstd frame). Frames can be concatenated in one file.
+    """
+
+    compressor = _create_compressor(compression)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress_frame(data: bytes, compression: str) -> bytes:
+    """
+    :param data: compressed frame (gzip member or zstd frame);
+    :param compression: compression method ('zstd' or 'gzip').
+    :return: decompressed data of frame.
+    """
+
+    decompressor = _create_decompressor(compression)
+    result = decompressor.decompress(data)
+    if not decompressor.eof:
+        raise ValueError("Compressed frame is incomplete")
+    return result
+
+
+def get_compression(file_path: str) -> Optional[str]:
+    """
+    :param file_path: path to log file.
+    :return: compression method of file by its extension or None if file is not compressed.
+    """
+
+    for compression, extension in EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return compression
+    return None
+
+
+def get_default_compression() -> str:
+    """
+    :return: zstd if zstandard package is installed, otherwise gzip.
+    """
+
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def iter_frames(file: BinaryIO, compression: str, offset: int = 0) -> Generator[Tuple[int, bytes], None, None]:
+    """
+    Function reads compressed file frame by frame. The frame boundaries are positions from which reading can be
+    continued, so only complete frames are returned: if the last frame is still being written, it is skipped.
+    :param file: file opened in binary mode;
+    :param compression: compression method ('zstd' or 'gzip');
+    :param offset: position in file of the beginning of frame from which to start reading.
+    :return: generator with position in file after the frame and decompressed data of the frame.
+    """
+
+    file.seek(offset)
+    decompressor = _create_decompressor(compression)
+    parts = []
+    data = b""
+    while True:
+        if not data:
+            data = file.read(READ_SIZE)
+            if not data:
+                return
+        parts.append(decompressor.decompress(data))
+        if not decompressor.eof:
+            offset += len(data)
+            data = b""
+            continue
+
+        offset += len(data) - len(decompressor.unused_data)
+        data = decompressor.unused_data
+        yield offset, b"".join(parts)
+        decompressor = _create_decompressor(compression)
+        parts = []
+
+
+def iter_lines(file_path: str) -> Generator[str, None, None]:
+    """
+    Function reads log file line by line, compressed files are decompressed frame by frame. Lines are split by '\n',
+    '\r' at the end of line is removed, so files with '\r\n' line endings give the same lines as analyzer.read_file.
+    :param file_path: path to log file.
+    :return: generator with lines from file.
+    """
+
+    compression = get_compression(file_path)
+    if compression is None:
+        with open(file_path, "r", encoding="utf-8", newline="\n") as file:
+            for line in file:
+                yield line.rstrip("\r\n")
+        return
+
+    with open(file_path, "rb") as file:
+        tail = b""
+        for _, data in iter_frames(file, compression):
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8").rstrip("\r")
+        if tail:
+            yield tail.decode("utf-8").rstrip("\r")
+
+
+def read_text(file_path: str) -> str:
+    """
+    :param file_path: path to log file, it may be compressed.
+    :return: text of log. Line endings are translated to '\n' as universal newlines of plain text files are.
+    """
+
+    compression = get_compression(file_path)
+    if compression is None:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    with open(file_path, "rb") as file:
+        text = b"".join(data for _, data in iter_frames(file, compression)).decode("utf-8")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def split_into_frames(data: bytes, frame_size: int = FRAME_SIZE) -> Generator[bytes, None, None]:
+    """
+    :param data: text of log;
+    :param frame_size: approximate size of frame.
+    :return: generator with parts of text. Each part, except maybe the last one, consists of whole lines.
+    """
+
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start + frame_size)
+        end = len(data) if end == -1 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def write_text(file_path: str, text: str, compression: Optional[str] = None) -> int:
+    """
+    Function saves log to file. If file has extension of compressed file, log is compressed by independent frames
+    of about FRAME_SIZE bytes, so that it can be read frame by frame.
+    :param file_path: path to log file;
+    :param text: text of log;
+    :param compression: compression method, by default it is determined by the file extension.
+    :return: number of bytes written to file.
+    """
+
+    compression = compression or get_compression(file_path)
+    if compression is None:
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return os.path.getsize(file_path)
+
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstandard package is required for zstd compression")
+    size = 0
+    with open(file_path, "wb") as file:
+        for data in split_into_frames(text.encode("utf-8")):
+            size += file.write(compress_frame(data, compression))
+    logging.debug("Log compressed to %d bytes in '%s'", size, file_path)
+    return size
@@ -0,0 +1,204 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+LOG_TYPES = ("general", "urmc", "xinet")
+
+
+class LossStatistics:
+    """
+    Class calculates statistics of record losses from data of snapshots prepared by the analyzer. Snapshots of
+    different log types are joined by the time when they were saved using arrays, so the calculation takes linear
+    time (apart from sorting) in the number of snapshots.
+    """
+
+    BUCKET_NUMBER: int = 24
+    SIZE_BIN_NUMBER: int = 10
+
+    def __init__(self, data: Dict[str, List[Dict[str, Any]]], bucket_number: int = BUCKET_NUMBER,
+                 size_bin_number: int = SIZE_BIN_NUMBER) -> None:
+        """
+        :param data: dictionary with data for three types of log;
+        :param bucket_number: number of time intervals for which loss rates are calculated;
+        :param size_bin_number: number of journal size intervals for which loss rates are calculated.
+        """
+
+        self._bucket_number: int = bucket_number
+        self._size_bin_number: int = size_bin_number
+        self.times: np.ndarray = np.array([item["datetime"] for item in data.get("general", [])],
+                                          dtype="datetime64[s]")
+        order = np.argsort(self.times, kind="stable")
+        self.times = self.times[order]
+        self.sizes: np.ndarray = np.array([item["size"] for item in data.get("general", [])], dtype=float)[order]
+        self.checked: Dict[str, int] = {}
+        self.lost_ranges: Dict[str, List[Dict[str, Any]]] = {}
+        self.lost_records: Dict[str, Optional[int]] = {}
+        self.loss_points: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.losses: Dict[str, np.ndarray] = {}
+        for log_type in LOG_TYPES:
+            log_type_data = data.get(log_type, [])
+            loss_items = [item for item in log_type_data if item.get("loss", False)]
+            loss_times = np.array([item["datetime"] for item in loss_items], dtype="datetime64[s]")
+            self.checked[log_type] = sum("loss" in item for item in log_type_data)
+            lost = [item["lost"] for item in log_type_data if item.get("lost") is not None]
+            self.lost_records[log_type] = sum(lost) if lost else None
+            self.lost_ranges[log_type] = [{"file_name": item["file_name"],
+                                           "datetime": str(item["datetime"]),
+                                           **lost_range}
+                                          for item in log_type_data for lost_range in item.get("lost_ranges", [])]
+            self.loss_points[log_type] = loss_times, np.array([item["size"] for item in loss_items], dtype=float)
+            # Snapshots of all log types are saved at the same time, so they are joined by time
+            self.losses[log_type] = np.isin(self.times, loss_times)
+
+    @property
+    def any_losses(self) -> np.ndarray:
+        """
+        :return: boolean array, True if there was a loss in at least one log type in the snapshot.
+        """
+
+        losses = np.zeros(len(self.times), dtype=bool)
+        for log_type_losses in self.losses.values():
+            losses |= log_type_losses
+        return losses
+
+    @staticmethod
+    def _get_streaks(losses: np.ndarray) -> Dict[str, int]:
+        """
+        :param losses: boolean array with losses in snapshots in time order.
+        :return: dictionary with the longest and the current number of consecutive snapshots with loss.
+        """
+
+        if not len(losses):
+            return {"longest": 0, "current": 0}
+        padded = np.concatenate(([0], losses.astype(np.int8), [0]))
+        changes = np.flatnonzero(np.diff(padded))
+        lengths = changes[1::2] - changes[::2]
+        current = int(lengths[-1]) if losses[-1] else 0
+        return {"longest": int(lengths.max()) if len(lengths) else 0, "current": current}
+
+    @staticmethod
+    def _get_rates(groups: np.ndarray, group_number: int, losses: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        :param groups: index of group for each snapshot;
+        :param group_number: number of groups;
+        :param losses: boolean array with losses in snapshots.
+        :return: dictionary with number of snapshots, number of losses and loss rate in percent for each group.
+        """
+
+        totals = np.bincount(groups, minlength=group_number)
+        loss_numbers = np.bincount(groups, weights=losses, minlength=group_number).astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(totals > 0, 100 * loss_numbers / np.maximum(totals, 1), np.nan)
+        return {"snapshots": totals, "losses": loss_numbers, "rate": rates}
+
+    @property
+    def total(self) -> int:
+        return len(self.times)
+
+    @property
+    def without_loss(self) -> int:
+        """
+        :return: number of snapshots without loss in all log types.
+        """
+
+        return int((~self.any_losses).sum())
+
+    def get_loss_number(self, log_type: str) -> int:
+        """
+        :param log_type: log type (may be 'general', 'urmc' and 'xinet').
+        :return: number of snapshots of log type with loss.
+        """
+
+        return len(self.loss_points[log_type][0])
+
+    def get_loss_rate(self, log_type: str) -> Optional[float]:
+        """
+        :param log_type: log type (may be 'general', 'urmc' and 'xinet').
+        :return: percentage of snapshots of log type with loss relative to the total number of snapshots.
+        """
+
+        return 100 * self.get_loss_number(log_type) / self.total if self.total else None
+
+    def get_rates_by_size(self) -> Dict[str, Any]:
+        """
+        :return: dictionary with edges of journal size intervals and loss rates for each interval.
+        """
+
+        valid = ~np.isnan(self.sizes)
+        if not valid.any():
+            return {"edges": [], "snapshots": [], "losses": [], "rate": []}
+        edges = np.linspace(self.sizes[valid].min(), self.sizes[valid].max(), self._size_bin_number + 1)
+        groups = np.clip(np.searchsorted(edges, self.sizes[valid], side="right") - 1, 0, self._size_bin_number - 1)
+        rates = self._get_rates(groups, self._size_bin_number, self.any_losses[valid])
+        rates["edges"] = edges
+        return rates
+
+    def get_rates_by_time(self) -> Dict[str, Any]:
+        """
+        :return: dictionary with start times of time intervals and loss rates for each interval.
+        """
+
+        if not self.total:
+            return {"starts": np.zeros(0, dtype="datetime64[s]"), "snapshots": [], "losses": [], "rate": []}
+        seconds = self.times.astype(np.int64)
+        start = seconds[0]
+        width = max(1, -(-(int(seconds[-1]) - int(start) + 1) // self._bucket_number))
+        groups = (seconds - start) // width
+        rates = self._get_rates(groups, self._bucket_number, self.any_losses)
+        rates["starts"] = (start + width * np.arange(self._bucket_number)).astype("datetime64[s]")
+        return rates
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        :return: dictionary with statistics that can be saved to JSON.
+        """
+
+        def to_list(array: np.ndarray) -> List[Optional[float]]:
+            return [None if isinstance(value, float) and np.isnan(value) else value for value in array.tolist()]
+
+        log_types = {}
+        for log_type in LOG_TYPES:
+            losses = self.get_loss_number(log_type)
+            log_types[log_type] = {"checked": self.checked[log_type],
+                                   "losses": losses,
+                                   "rate": self.get_loss_rate(log_type),
+                                   "lost_records": self.lost_records[log_type],
+                                   "lost_ranges": self.lost_ranges[log_type],
+                                   "streaks": self._get_streaks(self.losses[log_type])}
+
+        by_time = self.get_rates_by_time()
+        by_size = self.get_rates_by_size()
+        return {"snapshots": self.total,
+                "without_loss": self.without_loss,
+                "without_loss_rate": 100 * self.without_loss / self.total if self.total else None,
+                "start": str(self.times[0]) if self.total else None,
+                "end": str(self.times[-1]) if self.total else None,
+                "log_types": log_types,
+                "streaks": self._get_streaks(self.any_losses),
+                "by_time": {"starts": [str(start) for start in by_time["starts"]],
+                            "snapshots": to_list(np.asarray(by_time["snapshots"])),
+                            "losses": to_list(np.asarray(by_time["losses"])),
+                            "rate": to_list(np.asarray(by_time["rate"], dtype=float))},
+                "by_size": {"edges": to_list(np.asarray(by_size["edges"], dtype=float)),
+                            "snapshots": to_list(np.asarray(by_size["snapshots"])),
+                            "losses": to_list(np.asarray(by_size["losses"])),
+                            "rate": to_list(np.asarray(by_size["rate"], dtype=float))}}
+
+    def get_start_date(self) -> str:
+        """
+        :return: date of the first snapshot.
+        """
+
+        if not self.total:
+            return ""
+        return self.times[0].astype(datetime).strftime("%d.%m.%Y")
+
+    def save_summary(self, file_name: str) -> None:
+        """
+        :param file_name: name of JSON file where to save statistics.
+        """
+
+        with open(file_name, "w", encoding="utf-8") as file:
+            json.dump(self.get_summary(), file, indent=2)
@@ -0,0 +1,257 @@
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ContextManager, Dict, Generator, List, Optional
+
+
+def _get_percentile(values: List[float], percent: float) -> float:
+    """
+    :param values: sorted list of values;
+    :param percent: percentile in percent.
+    :return: percentile with linear interpolation between values.
+    """
+
+    position = (len(values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class IterationTimer:
+    """
+    Class measures duration of phases of one test iteration. Phases can be measured from several threads, durations
+    of phase measured several times in one iteration are summed.
+    """
+
+    def __init__(self, metrics: "PhaseMetrics", iteration: int) -> None:
+        """
+        :param metrics: metrics to which durations are added when iteration is finished;
+        :param iteration: test iteration number.
+        """
+
+        self._holds: int = 1
+        self._iteration: int = iteration
+        self._lock: threading.Lock = threading.Lock()
+        self._metrics: PhaseMetrics = metrics
+        self._phases: Dict[str, float] = {}
+        self._start_time: float = time.monotonic()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._holds -= 1
+            if self._holds > 0:
+                return
+            phases = dict(self._phases)
+        self._metrics.add_iteration(self._iteration, phases, time.monotonic() - self._start_time)
+
+    def hold(self) -> None:
+        """
+        Method postpones adding of iteration to metrics until finish is called once more, so that phases measured
+        in background are included.
+        """
+
+        with self._lock:
+            self._holds += 1
+
+    @contextmanager
+    def measure(self, phase: str) -> Generator[None, None, None]:
+        """
+        :param phase: name of phase.
+        """
+
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - start_time
+            with self._lock:
+                self._phases[phase] = self._phases.get(phase, 0) + duration
+
+
+def measure(timer: Optional[IterationTimer], phase: str) -> ContextManager:
+    """
+    :param timer: timer of iteration, if None, phase is not measured;
+    :param phase: name of phase.
+    :return: context manager that measures duration of phase.
+    """
+
+    return timer.measure(phase) if timer is not None else nullcontext()
+
+
+class PhaseMetrics:
+    """
+    Class collects histograms of durations of test iteration phases for one device. Durations of each iteration are
+    appended to JSON lines file, histograms can be exported in Prometheus text format.
+    """
+
+    BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    FILE_NAME: str = "metrics.jsonl"
+    PERCENTILES = (50, 90, 99)
+    PREFIX: str = "bvvu_test"
+
+    def __init__(self, host: str, file_name: Optional[str] = None) -> None:
+        """
+        :param host: IP address of device, it is used as a label of metrics;
+        :param file_name: name of JSON lines file where to save durations of each iteration.
+        """
+
+        self._durations: Dict[str, List[float]] = {}
+        self._file_name: Optional[str] = file_name
+        self._host: str = host
+        self._iterations: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._start_time: Optional[float] = None
+
+    def _add_duration(self, phase: str, duration: float) -> None:
+        self._durations.setdefault(phase, []).append(duration)
+
+    def add_iteration(self, iteration: int, phases: Dict[str, float], total: float) -> None:
+        """
+        :param iteration: test iteration number;
+        :param phases: dictionary with duration of each phase;
+        :param total: duration of iteration.
+        """
+
+        with self._lock:
+            self._iterations += 1
+            for phase, duration in phases.items():
+                self._add_duration(phase, duration)
+            self._add_duration("iteration", total)
+            if self._file_name:
+                with open(self._file_name, "a", encoding="utf-8") as file:
+                    file.write(json.dumps({"host": self._host,
+                                           "iteration": iteration,
+                                           "datetime": datetime.now().isoformat(sep=" ", timespec="seconds"),
+                                           "total": total,
+                                           "phases": phases}) + "\n")
+
+    def get_prometheus_lines(self) -> Dict[str, List[str]]:
+        """
+        :return: dictionary with lines of each metric in Prometheus text format: number of iterations and histograms
+        of phase durations.
+        """
+
+        name = f"{PhaseMetrics.PREFIX}_phase_duration_seconds"
+        with self._lock:
+            durations = {phase: list(values) for phase, values in self._durations.items()}
+            iterations = self._iterations
+        lines = []
+        for phase, values in sorted(durations.items()):
+            labels = f"host=\"{self._host}\",phase=\"{phase}\""
+            for bucket in PhaseMetrics.BUCKETS:
+                lines.append(f"{name}_bucket{{{labels},le=\"{bucket}\"}} {sum(value <= bucket for value in values)}")
+            lines.append(f"{name}_bucket{{{labels},le=\"+Inf\"}} {len(values)}")
+            lines.append(f"{name}_sum{{{labels}}} {sum(values)}")
+            lines.append(f"{name}_count{{{labels}}} {len(values)}")
+        return {f"{PhaseMetrics.PREFIX}_iterations_total": [f"{PhaseMetrics.PREFIX}_iterations_total"
+                                                           f"{{host=\"{self._host}\"}} {iterations}"],
+                name: lines}
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: dictionary with number of measurements, mean, maximum duration and percentiles for each phase.
+        """
+
+        summary = {}
+        with self._lock:
+            for phase, values in self._durations.items():
+                values = sorted(values)
+                summary[phase] = {"count": len(values),
+                                  "mean": sum(values) / len(values),
+                                  "max": values[-1]}
+                for percent in PhaseMetrics.PERCENTILES:
+                    summary[phase][f"p{percent}"] = _get_percentile(values, percent)
+        return summary
+
+    def log_summary(self) -> None:
+        hours = (time.monotonic() - self._start_time) / 3600 if self._start_time is not None else 0
+        logging.info("Throughput: %d iterations in %.2f h (%.1f iterations per hour)", self._iterations, hours,
+                     self._iterations / hours if hours else 0)
+        for phase, summary in sorted(self.get_summary().items()):
+            logging.info("Phase '%s': %d times, mean %.3f s, p50 %.3f s, p90 %.3f s, p99 %.3f s, max %.3f s", phase,
+                         summary["count"], summary["mean"], summary["p50"], summary["p90"], summary["p99"],
+                         summary["max"])
+
+    def start_iteration(self, iteration: int) -> IterationTimer:
+        """
+        :param iteration: test iteration number.
+        :return: timer for phases of iteration.
+        """
+
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+        return IterationTimer(self, iteration)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    server: "MetricsServer"
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = self.server.get_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """
+    Class serves metrics of all tested devices in Prometheus text format on the local HTTP endpoint /metrics.
+    """
+
+    METRICS = {f"{PhaseMetrics.PREFIX}_iterations_total": ("Number of completed test iterations.", "counter"),
+               f"{PhaseMetrics.PREFIX}_phase_duration_seconds": ("Duration of test iteration phases.", "histogram")}
+
+    daemon_threads = True
+
+    def __init__(self, port: int, host: str = "127.0.0.1") -> None:
+        """
+        :param port: port of HTTP endpoint;
+        :param host: address on which endpoint listens.
+        """
+
+        super().__init__((host, port), _MetricsRequestHandler)
+        self._metrics: List[PhaseMetrics] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, metrics: PhaseMetrics) -> None:
+        """
+        :param metrics: metrics of device.
+        """
+
+        self._metrics.append(metrics)
+
+    def get_text(self) -> str:
+        """
+        :return: metrics of all devices in Prometheus text format.
+        """
+
+        all_lines = [metrics.get_prometheus_lines() for metrics in self._metrics]
+        text = ""
+        for name, (description, metric_type) in MetricsServer.METRICS.items():
+            text += f"# HELP {name} {description}\n# TYPE {name} {metric_type}\n"
+            text += "".join(line + "\n" for lines in all_lines for line in lines.get(name, []))
+        return text
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info("Metrics are available at http://%s:%d/metrics", *self.server_address[:2])
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
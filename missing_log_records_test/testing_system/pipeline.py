@@ -0,0 +1,70 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+
+class LogPipeline:
+    """
+    Class runs background stage of test iterations: downloaded logs are saved and checked in a separate thread while
+    BVVU reboots. Queue of iterations is bounded, so if the background stage falls behind, the test loop waits before
+    passing the next logs, and only a few sets of logs are kept in memory.
+    """
+
+    DEPTH: int = 1
+    WAIT_TO_LOG: float = 0.1
+
+    def __init__(self, process: Callable[..., None], depth: int = DEPTH) -> None:
+        """
+        :param process: function that processes logs of one iteration;
+        :param depth: maximum number of iterations waiting for processing.
+        """
+
+        self._error: Optional[Exception] = None
+        self._process: Callable[..., None] = process
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        # Thread has the same name as the test thread, so that logs of several BVVUs can be told apart
+        self._thread: threading.Thread = threading.Thread(target=self._run, name=threading.current_thread().name,
+                                                          daemon=True)
+        self._thread.start()
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Failed to process logs in background") from self._error
+
+    def _run(self) -> None:
+        while True:
+            args = self._queue.get()
+            if args is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self._process(*args)
+            except Exception as exc:
+                logging.error("Failed to process logs in background: %s", exc)
+                self._error = exc
+
+    def close(self) -> None:
+        """
+        Method waits until all logs are processed.
+        """
+
+        self._queue.put(None)
+        self._thread.join()
+        self._check_error()
+
+    def put(self, *args) -> None:
+        """
+        Method passes logs of iteration to the background stage. If the queue is full, method waits until logs of
+        previous iteration are processed.
+        :param args: arguments for processing function.
+        """
+
+        self._check_error()
+        start_time = time.monotonic()
+        self._queue.put(args)
+        waiting_time = time.monotonic() - start_time
+        if waiting_time > LogPipeline.WAIT_TO_LOG:
+            logging.info("Waited %.1f s for background processing of previous logs", waiting_time)
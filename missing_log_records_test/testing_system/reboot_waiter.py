@@ -0,0 +1,100 @@
+import logging
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class RebootWaiter:
+    """
+    Class waits for BVVU reboot. The device is polled with short intervals that grow up to a maximum value: first
+    it is checked that the device went down, then that the ssh port is open and then that the admin panel is alive.
+    The duration of each phase is recorded.
+    """
+
+    DOWN_TIMEOUT: float = 60
+    INTERVAL_FACTOR: float = 1.5
+    MAX_INTERVAL: float = 5
+    MIN_INTERVAL: float = 0.2
+    PORT_TIMEOUT: float = 1
+
+    def __init__(self, host: str, port: int, check_alive: Callable[[], bool], timeout: float) -> None:
+        """
+        :param host: IP address of device;
+        :param port: port for ssh connection;
+        :param check_alive: function that returns True if the admin panel of device is alive;
+        :param timeout: maximum time to wait for reboot.
+        """
+
+        self._check_alive: Callable[[], bool] = check_alive
+        self._history: List[Dict[str, float]] = []
+        self._host: str = host
+        self._port: int = port
+        self._timeout: float = timeout
+
+    def _is_down(self) -> bool:
+        return not self._is_port_open() or not self._check_alive()
+
+    def _is_port_open(self) -> bool:
+        try:
+            with socket.create_connection((self._host, self._port), timeout=RebootWaiter.PORT_TIMEOUT):
+                return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _wait(condition: Callable[[], bool], deadline: float) -> Optional[float]:
+        """
+        :param condition: function that returns True when waiting is over;
+        :param deadline: time (by time.monotonic) until which to wait.
+        :return: waiting time or None if condition was not met before deadline.
+        """
+
+        start_time = time.monotonic()
+        interval = RebootWaiter.MIN_INTERVAL
+        while not condition():
+            if time.monotonic() + interval > deadline:
+                return None
+            time.sleep(interval)
+            interval = min(interval * RebootWaiter.INTERVAL_FACTOR, RebootWaiter.MAX_INTERVAL)
+        return time.monotonic() - start_time
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: dictionary with mean, minimum and maximum duration of each reboot phase.
+        """
+
+        summary = {}
+        for phase in ("down", "ssh", "admin", "total"):
+            durations = [phases[phase] for phases in self._history if phase in phases]
+            if durations:
+                summary[phase] = {"mean": sum(durations) / len(durations),
+                                  "min": min(durations),
+                                  "max": max(durations)}
+        return summary
+
+    def wait(self) -> Dict[str, float]:
+        """
+        Method waits for BVVU reboot after reboot command. The command is executed asynchronously, so first it is
+        checked that the device went down.
+        :return: dictionary with duration of reboot phases.
+        """
+
+        start_time = time.monotonic()
+        deadline = start_time + self._timeout
+        phases = {}
+        down_time = self._wait(self._is_down, min(deadline, start_time + RebootWaiter.DOWN_TIMEOUT))
+        if down_time is None:
+            logging.warning("BVVU did not go down within %d s after reboot command", RebootWaiter.DOWN_TIMEOUT)
+        else:
+            phases["down"] = down_time
+
+        for phase, condition in (("ssh", self._is_port_open), ("admin", self._check_alive)):
+            phase_time = self._wait(condition, deadline)
+            if phase_time is None:
+                raise TimeoutError(f"BVVU did not reboot within the maximum wait time {self._timeout} s")
+            phases[phase] = phase_time
+        phases["total"] = time.monotonic() - start_time
+        self._history.append(phases)
+        logging.info("BVVU rebooted in %.1f s (%s)", phases["total"],
+                     ", ".join(f"{phase}: {duration:.1f} s" for phase, duration in phases.items() if phase != "total"))
+        return phases
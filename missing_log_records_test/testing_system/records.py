@@ -0,0 +1,273 @@
+import hashlib
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
+import numpy as np
+import journal_file as jf
+from snapshot_store import SnapshotStore
+
+
+ALIGNMENT_CHUNK: int = 65536
+
+
+def _add_lost_ranges(ranges: List[Tuple[int, int]], matches: np.ndarray, chunk_start: int, lost_start: Optional[int],
+                     matched: bool) -> Optional[int]:
+    """
+    Function adds ranges of lost records from chunk of the previous snapshot. Ranges before the first matched record
+    are not added.
+    :param ranges: list of lost ranges to which ranges are added;
+    :param matches: array with True for records of chunk that are found in the current snapshot;
+    :param chunk_start: position of the first record of chunk in the previous snapshot;
+    :param lost_start: position of the first record of lost range that is continued from the previous chunk;
+    :param matched: True if records were matched before the chunk.
+    :return: position of the first record of lost range that is continued to the next chunk.
+    """
+
+    if lost_start is not None and matches[0]:
+        if matched:
+            ranges.append((lost_start, chunk_start))
+        lost_start = None
+    bounds = np.flatnonzero(np.diff(np.concatenate(([True], matches, [True])).view(np.int8)))
+    for start, end in zip(bounds[0::2].tolist(), bounds[1::2].tolist()):
+        range_start = lost_start if start == 0 and lost_start is not None else chunk_start + start
+        if end == len(matches):
+            return range_start
+        if matched or start > 0:
+            ranges.append((range_start, chunk_start + end))
+    return None
+
+
+def _match_with_duplicates(positions: np.ndarray, starts: np.ndarray, ends: np.ndarray, candidates: np.ndarray,
+                           next_position: int) -> Tuple[np.ndarray, int]:
+    """
+    Function matches records of chunk of the previous snapshot one by one, it is used if there are identical records
+    in the current snapshot.
+    :param positions: positions of records of the current snapshot sorted by digests;
+    :param starts: indexes of the first digests of records of chunk in sorted digests;
+    :param ends: indexes after the last digests of records of chunk in sorted digests;
+    :param candidates: the first position of each record of chunk in the current snapshot or -1;
+    :param next_position: position in the current snapshot after the last matched record.
+    :return: array with True for matched records and position after the last matched record.
+    """
+
+    matches = np.zeros(len(candidates), dtype=bool)
+    for index, (start, end, position) in enumerate(zip(starts.tolist(), ends.tolist(), candidates.tolist())):
+        if position < next_position and end - start > 1:
+            # Positions of identical records are sorted, the first one after the last matched record is taken
+            candidate = bisect_left(positions, next_position, start, end)
+            position = int(positions[candidate]) if candidate < end else -1
+        if position >= next_position:
+            matches[index] = True
+            next_position = position + 1
+    return matches, next_position
+
+
+def _to_digest_array(digests: Sequence[int]) -> np.ndarray:
+    """
+    :param digests: digests of records.
+    :return: array with digests, array("Q") is used without copying.
+    """
+
+    if isinstance(digests, array):
+        return np.frombuffer(digests, dtype=np.uint64)
+    return np.asarray(digests, dtype=np.uint64)
+
+
+def describe_lost_ranges(file_path: str, ranges: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Function reads the first and the last lost record of each range from the previous snapshot, their time stamps
+    show the time window from which records were lost.
+    :param file_path: path to file with the previous snapshot;
+    :param ranges: lost ranges returned by find_lost_ranges.
+    :return: list with dictionaries with position of the first lost record, number of lost records, the first and
+    the last lost record for each range.
+    """
+
+    boundaries = {}
+    for start, end in ranges:
+        boundaries[start] = None
+        boundaries[end - 1] = None
+    if boundaries:
+        last_position = max(boundaries)
+        for position, record in enumerate(iter_records(file_path)):
+            if position in boundaries:
+                boundaries[position] = record
+            if position >= last_position:
+                break
+    return [{"start": start,
+             "count": end - start,
+             "first_record": boundaries[start],
+             "last_record": boundaries[end - 1]} for start, end in ranges]
+
+
+def find_lost_ranges(previous: Sequence[int], current: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    Function aligns two consecutive snapshots by digests of records and finds records of the previous snapshot
+    that are missing in the current one. Records are matched in order of their appearance, so repeated identical
+    records are matched one to one. Missing records before the first matched record were removed from the journal
+    by rotation and are not lost. If there are no matched records, all records of the previous snapshot are lost.
+    Positions of records of the current snapshot are sorted by digests, so only two 64-bit arrays are kept in memory
+    and records of the previous snapshot are found by binary search in chunks of ALIGNMENT_CHUNK records. Records
+    are matched one by one only in chunks with records repeated in the current snapshot.
+    :param previous: digests of records of the previous snapshot;
+    :param current: digests of records of the current snapshot.
+    :return: list with ranges [start, end) of positions of lost records in the previous snapshot.
+    """
+
+    previous_digests = _to_digest_array(previous)
+    current_digests = _to_digest_array(current)
+    if not len(current_digests):
+        return [(0, len(previous_digests))] if len(previous_digests) else []
+
+    positions = np.argsort(current_digests, kind="stable")
+    sorted_digests = current_digests[positions]
+    # Digest is repeated if the next sorted digest is the same
+    repeated = np.append(sorted_digests[1:] == sorted_digests[:-1], False)
+    next_position = 0
+    matched = False
+    lost_start = None
+    ranges = []
+    for chunk_start in range(0, len(previous_digests), ALIGNMENT_CHUNK):
+        chunk = previous_digests[chunk_start:chunk_start + ALIGNMENT_CHUNK]
+        # Sorted digests are searched much faster than digests in random order
+        chunk_order = np.argsort(chunk)
+        starts = np.empty(len(chunk), dtype=np.intp)
+        starts[chunk_order] = np.searchsorted(sorted_digests, chunk[chunk_order])
+        found_starts = np.minimum(starts, len(positions) - 1)
+        found = sorted_digests[found_starts] == chunk
+        candidates = np.where(found, positions[found_starts], -1)
+        if (found & repeated[found_starts]).any():
+            ends = np.empty(len(chunk), dtype=np.intp)
+            ends[chunk_order] = np.searchsorted(sorted_digests, chunk[chunk_order], "right")
+            matches, next_position = _match_with_duplicates(positions, starts, ends, candidates, next_position)
+        else:
+            # Record is matched if it is after all records matched before it in the current snapshot
+            previous_maximums = np.maximum.accumulate(np.concatenate(([next_position - 1], candidates[:-1])))
+            matches = candidates > previous_maximums
+            if matches.any():
+                next_position = int(candidates.max()) + 1
+        lost_start = _add_lost_ranges(ranges, matches, chunk_start, lost_start, matched)
+        matched = matched or bool(matches.any())
+    if lost_start is not None:
+        ranges.append((lost_start, len(previous_digests)))
+    return ranges
+
+
+def iter_records(file_path: str) -> Generator[str, None, None]:
+    """
+    Function reads log file line by line. Only non-empty records are returned, lines are split by '\n' and '\r' at
+    the end of line is removed, so records are the same as lines from analyzer.read_file for files with '\n' and
+    '\r\n' line endings. Manifests of snapshots from the snapshot store and compressed files are read transparently.
+    :param file_path: path to log file or to manifest of snapshot.
+    :return: generator with records from file.
+    """
+
+    if SnapshotStore.is_manifest(file_path):
+        lines = (line.rstrip("\r") for line in SnapshotStore.iter_lines(file_path))
+    else:
+        lines = jf.iter_lines(file_path)
+    yield from (line for line in lines if line)
+
+
+def iter_text_records(text: str) -> Generator[str, None, None]:
+    """
+    Function splits log text into records without creating a list of all lines. '\r' at the end of line is removed as
+    in iter_records.
+    :param text: log text.
+    :return: generator with non-empty records from text.
+    """
+
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        record = text[start:end].rstrip("\r")
+        if record:
+            yield record
+        start = end + 1
+
+
+def record_digest(record: str) -> int:
+    """
+    :param record: record from log.
+    :return: 64-bit digest of record.
+    """
+
+    return int.from_bytes(hashlib.blake2b(record.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class RecordIndex:
+    """
+    Class stores compact index of records from one log snapshot: 64-bit digests of records in the order of their
+    appearance in the log and the last record of the log.
+    """
+
+    def __init__(self, digests: Optional[array] = None, last_record: Optional[str] = None) -> None:
+        """
+        :param digests: array with digests of records in the order of their appearance in the log;
+        :param last_record: last record of the log.
+        """
+
+        self.digests: array = digests if digests is not None else array("Q")
+        self.last_record: Optional[str] = last_record
+        self._sorted_digests: Optional[array] = None
+
+    def __contains__(self, record: str) -> bool:
+        return self.contains_digest(record_digest(record))
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "RecordIndex":
+        """
+        :param file_path: path to log file.
+        :return: index of records from log file.
+        """
+
+        index = cls()
+        for record in iter_records(file_path):
+            index.add(record)
+        return index
+
+    @classmethod
+    def load(cls, file_path: str, last_record: Optional[str] = None) -> "RecordIndex":
+        """
+        :param file_path: path to file with digests saved by the method save;
+        :param last_record: last record of the log.
+        :return: index of records.
+        """
+
+        digests = array("Q")
+        with open(file_path, "rb") as file:
+            digests.frombytes(file.read())
+        return cls(digests, last_record)
+
+    def add(self, record: str) -> None:
+        """
+        :param record: new record to be added to the end of index.
+        """
+
+        self.digests.append(record_digest(record))
+        self.last_record = record
+        self._sorted_digests = None
+
+    def contains_digest(self, digest: int) -> bool:
+        """
+        :param digest: digest of record.
+        :return: True if record with given digest is in the index.
+        """
+
+        if self._sorted_digests is None:
+            self._sorted_digests = array("Q", sorted(self.digests))
+        position = bisect_left(self._sorted_digests, digest)
+        return position < len(self._sorted_digests) and self._sorted_digests[position] == digest
+
+    def save(self, file_path: str) -> None:
+        """
+        :param file_path: path to file where to save digests of records.
+        """
+
+        with open(file_path, "wb") as file:
+            self.digests.tofile(file)
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def size_to_megabytes(size: str) -> Optional[float]:
+    """
+    :param size: size of logs with unit suffix, for example '48.0M'.
+    :return: size in megabytes.
+    """
+
+    if not size:
+        return None
+    multiplier = {"M": 1,
+                  "G": 1024,
+                  "K": 0.00097656}.get(size[-1].upper(), 1)
+    try:
+        return multiplier * float(size[:-1])
+    except ValueError:
+        return None
+
+
+class ResultStore:
+    """
+    Class stores typed results of each test iteration in SQLite database. The analyzer can load these results
+    without parsing file names and logs.
+    """
+
+    FILE_NAME: str = "results.sqlite"
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: path to database file.
+        """
+
+        self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock: threading.Lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS snapshots (host TEXT, iteration INTEGER, "
+                                     "log_type TEXT, file_name TEXT, saved_at TEXT, size REAL, loss INTEGER, "
+                                     "lost INTEGER)")
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(snapshots)")]
+            if "lost" not in columns:
+                # Database was created before lost records were counted
+                self._connection.execute("ALTER TABLE snapshots ADD COLUMN lost INTEGER")
+
+    @staticmethod
+    def exists(dir_name: str) -> bool:
+        """
+        :param dir_name: directory with logs.
+        :return: True if there is a database with results in the directory.
+        """
+
+        return os.path.isfile(os.path.join(dir_name, ResultStore.FILE_NAME))
+
+    def add_snapshot(self, host: str, iteration: int, log_type: str, file_name: str, saved_at: datetime,
+                     size: Optional[float], loss: Optional[bool], lost: Optional[int] = None) -> None:
+        """
+        :param host: IP address of device;
+        :param iteration: test iteration number;
+        :param log_type: log type (may be 'general', 'urmc' and 'xinet');
+        :param file_name: name of file where log was saved;
+        :param saved_at: date and time when log was saved;
+        :param size: full size of logs in BVVU in megabytes;
+        :param loss: True if the last record of the previous log was not found in this log, None if not checked;
+        :param lost: number of records of the previous log not found in this log, None if not counted.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO snapshots (host, iteration, log_type, file_name, saved_at, size, "
+                                     "loss, lost) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                     (host, iteration, log_type, file_name, saved_at.isoformat(sep=" "), size,
+                                      None if loss is None else int(loss), lost))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def load_snapshots(self, log_type: str) -> List[Dict[str, Any]]:
+        """
+        :param log_type: log type (may be 'general', 'urmc' and 'xinet').
+        :return: list with data of snapshots in the format of analyzer.get_data_from_file_name, with loss flags and
+        numbers of lost records.
+        """
+
+        with self._lock:
+            rows = self._connection.execute("SELECT file_name, saved_at, size, loss, lost FROM snapshots "
+                                            "WHERE log_type = ? ORDER BY saved_at, iteration", (log_type,)).fetchall()
+        snapshots = []
+        for file_name, saved_at, size, loss, lost in rows:
+            snapshot = {"file_name": file_name,
+                        "datetime": datetime.fromisoformat(saved_at),
+                        "size": size}
+            if loss is not None:
+                snapshot["loss"] = bool(loss)
+            if lost is not None:
+                snapshot["lost"] = lost
+            snapshots.append(snapshot)
+        return snapshots
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from results import size_to_megabytes
+
+
+class SnapshotScanner:
+    """
+    Class finds snapshots of all log types in the directory in one pass with os.scandir. Snapshots of each log type
+    are sorted by the time of saving, so the analyzer compares only adjacent snapshots. The sorted list of snapshots
+    can be saved to a file and updated at the next run: if the directory has not changed since the previous scan, it
+    is not scanned, otherwise only names of new files are parsed.
+    """
+
+    FILE_NAME: str = "snapshots.json"
+    LOG_TYPES: Tuple[str, ...] = ("general", "urmc", "xinet")
+    PATTERN = re.compile(r"(general|urmc|xinet) (\d+)-(\d+)-(\d+)_(\d+)-(\d+)-(\d+) (.*[kKMG])\.txt")
+    # Directory changed less than this time ago may change again within the precision of its modification time
+    UNSTABLE_TIME: int = 2 * 10 ** 9
+    VERSION: int = 1
+
+    def __init__(self, dir_name: str, cache_dir: Optional[str] = None) -> None:
+        """
+        :param dir_name: directory with logs;
+        :param cache_dir: directory where to save the list of snapshots. If None, the list is not saved and the
+        directory is scanned each time.
+        """
+
+        self._cache_dir: Optional[str] = cache_dir
+        self._changed: bool = False
+        self._dir_name: str = dir_name
+        self._mtime: Optional[int] = None
+        self._snapshots: Dict[str, Tuple[str, str, Optional[float]]] = {}
+        if self._cache_dir is not None:
+            self._read()
+
+    @staticmethod
+    def _parse_file_name(file_name: str) -> Optional[Tuple[str, str, Optional[float]]]:
+        """
+        :param file_name: name of file.
+        :return: log type, date and time of saving in ISO format and full size of logs in megabytes, or None if file
+        is not a snapshot. Date and time in ISO format are sorted as strings and are quickly converted to datetime.
+        """
+
+        result = SnapshotScanner.PATTERN.search(file_name)
+        if not result:
+            return None
+        saved_at = datetime(*map(int, result.group(2, 3, 4, 5, 6, 7))).isoformat()
+        return result.group(1), saved_at, size_to_megabytes(result.group(8))
+
+    def _read(self) -> None:
+        try:
+            with open(os.path.join(self._cache_dir, SnapshotScanner.FILE_NAME), "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if state.get("version") != SnapshotScanner.VERSION:
+            return
+        self._mtime = state["mtime"]
+        self._snapshots = {file_name: (log_type, saved_at, size)
+                           for file_name, log_type, saved_at, size in state["snapshots"]}
+
+    def _save(self) -> None:
+        if self._cache_dir is None or not self._changed:
+            return
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        path = os.path.join(self._cache_dir, SnapshotScanner.FILE_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": SnapshotScanner.VERSION,
+                       "mtime": self._mtime,
+                       "snapshots": [[file_name, *snapshot] for file_name, snapshot in self._snapshots.items()]}, file)
+        os.replace(tmp_path, path)
+        self._changed = False
+
+    def _update(self) -> None:
+        """
+        Method scans the directory if it has changed since the previous scan. Names of files that are already in the
+        list are not parsed again, removed files are deleted from the list.
+        """
+
+        mtime = os.stat(self._dir_name).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        snapshots = {}
+        new_number = 0
+        with os.scandir(self._dir_name) as entries:
+            for entry in entries:
+                snapshot = self._snapshots.get(entry.name)
+                if snapshot is None and entry.is_file():
+                    snapshot = self._parse_file_name(entry.name)
+                    new_number += snapshot is not None
+                if snapshot is not None:
+                    snapshots[entry.name] = snapshot
+        logging.debug("Snapshots found: %d (new: %d, removed: %d)", len(snapshots), new_number,
+                      len(self._snapshots) + new_number - len(snapshots))
+        # Snapshots are kept sorted by time of saving and by name, so the list is saved already sorted
+        self._snapshots = dict(sorted(snapshots.items(), key=lambda item: (item[1][1], item[0])))
+        self._mtime = mtime if time.time_ns() - mtime > SnapshotScanner.UNSTABLE_TIME else None
+        self._changed = True
+
+    def scan(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        :return: dictionary with list of snapshots sorted by time of saving for each log type. For each snapshot
+        there is a dictionary with file name, date and time of saving and full size of logs.
+        """
+
+        self._update()
+        self._save()
+        data = {log_type: [] for log_type in SnapshotScanner.LOG_TYPES}
+        for file_name, (log_type, saved_at, size) in self._snapshots.items():
+            data[log_type].append({"file_name": file_name,
+                                   "datetime": datetime.fromisoformat(saved_at),
+                                   "size": size})
+        return data
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Generator, List, Optional
+import journal_file as jf
+
+
+class SnapshotStore:
+    """
+    Class for storing snapshots of logging journals without duplication. Text of snapshot is split into chunks by
+    content: chunk boundary is placed after line whose hash satisfies a mask condition. So identical parts of
+    consecutive snapshots are split into identical chunks. Each chunk is compressed and saved once in the 'chunks'
+    folder, and for each snapshot a small manifest with list of its chunks is saved.
+    """
+
+    CHUNKS_DIR: str = "chunks"
+    CHUNK_MASK: int = 0x1ff
+    MANIFEST_EXTENSION: str = ".manifest"
+    MAX_CHUNK_SIZE: int = 256 * 1024
+    MIN_CHUNK_SIZE: int = 16 * 1024
+
+    def __init__(self, dir_name: str, compression: Optional[str] = None) -> None:
+        """
+        :param dir_name: directory where snapshots are stored;
+        :param compression: chunk compression method ('zstd' or 'gzip'). By default zstd is used if zstandard
+        package is installed.
+        """
+
+        if compression is None:
+            compression = jf.get_default_compression()
+        if compression not in jf.EXTENSIONS:
+            raise ValueError(f"Unknown compression method '{compression}'")
+        if compression == "zstd" and jf.zstandard is None:
+            raise ValueError("zstandard package is required for zstd compression")
+
+        self._compression: str = compression
+        self._dir_name: str = dir_name
+        os.makedirs(os.path.join(self._dir_name, SnapshotStore.CHUNKS_DIR), exist_ok=True)
+
+    @staticmethod
+    def _get_chunk_path(dir_name: str, chunk_id: str, compression: str) -> str:
+        """
+        :param dir_name: directory where snapshots are stored;
+        :param chunk_id: chunk identifier;
+        :param compression: chunk compression method.
+        :return: path to file with chunk.
+        """
+
+        return os.path.join(dir_name, SnapshotStore.CHUNKS_DIR, chunk_id[:2],
+                            chunk_id + jf.EXTENSIONS[compression])
+
+    @staticmethod
+    def is_manifest(file_path: str) -> bool:
+        """
+        :param file_path: path to file.
+        :return: True if file is a manifest of snapshot from the store.
+        """
+
+        return file_path.endswith(SnapshotStore.MANIFEST_EXTENSION)
+
+    @classmethod
+    def iter_lines(cls, manifest_path: str) -> Generator[str, None, None]:
+        """
+        Method reads snapshot from the store chunk by chunk.
+        :param manifest_path: path to manifest of snapshot.
+        :return: generator with lines of snapshot, lines are split by '\n' only.
+        """
+
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        dir_name = os.path.dirname(manifest_path)
+        tail = ""
+        for chunk_id in manifest["chunks"]:
+            with open(cls._get_chunk_path(dir_name, chunk_id, manifest["compression"]), "rb") as file:
+                text = tail + jf.decompress_frame(file.read(), manifest["compression"]).decode("utf-8")
+            lines = text.split("\n")
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+
+    def _save_chunk(self, chunk: bytes) -> str:
+        """
+        :param chunk: chunk to be saved.
+        :return: chunk identifier.
+        """
+
+        chunk_id = hashlib.sha256(chunk).hexdigest()
+        chunk_path = self._get_chunk_path(self._dir_name, chunk_id, self._compression)
+        if not os.path.exists(chunk_path):
+            os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+            temp_path = f"{chunk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(jf.compress_frame(chunk, self._compression))
+            os.replace(temp_path, chunk_path)
+        return chunk_id
+
+    def _split_into_chunks(self, data: bytes) -> Generator[bytes, None, None]:
+        """
+        :param data: snapshot text.
+        :return: generator with chunks. Each chunk, except maybe the last one, consists of whole lines.
+        """
+
+        chunk_start = 0
+        line_start = 0
+        while line_start < len(data):
+            line_end = data.find(b"\n", line_start)
+            line_end = len(data) if line_end == -1 else line_end + 1
+            chunk_size = line_end - chunk_start
+            if chunk_size >= SnapshotStore.MAX_CHUNK_SIZE or (
+                    chunk_size >= SnapshotStore.MIN_CHUNK_SIZE and
+                    not zlib.crc32(data[line_start:line_end]) & SnapshotStore.CHUNK_MASK):
+                yield data[chunk_start:line_end]
+                chunk_start = line_end
+            line_start = line_end
+        if chunk_start < len(data):
+            yield data[chunk_start:]
+
+    def save(self, file_name: str, log: str) -> str:
+        """
+        :param file_name: name of snapshot file;
+        :param log: snapshot text.
+        :return: path to manifest of saved snapshot.
+        """
+
+        data = log.encode("utf-8")
+        chunks: List[str] = [self._save_chunk(chunk) for chunk in self._split_into_chunks(data)]
+        manifest_path = os.path.join(self._dir_name, file_name + SnapshotStore.MANIFEST_EXTENSION)
+        with open(manifest_path, "w", encoding="utf-8") as file:
+            json.dump({"compression": self._compression,
+                       "size": len(data),
+                       "chunks": chunks}, file)
+        logging.info("Log saved to store '%s' (%d chunks)", manifest_path, len(chunks))
+        return manifest_path
@@ -2,11 +2,31 @@ import logging
 import re
 import socket
 import time
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 import paramiko
 
 
 class SshClient:
+    """
+    Class keeps a long-lived ssh session with the BVVU CLI. Session is opened on first command and reopened
+    automatically if it was lost (for example, after BVVU reboot). Command output is read until the CLI prompt or
+    the given end marker arrives.
+    """
+
+    ARGUMENT_VALUE_PATTERN = re.compile(r"='[^']*'")
+    CURSOR_PATTERN = re.compile(r"^-- cursor: (?P<cursor>\S+)\s*$")
+    # Unit names are taken from names of uiob.os.journal methods (tango_urmc_logs, xinet_logs), they are not checked
+    # against requests of uiobapi
+    JOURNAL_FILTERS: Dict[str, str] = {"general": "",
+                                       "urmc": "-u tango-urmc",
+                                       "xinet": "-u xinet"}
+    JOURNAL_OUTPUT: str = "short"
+    JOURNAL_SERVICE_PATTERN = re.compile(r"^-- (Logs begin at |Journal begins at |No entries --)")
+    JOURNAL_TIMEOUT: float = 60
+    MAX_BYTES: int = 60000
+    PROMPT_PATTERN = re.compile(r"(?:^|[\r\n])[^\r\n]*[#>$] ?$")
+    SHELL_WIDTH: int = 4096
+    TIMEOUT: float = 5
 
     def __init__(self, host: str, port: int, username: str, password: str) -> None:
         """
@@ -21,21 +41,133 @@ class SshClient:
         self._username: str = username
         self._password: str = password
 
+        self._client: Optional[paramiko.SSHClient] = None
+        self._latencies: Dict[str, List[float]] = {}
+        self._prompt: str = ""
+        self._shell: Optional[paramiko.Channel] = None
+
+    def _ends_with_prompt(self, output: str, end_marker: Optional[str] = None) -> bool:
+        """
+        :param output: output received from the shell;
+        :param end_marker: string after which the output is considered complete.
+        :return: True if output is complete.
+        """
+
+        if end_marker is not None:
+            return end_marker in output
+        if self._prompt:
+            return output.rstrip(" ").endswith(self._prompt)
+        return bool(SshClient.PROMPT_PATTERN.search(output))
+
+    def _init(self) -> None:
+        # Prompt of the previous session is not valid until CLI is switched to the privileged mode again
+        self._prompt = ""
+        self._shell = self._client.invoke_shell(width=SshClient.SHELL_WIDTH)
+        self._read_output()
+        for command in ("enable", "terminal length 0"):
+            self._shell.send(f"{command}\n")
+            output = self._read_output()
+        lines = output.replace("\r", "").split("\n")
+        self._prompt = lines[-1].strip(" ") if lines and SshClient.PROMPT_PATTERN.search(lines[-1]) else ""
+        logging.debug("BVVU CLI prompt: '%s'", self._prompt)
+
+    def _is_connected(self) -> bool:
+        if self._client is None or self._shell is None or self._shell.closed:
+            return False
+        transport = self._client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _read_output(self, end_marker: Optional[str] = None, timeout: float = TIMEOUT) -> str:
+        """
+        Method reads shell output until prompt or end marker arrives. Reading ends with timeout only if neither
+        of them is received.
+        :param end_marker: string after which the output is considered complete;
+        :param timeout: maximum time to wait for next part of the output.
+        :return: output.
+        """
+
+        output = ""
+        while not self._ends_with_prompt(output, end_marker):
+            self._shell.settimeout(timeout)
+            try:
+                part = self._shell.recv(SshClient.MAX_BYTES)
+            except socket.timeout:
+                logging.debug("Prompt was not received from BVVU within %s s", timeout)
+                break
+            if not part:
+                raise EOFError("SSH channel closed by BVVU")
+            output += part.decode("utf-8", errors="replace")
+        return output
+
+    def _run_command(self, command: str, end_marker: Optional[str] = None, timeout: float = TIMEOUT) -> str:
+        """
+        :param command: command to be executed in the BVVU CLI;
+        :param end_marker: string after which the command output is considered complete;
+        :param timeout: maximum time to wait for next part of the output.
+        :return: command output.
+        """
+
+        self._shell.send(f"{command}\n")
+        return self._read_output(end_marker, timeout)
+
+    def close(self) -> None:
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def connect(self) -> None:
+        self.close()
+        start_time = time.monotonic()
         self._client = paramiko.SSHClient()
         self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self._client.connect(hostname=self._host, port=self._port, username=self._username, password=self._password,
                              look_for_keys=False, allow_agent=False)
         self._init()
+        logging.info("SSH session with BVVU opened in %.2f s", time.monotonic() - start_time)
 
-    def _init(self) -> None:
-        max_bytes = 60000
-        short_pause = 1
-        with self._client.invoke_shell() as ssh:
-            ssh.send("enable\n")
-            time.sleep(short_pause)
-            ssh.send("terminal length 0\n")
-            time.sleep(short_pause)
-            ssh.recv(max_bytes)
+    def get_latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: dictionary with number of calls, mean and maximum latency for each executed command.
+        """
+
+        return {command: {"calls": len(latencies),
+                          "mean": sum(latencies) / len(latencies),
+                          "max": max(latencies)}
+                for command, latencies in self._latencies.items() if latencies}
+
+    def get_journal(self, log_name: str, cursor: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Method gets records of journal starting from the record with the given cursor. The record with the cursor is
+        included in the output, so if it was lost, the first record will be different.
+        :param log_name: log type (may be 'general', 'urmc' and 'xinet');
+        :param cursor: journald cursor of the last record received before. If None, the whole journal is received.
+        :return: journal records and cursor of the last record.
+        """
+
+        if log_name not in SshClient.JOURNAL_FILTERS:
+            raise ValueError(f"Unknown journal '{log_name}'")
+
+        command = (f"journalctl --no-pager --show-cursor -o {SshClient.JOURNAL_OUTPUT} "
+                   f"{SshClient.JOURNAL_FILTERS[log_name]}").rstrip()
+        if cursor:
+            command += f" --cursor='{cursor}'"
+        output = self.run_commands(command, timeout=SshClient.JOURNAL_TIMEOUT)[command].replace("\r", "")
+        lines = output.split("\n")[1:-1]
+        new_cursor = cursor
+        records = []
+        for line in lines:
+            result = SshClient.CURSOR_PATTERN.match(line)
+            if result:
+                new_cursor = result["cursor"]
+            elif not SshClient.JOURNAL_SERVICE_PATTERN.match(line):
+                records.append(line)
+        if not records and cursor is None:
+            logging.warning("No records in %s journal selected by '%s', check that the filter selects the same records "
+                            "as uiob", log_name, SshClient.JOURNAL_FILTERS[log_name] or "journalctl")
+        return "\n".join(records), new_cursor
 
     def get_size_of_logs(self) -> str:
         command = "journalctl --disk-usage"
@@ -50,22 +182,29 @@ class SshClient:
             logging.error("Failed to get journal size from BVVU (%s)", exc)
         return ""
 
-    def run_commands(self, *commands) -> Dict[str, str]:
-        max_bytes = 60000
-        with self._client.invoke_shell() as ssh:
-            result = {}
-            for command in commands:
-                ssh.send(f"{command}\n")
-                ssh.settimeout(5)
-
-                output = ""
-                while True:
-                    try:
-                        part = ssh.recv(max_bytes).decode("utf-8")
-                        output += part
-                        time.sleep(0.5)
-                    except socket.timeout:
-                        break
-                result[command] = output
-
-            return result
+    def run_commands(self, *commands, end_marker: Optional[str] = None, timeout: float = TIMEOUT) -> Dict[str, str]:
+        """
+        :param commands: commands to be executed in the BVVU CLI;
+        :param end_marker: string after which the command output is considered complete. By default output is read
+        until the CLI prompt;
+        :param timeout: maximum time to wait for next part of the output.
+        :return: dictionary with output for each command.
+        """
+
+        result = {}
+        for command in commands:
+            start_time = time.monotonic()
+            if not self._is_connected():
+                self.connect()
+            try:
+                output = self._run_command(command, end_marker, timeout)
+            except (EOFError, OSError, paramiko.SSHException) as exc:
+                logging.warning("SSH session with BVVU was lost (%s), reconnecting...", exc)
+                self.connect()
+                output = self._run_command(command, end_marker, timeout)
+            latency = time.monotonic() - start_time
+            label = SshClient.ARGUMENT_VALUE_PATTERN.sub("=...", command)
+            self._latencies.setdefault(label, []).append(latency)
+            logging.info("Command '%s' executed in %.3f s", label, latency)
+            result[command] = output
+        return result
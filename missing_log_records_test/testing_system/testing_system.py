@@ -1,8 +1,17 @@
 import logging
-import time
-from typing import Dict, List
+import os
+from array import array
+from typing import Any, Callable, Dict, Optional, Tuple
 from uiobapi import Uiob
+import journal_file as jf
 import utils as ut
+from fleet import FleetProgress, run_fleet
+from metrics import IterationTimer, MetricsServer, PhaseMetrics
+from pipeline import LogPipeline
+from records import find_lost_ranges, iter_text_records, record_digest
+from reboot_waiter import RebootWaiter
+from results import ResultStore, size_to_megabytes
+from snapshot_store import SnapshotStore
 from ssh import SshClient
 
 
@@ -17,60 +26,221 @@ class TestingSystem:
 
     _MAX_REBOOT_TIME: int = 10 * 60
 
-    def __init__(self, host: str, port: int, username: str, password: str, reboots: int) -> None:
+    def __init__(self, host: str, port: int, username: str, password: str, reboots: int, store: bool = False,
+                 compression: Optional[str] = None, jobs: int = 3,
+                 progress_callback: Optional[Callable[[str, int], None]] = None, incremental: bool = False,
+                 pipeline: bool = False, compress: bool = False) -> None:
         """
         :param host: IP address of tested device;
         :param port: port for ssh connection;
         :param username: username for connecting to BVVU via ssh;
         :param password: password for connecting to BVVU via ssh;
-        :param reboots: number of BVVU reboots.
+        :param reboots: number of BVVU reboots;
+        :param store: if True, logs will be saved to deduplicated compressed snapshot store;
+        :param compression: compression method for snapshot store;
+        :param jobs: maximum number of logs that are downloaded from BVVU at the same time;
+        :param progress_callback: function that is called with host and number of completed reboots after each
+        reboot;
+        :param incremental: if True, only records that appeared since the previous download are downloaded;
+        :param pipeline: if True, BVVU is rebooted as soon as logs are downloaded, and logs are saved and checked
+        in background;
+        :param compress: if True and snapshot store is not used, logs will be saved to compressed files.
         """
 
+        self._compression: Optional[str] = compression
+        self._cursors: Optional[Dict[str, Optional[str]]] = ({log_name: None for log_name in ut.LOG_NAMES}
+                                                             if incremental else None)
+        self._file_compression: Optional[str] = (compression or jf.get_default_compression()
+                                                 if compress and not store else None)
         self._host: str = host
-        self._logs: Dict[str, Dict[str, List[str]]] = {"general": {},
-                                                       "urmc": {},
-                                                       "xinet": {}}
+        self._jobs: int = jobs
+        self._logs: Dict[str, Dict[str, Any]] = {log_name: {} for log_name in ut.LOG_NAMES}
+        self._metrics: PhaseMetrics = PhaseMetrics(host, os.path.join(os.path.curdir, host, PhaseMetrics.FILE_NAME))
         self._password: str = password
+        self._pipeline: Optional[LogPipeline] = None
         self._port: str = port
+        self._progress_callback: Optional[Callable[[str, int], None]] = progress_callback
+        self._reboot_waiter: Optional[RebootWaiter] = None
         self._reboots: int = reboots
+        self._results: Optional[ResultStore] = None
+        self._ssh_client: SshClient = SshClient(host, port, username, password)
+        self._store: Optional[SnapshotStore] = None
+        self._use_pipeline: bool = pipeline
+        self._use_store: bool = store
         self._username: str = username
 
+    @property
+    def metrics(self) -> PhaseMetrics:
+        """
+        :return: durations of iteration phases.
+        """
+
+        return self._metrics
+
     @staticmethod
-    def _check_log(log_name: str, list_of_file_names: List[str], list_of_logs: List[str]) -> None:
-        if len(list_of_logs) > 1:
-            last_log = ut.get_last_log(list_of_logs[-2])
-            logging.info("Checking %s log for last record '%s'", log_name, last_log)
-            if last_log not in list_of_logs[-1]:
-                raise TestFailed(f"Last record '{last_log}' from '{list_of_file_names[-2]}' not found in "
-                                 f"'{list_of_file_names[-1]}'")
+    def _check_log(log_name: str, tail: Dict[str, Any], file_name: str, log: str,
+                   count_lost: bool = True) -> Tuple[Optional[bool], Optional[int]]:
+        """
+        Method checks that the last record of the previous log is present in the new log and counts records of the
+        previous log lost in the new log. Only digests of records, the last record and the file name of the previous
+        log are kept in memory, the new log is checked in one pass over its records.
+        :param log_name: log type;
+        :param tail: dictionary with file name, last record and digests of records of the previous log, it is
+        updated for the new log;
+        :param file_name: name of file with the new log;
+        :param log: new log;
+        :param count_lost: if False, lost records are not counted (logs downloaded from the journald cursor contain
+        only new records, so they cannot be aligned).
+        :return: True if the last record of the previous log was not found, False if it was found, None if there is no
+        previous record, and number of lost records.
+        """
+
+        last_record = tail.get("last_record")
+        previous_file_name = tail.get("file_name")
+        previous_digests = tail.get("digests")
+        found = last_record is None
+        new_last_record = None
+        digests = array("Q")
+        for record in iter_text_records(log):
+            if not found and record == last_record:
+                found = True
+            if count_lost:
+                digests.append(record_digest(record))
+            new_last_record = record
+        tail["digests"] = digests if count_lost else None
+        tail["file_name"] = file_name
+        tail["last_record"] = new_last_record
+
+        if last_record is None:
+            logging.info("%s log checked", log_name)
+            return None, None
+
+        logging.info("Checking %s log for last record '%s'", log_name, last_record)
+        lost = None
+        if previous_digests is not None and count_lost:
+            lost_ranges = find_lost_ranges(previous_digests, digests)
+            lost = sum(end - start for start, end in lost_ranges)
+            if lost:
+                logging.error("%d records from '%s' not found in '%s' (%s)", lost, previous_file_name, file_name,
+                              ", ".join(f"records {start}-{end - 1}" for start, end in lost_ranges))
+        if not found:
+            logging.error("Last record '%s' from '%s' not found in '%s'", last_record, previous_file_name, file_name)
         logging.info("%s log checked", log_name)
+        return not found, lost
 
-    def _do_test(self, dir_name: str, uiob: Uiob) -> None:
+    def _check_logs(self, test_index: int, logs_size: str, new_logs: Dict[str, Dict[str, Any]],
+                    timer: IterationTimer) -> None:
         """
-        Method performs downloading logs and rebooting.
-        :param dir_name: directory for saving logs;
-        :param uiob: object to communicate with BVVU device.
+        Method checks downloaded logs and saves results of checks.
+        :param test_index: test iteration number;
+        :param logs_size: size of logs in BVVU;
+        :param new_logs: dictionary with downloaded log, name of its file and time of saving for each log type;
+        :param timer: timer of test iteration.
         """
 
-        ssh_client = SshClient(self._host, self._port, self._username, self._password)
-        logs_size = ssh_client.get_size_of_logs()
-        ut.get_and_save_logs(dir_name, uiob, logs_size, self._logs)
-        for log_name, log_and_file_names in self._logs.items():
+        for log_name, tail in self._logs.items():
+            new_log = new_logs[log_name]
+            loss = None
+            lost = None
             try:
-                self._check_log(log_name, log_and_file_names["file_names"], log_and_file_names["logs"])
+                with timer.measure(f"check_{log_name}"):
+                    loss, lost = self._check_log(log_name, tail, new_log["file_name"], new_log["log"],
+                                                 self._cursors is None)
             except Exception as exc:
                 logging.error(exc)
+            with timer.measure("save_results"):
+                self._results.add_snapshot(self._host, test_index, log_name, new_log["file_name"],
+                                           new_log["datetime"], size_to_megabytes(logs_size), loss, lost)
+
+    def _close(self, error: Optional[Exception] = None) -> None:
+        """
+        Method waits for background processing of logs and closes ssh session and database of results.
+        :param error: exception with which the test failed. If it is given, error of background processing is only
+        logged, so it does not replace this exception.
+        """
 
-        uiob.os.reboot()
-        logging.info("Reboot")
-        logging.info("Wait for BVVU is up...")
-        reboot_at = time.time()
-        while not uiob.check_alive() and time.time() < reboot_at + self._MAX_REBOOT_TIME:
-            time.sleep(10)
-        if not uiob.check_alive():
-            raise TestFailed("It seems like BVVU admin panel is dead")
+        try:
+            if self._pipeline is not None:
+                self._pipeline.close()
+        except Exception as exc:
+            if error is None:
+                raise
+            logging.error("Background processing of logs failed", exc_info=exc)
+        finally:
+            self._pipeline = None
+            self._ssh_client.close()
+            self._results.close()
 
-        logging.info("BVVU admin panel is online again")
+    def _do_test(self, dir_name: str, uiob: Uiob, test_index: int) -> None:
+        """
+        Method performs downloading logs and rebooting.
+        :param dir_name: directory for saving logs;
+        :param uiob: object to communicate with BVVU device;
+        :param test_index: test iteration number.
+        """
+
+        timer = self._metrics.start_iteration(test_index)
+        try:
+            with timer.measure("ssh_connect"):
+                self._ssh_client.connect()
+            with timer.measure("disk_usage"):
+                logs_size = self._ssh_client.get_size_of_logs()
+            if self._pipeline is not None:
+                if self._cursors is not None:
+                    new_logs = ut.get_new_logs(self._ssh_client, logs_size, self._cursors, timer,
+                                               self._file_compression)
+                else:
+                    new_logs = ut.get_logs(uiob, logs_size, self._jobs, timer=timer,
+                                           compression=self._file_compression)
+                timer.hold()
+                try:
+                    with timer.measure("pipeline_wait"):
+                        self._pipeline.put(dir_name, test_index, logs_size, new_logs, timer)
+                except Exception:
+                    # Logs were not passed to the background stage, so it will not finish the iteration
+                    timer.finish()
+                    raise
+            elif self._cursors is not None:
+                new_logs = ut.get_and_save_new_logs(dir_name, self._ssh_client, logs_size, self._cursors, self._store,
+                                                    timer, self._file_compression)
+                self._check_logs(test_index, logs_size, new_logs, timer)
+            else:
+                new_logs = ut.get_and_save_logs(dir_name, uiob, logs_size, self._store, self._jobs, timer=timer,
+                                                compression=self._file_compression)
+                self._check_logs(test_index, logs_size, new_logs, timer)
+            del new_logs
+
+            with timer.measure("reboot_command"):
+                uiob.os.reboot()
+                self._ssh_client.close()
+            logging.info("Reboot")
+            logging.info("Wait for BVVU is up...")
+            try:
+                with timer.measure("reboot_wait"):
+                    self._reboot_waiter.wait()
+            except TimeoutError as exc:
+                raise TestFailed("It seems like BVVU admin panel is dead") from exc
+
+            logging.info("BVVU admin panel is online again")
+        finally:
+            timer.finish()
+
+    def _save_and_check_logs(self, dir_name: str, test_index: int, logs_size: str,
+                             new_logs: Dict[str, Dict[str, Any]], timer: IterationTimer) -> None:
+        """
+        Method saves and checks downloaded logs. In pipeline mode it is called in background while BVVU reboots.
+        :param dir_name: directory for saving logs;
+        :param test_index: test iteration number;
+        :param logs_size: size of logs in BVVU;
+        :param new_logs: dictionary with downloaded log, name of its file and time of saving for each log type;
+        :param timer: timer of test iteration.
+        """
+
+        try:
+            ut.save_new_logs(dir_name, new_logs, self._store, timer)
+            self._check_logs(test_index, logs_size, new_logs, timer)
+        finally:
+            timer.finish()
 
     def run_test(self) -> None:
         """
@@ -78,19 +248,60 @@ class TestingSystem:
         """
 
         uiob: Uiob = Uiob(self._host)
+        self._reboot_waiter = RebootWaiter(self._host, self._port, uiob.check_alive, self._MAX_REBOOT_TIME)
         dir_name: str = ut.make_dir(self._host)
+        if self._use_store:
+            self._store = SnapshotStore(dir_name, self._compression)
+        self._results = ResultStore(os.path.join(dir_name, ResultStore.FILE_NAME))
+        if self._use_pipeline:
+            self._pipeline = LogPipeline(self._save_and_check_logs)
         test_index = 0
-        while test_index < self._reboots:
-            logging.info("TEST #%d", test_index)
-            self._do_test(dir_name, uiob)
-            test_index += 1
+        error = None
+        try:
+            while test_index < self._reboots:
+                logging.info("TEST #%d", test_index)
+                self._do_test(dir_name, uiob, test_index)
+                test_index += 1
+                if self._progress_callback is not None:
+                    self._progress_callback(self._host, test_index)
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            self._close(error)
+        for command, latency in self._ssh_client.get_latency_summary().items():
+            logging.info("SSH command '%s': %d calls, mean latency %.3f s, max latency %.3f s", command,
+                         latency["calls"], latency["mean"], latency["max"])
+        for phase, duration in self._reboot_waiter.get_summary().items():
+            logging.info("Reboot phase '%s': mean %.1f s, min %.1f s, max %.1f s", phase, duration["mean"],
+                         duration["min"], duration["max"])
+        self._metrics.log_summary()
         logging.info("Test passed")
 
 
 def run() -> None:
     args = ut.parse_args()
-    testing_system = TestingSystem(args.host, args.port, args.username, args.password, args.reboots)
-    testing_system.run_test()
+    hosts = args.hosts or [args.host]
+    progress = FleetProgress(hosts, args.reboots) if len(hosts) > 1 else None
+    testing_systems = {host: TestingSystem(host, args.port, args.username, args.password, args.reboots, args.store,
+                                           args.compression, args.jobs, progress.update if progress else None,
+                                           args.incremental, args.pipeline, args.compress)
+                       for host in hosts}
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(args.metrics_port)
+        for testing_system in testing_systems.values():
+            metrics_server.add(testing_system.metrics)
+        metrics_server.start()
+
+    try:
+        if progress is None:
+            testing_systems[hosts[0]].run_test()
+        else:
+            run_fleet(testing_systems, progress)
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
 
 
 if __name__ == "__main__":
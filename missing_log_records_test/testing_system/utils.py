@@ -1,41 +1,168 @@
 import argparse
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, Optional, Tuple
 from uiobapi import Uiob
+import journal_file as jf
+from metrics import IterationTimer, measure
+from snapshot_store import SnapshotStore
+from ssh import SshClient
 
 
-def get_and_save_logs(dir_name: str, uiob: Uiob, logs_size: str, logs: Dict[str, Dict[str, List[str]]]) -> None:
-    now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    for log_name, logs_and_file_names in logs.items():
-        func_name_to_get_log = {"general": "general_logs",
-                                "urmc": "tango_urmc_logs",
-                                "xinet": "xinet_logs"}.get(log_name)
-        func = getattr(uiob.os.journal, func_name_to_get_log, None)
-        if func is None:
-            raise ValueError(f"Failed to find method to get {log_name} log from uiob")
+LOG_NAMES: Tuple[str, ...] = ("general", "urmc", "xinet")
+
+
+def _get_file_name(log_name: str, now: str, logs_size: str, compression: Optional[str] = None) -> str:
+    """
+    :param log_name: log type;
+    :param now: date and time of saving;
+    :param logs_size: size of logs in BVVU;
+    :param compression: compression method of file, if None, log is saved to plain text file.
+    :return: name of file for log.
+    """
+
+    extension = ".txt" + (jf.EXTENSIONS[compression] if compression else "")
+    return f"{log_name} {now} {logs_size}{extension}" if logs_size else f"{log_name} {now}{extension}"
+
+
+def get_and_save_log(dir_name: str, uiob: Uiob, log_name: str, file_name: str,
+                     store: Optional[SnapshotStore] = None, timer: Optional[IterationTimer] = None) -> str:
+    """
+    Function downloads log of given type from BVVU and saves it to file.
+    :param dir_name: directory for saving logs;
+    :param uiob: object to communicate with BVVU device;
+    :param log_name: log type (may be 'general', 'urmc' and 'xinet');
+    :param file_name: name of file for log;
+    :param store: snapshot store where to save log instead of plain text file;
+    :param timer: timer of test iteration to measure downloading and saving.
+    :return: downloaded log.
+    """
+
+    new_log = get_log(uiob, log_name, timer)
+    save_log(dir_name, file_name, new_log, store, timer, log_name)
+    return new_log
+
+
+def get_and_save_logs(dir_name: str, uiob: Uiob, logs_size: str, store: Optional[SnapshotStore] = None,
+                      jobs: int = 3, log_names: Tuple[str, ...] = LOG_NAMES, timer: Optional[IterationTimer] = None,
+                      compression: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Function downloads logs of all types from BVVU concurrently and saves them to files.
+    :param dir_name: directory for saving logs;
+    :param uiob: object to communicate with BVVU device;
+    :param logs_size: size of logs in BVVU;
+    :param store: snapshot store where to save logs instead of plain text files;
+    :param jobs: maximum number of logs that are downloaded and saved at the same time;
+    :param log_names: types of logs to download;
+    :param timer: timer of test iteration to measure downloading and saving;
+    :param compression: compression method of files, if None, logs are saved to plain text files.
+    :return: dictionary with downloaded log, name of its file and time of saving for each log type.
+    """
+
+    saved_at = datetime.now().replace(microsecond=0)
+    now = saved_at.strftime("%Y-%m-%d_%H-%M-%S")
+    file_names = {log_name: _get_file_name(log_name, now, logs_size, compression) for log_name in log_names}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {log_name: executor.submit(get_and_save_log, dir_name, uiob, log_name, file_name, store, timer)
+                   for log_name, file_name in file_names.items()}
+        return {log_name: {"datetime": saved_at,
+                           "file_name": file_names[log_name],
+                           "log": future.result()}
+                for log_name, future in futures.items()}
+
+
+def get_and_save_new_logs(dir_name: str, ssh_client: SshClient, logs_size: str, cursors: Dict[str, Optional[str]],
+                          store: Optional[SnapshotStore] = None, timer: Optional[IterationTimer] = None,
+                          compression: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Function downloads from BVVU only records that appeared since the previous download and saves them to files.
+    :param dir_name: directory for saving logs;
+    :param ssh_client: ssh client connected to BVVU;
+    :param logs_size: size of logs in BVVU;
+    :param cursors: dictionary with journald cursor of the last received record for each log type, it is updated;
+    :param store: snapshot store where to save logs instead of plain text files;
+    :param timer: timer of test iteration to measure downloading and saving;
+    :param compression: compression method of files, if None, logs are saved to plain text files.
+    :return: dictionary with downloaded log, name of its file and time of saving for each log type.
+    """
+
+    new_logs = get_new_logs(ssh_client, logs_size, cursors, timer, compression)
+    save_new_logs(dir_name, new_logs, store, timer)
+    return new_logs
+
+
+def get_log(uiob: Uiob, log_name: str, timer: Optional[IterationTimer] = None) -> str:
+    """
+    Function downloads log of given type from BVVU.
+    :param uiob: object to communicate with BVVU device;
+    :param log_name: log type (may be 'general', 'urmc' and 'xinet');
+    :param timer: timer of test iteration to measure downloading.
+    :return: downloaded log.
+    """
+
+    func_name_to_get_log = {"general": "general_logs",
+                            "urmc": "tango_urmc_logs",
+                            "xinet": "xinet_logs"}.get(log_name)
+    func = getattr(uiob.os.journal, func_name_to_get_log, None)
+    if func is None:
+        raise ValueError(f"Failed to find method to get {log_name} log from uiob")
+    with measure(timer, f"download_{log_name}"):
         new_log = func()
-        logging.info("%s logs received", log_name)
-        file_name = f"{log_name} {now} {logs_size}.txt" if logs_size else f"{log_name} {now}.txt"
-        file_path = os.path.join(dir_name, file_name)
-        if not logs_and_file_names:
-            logs_and_file_names["logs"] = []
-            logs_and_file_names["file_names"] = []
-        logs_and_file_names["logs"].append(new_log)
-        logs_and_file_names["file_names"].append(file_name)
-        save_logs(file_path, new_log)
+    logging.info("%s logs received", log_name)
+    return new_log
 
 
-def get_last_log(logs: str) -> str:
-    logs_list = logs.split("\n")
-    if not logs_list:
-        return ""
+def get_logs(uiob: Uiob, logs_size: str, jobs: int = 3, log_names: Tuple[str, ...] = LOG_NAMES,
+             timer: Optional[IterationTimer] = None, compression: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Function downloads logs of all types from BVVU concurrently without saving them.
+    :param uiob: object to communicate with BVVU device;
+    :param logs_size: size of logs in BVVU;
+    :param jobs: maximum number of logs that are downloaded at the same time;
+    :param log_names: types of logs to download;
+    :param timer: timer of test iteration to measure downloading;
+    :param compression: compression method of files for logs.
+    :return: dictionary with downloaded log, name of file for it and time of saving for each log type.
+    """
 
-    for line in logs_list[::-1]:
-        if line:
-            return line
-    return ""
+    saved_at = datetime.now().replace(microsecond=0)
+    now = saved_at.strftime("%Y-%m-%d_%H-%M-%S")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {log_name: executor.submit(get_log, uiob, log_name, timer) for log_name in log_names}
+        return {log_name: {"datetime": saved_at,
+                           "file_name": _get_file_name(log_name, now, logs_size, compression),
+                           "log": future.result()}
+                for log_name, future in futures.items()}
+
+
+def get_new_logs(ssh_client: SshClient, logs_size: str, cursors: Dict[str, Optional[str]],
+                 timer: Optional[IterationTimer] = None, compression: Optional[str] = None
+                 ) -> Dict[str, Dict[str, Any]]:
+    """
+    Function downloads from BVVU only records that appeared since the previous download. Records are requested
+    starting from the saved journald cursor, so each log begins with the last record of the previous log if that
+    record was not lost.
+    :param ssh_client: ssh client connected to BVVU;
+    :param logs_size: size of logs in BVVU;
+    :param cursors: dictionary with journald cursor of the last received record for each log type, it is updated;
+    :param timer: timer of test iteration to measure downloading;
+    :param compression: compression method of files for logs.
+    :return: dictionary with downloaded log, name of file for it and time of saving for each log type.
+    """
+
+    saved_at = datetime.now().replace(microsecond=0)
+    now = saved_at.strftime("%Y-%m-%d_%H-%M-%S")
+    new_logs = {}
+    for log_name in cursors:
+        with measure(timer, f"download_{log_name}"):
+            new_log, cursors[log_name] = ssh_client.get_journal(log_name, cursors[log_name])
+        logging.info("%s logs received", log_name)
+        new_logs[log_name] = {"datetime": saved_at,
+                              "file_name": _get_file_name(log_name, now, logs_size, compression),
+                              "log": new_log}
+    return new_logs
 
 
 def make_dir(dir_name: str) -> str:
@@ -47,14 +174,68 @@ def make_dir(dir_name: str) -> str:
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser("Script performs a multiple reload of the BVVU and downloads the logs")
     parser.add_argument("--host", type=str, help="IP address of tested BVVU")
+    parser.add_argument("--hosts", type=str, nargs="+", default=None,
+                        help="IP addresses of several BVVUs to be tested at the same time (fleet mode)")
     parser.add_argument("--port", type=int, default=39000, help="Port for ssh connection")
     parser.add_argument("--username", type=str, default="root", help="Username for connecting to BVVU via ssh")
     parser.add_argument("--password", type=str, help="Password for connecting to BVVU via ssh")
     parser.add_argument("--reboots", type=int, default=100, help="Number of BVVU reboots")
+    parser.add_argument("--store", action="store_true",
+                        help="Save logs to deduplicated compressed snapshot store instead of plain text files")
+    parser.add_argument("--compress", action="store_true",
+                        help="Save logs to compressed files (method is given by --compression)")
+    parser.add_argument("--compression", type=str, choices=list(jf.EXTENSIONS), default=None,
+                        help="Compression method for snapshot store or compressed files (by default zstd if "
+                             "available, otherwise gzip)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Download only records that appeared since the previous reboot (by journald cursor). "
+                             "Journals are read by journalctl, which is not checked to select the same records in the "
+                             "same format as uiob, so do not mix such logs with logs downloaded without this argument")
+    parser.add_argument("--jobs", type=int, default=3,
+                        help="Maximum number of logs that are downloaded from BVVU at the same time")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Reboot BVVU as soon as logs are downloaded, save and check logs in background")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="Port of local HTTP endpoint with metrics in Prometheus text format")
     return parser.parse_args()
 
 
+def save_log(dir_name: str, file_name: str, log: str, store: Optional[SnapshotStore] = None,
+             timer: Optional[IterationTimer] = None, log_name: str = "log") -> None:
+    """
+    :param dir_name: directory for saving logs;
+    :param file_name: name of file for log;
+    :param log: log text;
+    :param store: snapshot store where to save log instead of plain text file;
+    :param timer: timer of test iteration to measure saving;
+    :param log_name: log type, it is used as a name of measured phase.
+    """
+
+    with measure(timer, f"save_{log_name}"):
+        if store is not None:
+            store.save(file_name, log)
+        else:
+            save_logs(os.path.join(dir_name, file_name), log)
+
+
 def save_logs(file_path: str, log: str) -> None:
-    with open(file_path, "w", encoding="utf-8") as file:
-        file.write(log)
+    """
+    :param file_path: path to log file. If file has extension '.gz' or '.zst', log is compressed;
+    :param log: log text.
+    """
+
+    jf.write_text(file_path, log)
     logging.info("Log saved to file '%s'", file_path)
+
+
+def save_new_logs(dir_name: str, new_logs: Dict[str, Dict[str, Any]], store: Optional[SnapshotStore] = None,
+                  timer: Optional[IterationTimer] = None) -> None:
+    """
+    :param dir_name: directory for saving logs;
+    :param new_logs: dictionary with downloaded log and name of its file for each log type;
+    :param store: snapshot store where to save logs instead of plain text files;
+    :param timer: timer of test iteration to measure saving.
+    """
+
+    for log_name, new_log in new_logs.items():
+        save_log(dir_name, new_log["file_name"], new_log["log"], store, timer, log_name)
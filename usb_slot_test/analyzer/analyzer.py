@@ -1,28 +1,38 @@
 import argparse
+import glob
 import logging
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import Dict, List, Optional
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
+from analyzer.cache import EngineCache
+from analyzer.engine import LogEngine, SLOT_NUMBER, SlotHistory, SOURCES
+from analyzer.follower import LogFollower
+from analyzer.report import ReportWriter
 
 
 class Analyzer:
 
-    PATTERN = re.compile(r"^\[(.*) INFO\] \[(UIOB|SSH_DEV|SSH_DEV_XIMC|SSH_BEFORE)\] Number of missing modules: (\d+), "
-                         r"missing modules: \[(.*)\]$")
-    SLOT_NUMBER: int = 16
+    MAX_POINTS: int = 2000
+    SLOT_NUMBER: int = SLOT_NUMBER
 
-    def __init__(self) -> None:
-        self._ssh_before_history: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._ssh_before_history_missing: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._ssh_dev_history: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._ssh_dev_history_missing: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._ssh_dev_ximc_history: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._ssh_dev_ximc_history_missing: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._uiob_history: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
-        self._uiob_history_missing: List[List[datetime]] = [[] for _ in range(Analyzer.SLOT_NUMBER)]
+    def __init__(self, use_cache: bool = True, report: Optional[ReportWriter] = None,
+                 max_points: int = MAX_POINTS) -> None:
+        """
+        :param use_cache: if True, state of parsing from the previous runs is used, so only new records are parsed;
+        :param report: if given, charts are saved to files by the report writer instead of being shown;
+        :param max_points: maximum number of points for each slot on a chart. Longer histories are divided into bins.
+        """
+
+        self._device_engines: Dict[str, LogEngine] = {}
+        self._engine: LogEngine = LogEngine()
+        self._max_points: int = max_points
+        self._report: Optional[ReportWriter] = report
+        self._use_cache: bool = use_cache
 
     def _analyze_log(self, log_file: str) -> None:
         """
@@ -33,137 +43,224 @@ class Analyzer:
             logging.error("File '%s' does not exist", log_file)
             return
 
-        with open(log_file, "r", encoding="utf-8") as file:
-            log = file.read().split("\n")
-
-        for record in log:
-            result = Analyzer.PATTERN.match(record)
-            if result:
-                log_time = datetime.strptime(result.group(1), "%Y-%m-%d %H:%M:%S")
-                if "[UIOB]" in record:
-                    self._get_modules_from_record(result, log_time, self._uiob_history, self._uiob_history_missing)
-                elif "[SSH_DEV]" in record:
-                    self._get_slots_from_ssh_record(result, log_time)
-                elif "[SSH_DEV_XIMC]" in record:
-                    self._get_modules_from_record(result, log_time, self._ssh_dev_ximc_history,
-                                                  self._ssh_dev_ximc_history_missing)
-                elif "[SSH_BEFORE]" in record:
-                    self._get_modules_from_record(result, log_time, self._ssh_before_history,
-                                                  self._ssh_before_history_missing)
-
-    @staticmethod
-    def _draw_data(enabled: List[List[datetime]], disabled: List[List[datetime]], legend_format: str,
-                   y_labels: List[str]) -> None:
+        self._engine.merge(parse_log_file(log_file, self._use_cache))
+
+    def _analyze_logs(self, log_files: List[str], jobs: Optional[int] = None) -> None:
+        """
+        Method parses log files in parallel processes and merges the results. Each log file is considered to be
+        the log of a separate device.
+        :param log_files: names of files with logs;
+        :param jobs: maximum number of processes.
+        """
+
+        parse = partial(parse_log_file, use_cache=self._use_cache)
+        if len(log_files) == 1 or jobs == 1:
+            engines = map(parse, log_files)
+            self._store_engines(log_files, engines)
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            self._store_engines(log_files, executor.map(parse, log_files))
+
+    def _log_summary(self) -> None:
+        engines = {"total": self._engine}
+        if len(self._device_engines) > 1:
+            engines.update(self._device_engines)
+        lines = []
+        for name, engine in engines.items():
+            for source in SOURCES:
+                history = engine.histories[source]
+                if not len(history):
+                    continue
+                percentages = ", ".join(f"{percentage:.2f}" for percentage in history.get_drop_percentages())
+                lines.append(f"[{name}] {source}: {len(history)} checks, drop percentage by slots: {percentages}")
+                logging.info(lines[-1])
+        if self._report is not None:
+            self._report.add_text("\n".join(lines))
+
+    def _store_engines(self, log_files: List[str], engines) -> None:
         """
-        :param enabled: history of modules in time when they were in working condition;
-        :param disabled: history of modules in time when they were inactive;
-        :param slot:
+        :param log_files: names of files with logs;
+        :param engines: engines with parsed logs in the same order as files.
         """
 
-        _, axs = plt.subplots(2, 1)
-        total_min_x = None
-        total_max_x = None
+        for log_file, engine in zip(log_files, engines):
+            device = os.path.splitext(os.path.basename(log_file))[0]
+            if device in self._device_engines:
+                self._device_engines[device].merge(engine)
+            else:
+                self._device_engines[device] = engine
+            self._engine.merge(engine)
+
+    def _draw_data(self, history: SlotHistory, legend_format: str, y_labels: List[str], first_index: int = 1,
+                   name: str = "") -> None:
+        """
+        :param history: history of modules from one source;
+        :param legend_format: format of legend for slot, it can contain 'index' and 'dump_percentage';
+        :param y_labels: labels for charts with modules in working condition and with inactive modules;
+        :param first_index: number of the first slot in the legend;
+        :param name: name of file for the chart if charts are saved to files.
+        """
+
+        if not len(history):
+            logging.info("There is no data for the chart '%s'", y_labels[0])
+            return
+
+        times, presence, absence = history.get_binned_presence(self._max_points)
+        dump_percentages = np.round(history.get_drop_percentages(), 2)
+        figure, axs = plt.subplots(2, 1)
         for index in range(Analyzer.SLOT_NUMBER):
-            e_times = enabled[index]
-            d_times = disabled[index]
-            if not e_times and not d_times:
-                continue
-
-            dump_percentage = round(100 * len(d_times) / (len(e_times) + len(d_times)), 2)
-            index += 1
-            axs[0].scatter(e_times, len(e_times) * [index], label=legend_format.format(index=index,
-                                                                                       dump_percentage=dump_percentage))
-            axs[1].scatter(d_times, len(d_times) * [index])
-
-            times = [*e_times, *d_times]
-            local_min_x = min(times)
-            if total_min_x is None or total_min_x > local_min_x:
-                total_min_x = local_min_x
-            local_max_x = max(times)
-            if total_max_x is None or total_max_x < local_max_x:
-                total_max_x = local_max_x
+            e_times = times[presence[:, index]]
+            d_times = times[absence[:, index]]
+            label = legend_format.format(index=index + first_index, dump_percentage=dump_percentages[index])
+            axs[0].scatter(e_times, np.full(len(e_times), index + 1), label=label)
+            axs[1].scatter(d_times, np.full(len(d_times), index + 1))
 
         for i, y_label in enumerate(y_labels):
             axs[i].set_ylabel(y_label)
 
-        start_date = get_start_date(*enabled, *disabled)
+        start_date = get_start_date(times)
         for ax in axs:
             ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
             ax.set_xlabel(f"Время {start_date}")
-            ax.set_xlim([total_min_x, total_max_x])
+            ax.set_xlim([times.min(), times.max()])
             ax.set_ylim([0, Analyzer.SLOT_NUMBER + 1])
             ax.label_outer()
         axs[0].legend(bbox_to_anchor=(0.1, 1.3), loc="upper left", ncol=4)
-        plt.show()
-
-    @staticmethod
-    def _get_modules_from_record(result, log_time: datetime, history: List[List[datetime]],
-                                 missing_history: List[List[datetime]]) -> None:
-        missing_modules = []
-        for module in result.group(4).split(", "):
-            if module:
-                module = module.strip("'")
-                missing_modules.append(int(module))
-
-        for module_index in range(1, Analyzer.SLOT_NUMBER + 1):
-            if module_index in missing_modules:
-                missing_history[module_index - 1].append(log_time)
-            else:
-                history[module_index - 1].append(log_time)
-
-    def _get_slots_from_ssh_record(self, result, log_time: datetime) -> None:
-        missing_slots = []
-        pattern = re.compile(r"^'ttyACM(?P<index>\d+)'$")
-        for slot in result.group(4).split(", "):
-            new_result = pattern.match(slot)
-            if new_result:
-                missing_slots.append(int(new_result["index"]))
-
-        for slot_index in range(Analyzer.SLOT_NUMBER):
-            if slot_index in missing_slots:
-                self._ssh_dev_history_missing[slot_index].append(log_time)
-            else:
-                self._ssh_dev_history[slot_index].append(log_time)
+        if self._report is not None:
+            self._report.add_figure(figure, name, y_labels[0])
+        else:
+            plt.show()
 
-    def run(self, log_file: str) -> None:
+    def run(self, log_files: List[str], jobs: Optional[int] = None) -> None:
         """
-        :param log_file: name of file with logs.
+        :param log_files: names of files with logs;
+        :param jobs: maximum number of processes to parse files.
         """
 
-        self._analyze_log(log_file)
-        self._draw_data(self._uiob_history, self._uiob_history_missing,
-                        legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
-                        y_labels=["Модули в админке", "Отвалившиеся модули"])
-        self._draw_data(self._ssh_dev_ximc_history, self._ssh_dev_ximc_history_missing,
-                        legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
-                        y_labels=["Модули по ssh (/dev/ximc)", "Отвалившиеся модули"])
-        self._draw_data(self._ssh_dev_ximc_history, self._ssh_dev_ximc_history_missing,
-                        legend_format="Модуль ttyACM{index} ({dump_percentage}% отвалов)",
-                        y_labels=["Модули по ssh (/dev)", "Отвалившиеся модули"])
-        self._draw_data(self._ssh_before_history, self._ssh_before_history_missing,
-                        legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
-                        y_labels=["Модули по ssh до usbreset", "Отвалившиеся модули"])
+        self._analyze_logs(log_files, jobs)
+        self._log_summary()
+        histories = self._engine.histories
+        self._draw_data(histories["UIOB"], legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
+                        y_labels=["Модули в админке", "Отвалившиеся модули"], name="uiob")
+        self._draw_data(histories["SSH_DEV_XIMC"], legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
+                        y_labels=["Модули по ssh (/dev/ximc)", "Отвалившиеся модули"], name="ssh_dev_ximc")
+        self._draw_data(histories["SSH_DEV"], legend_format="Модуль ttyACM{index} ({dump_percentage}% отвалов)",
+                        y_labels=["Модули по ssh (/dev)", "Отвалившиеся модули"], first_index=0, name="ssh_dev")
+        self._draw_data(histories["SSH_BEFORE"], legend_format="Модуль #{index} ({dump_percentage}% отвалов)",
+                        y_labels=["Модули по ssh до usbreset", "Отвалившиеся модули"], name="ssh_before")
+        if self._report is not None:
+            self._report.save()
+
+
+def expand_log_files(paths: List[str], use_results: bool = True) -> List[str]:
+    """
+    :param paths: names of files, directories or glob patterns;
+    :param use_results: if True and there is database with results next to the log file, the database is taken
+    instead of the log file.
+    :return: sorted list of files with logs. All files from directories are taken except files with metrics of
+    iteration phases. Databases with results are taken if there are no log files for them.
+    """
+
+    log_files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            log_files.update(entry.path for entry in os.scandir(path)
+                             if entry.is_file() and not entry.name.endswith(LogEngine.METRICS_EXTENSION))
+        elif os.path.exists(path):
+            log_files.add(path)
+        else:
+            matches = glob.glob(path)
+            if not matches:
+                logging.error("File '%s' does not exist", path)
+            log_files.update(match for match in matches if os.path.isfile(match))
+
+    selected_files = set()
+    text_files = set()
+    for log_file in log_files:
+        if log_file.endswith(LogEngine.RESULTS_EXTENSION):
+            continue
+        root = os.path.splitext(log_file)[0]
+        text_files.add(root)
+        results_file = root + LogEngine.RESULTS_EXTENSION
+        selected_files.add(results_file if use_results and os.path.isfile(results_file) else log_file)
+    selected_files.update(log_file for log_file in log_files if log_file.endswith(LogEngine.RESULTS_EXTENSION) and
+                          os.path.splitext(log_file)[0] not in text_files)
+    return sorted(selected_files)
 
 
 def get_start_date(*args) -> str:
     """
-    :param args: lists with datetimes.
-    :return: smallest date from the lists.
+    :param args: arrays with check times.
+    :return: smallest date from the arrays.
     """
 
-    start_datetime = None
-    for data in args:
-        if data and (start_datetime is None or start_datetime > data[0]):
-            start_datetime = data[0]
-    if start_datetime:
-        return start_datetime.strftime("%d.%m.%Y")
+    start_datetimes = [data.min() for data in args if len(data)]
+    if start_datetimes:
+        return min(start_datetimes).astype(datetime).strftime("%d.%m.%Y")
     return ""
 
 
+def parse_log_file(log_file: str, use_cache: bool = False) -> LogEngine:
+    """
+    :param log_file: name of file with logs or database with results;
+    :param use_cache: if True, parsing of log file continues from the position saved in the cache at the previous run.
+    :return: engine with parsed log.
+    """
+
+    engine = LogEngine()
+    if log_file.endswith(LogEngine.RESULTS_EXTENSION):
+        engine.parse_results(log_file)
+        return engine
+
+    offset = 0
+    if use_cache:
+        cached_engine, offset = EngineCache.load(log_file)
+        if cached_engine is not None:
+            engine = cached_engine
+    new_offset = engine.parse_file(log_file, offset)
+    if use_cache and (new_offset != offset or not offset):
+        EngineCache.save(log_file, engine, new_offset)
+    return engine
+
+
 def run_analyzer() -> None:
     parser = argparse.ArgumentParser("Script to analyze log")
-    parser.add_argument("log_file", type=str, help="Name of file with log")
+    parser.add_argument("log_files", type=str, nargs="+",
+                        help="Names of files with logs, directories with log files or glob patterns. Each file is "
+                             "considered to be the log of a separate device. Databases with results (*.sqlite) next "
+                             "to log files are used instead of logs")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Maximum number of processes to parse log files (by default number of processors)")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Parse log files from the beginning without using results of the previous runs")
+    parser.add_argument("--recheck", action="store_true",
+                        help="Parse log files even if there are databases with results for them")
+    parser.add_argument("--follow", action="store_true",
+                        help="Follow log files while the test is running and update charts with drop percentages")
+    parser.add_argument("--refresh", type=float, default=5, help="Time in seconds between refreshes in follow mode")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Directory where to save charts. If given, charts are saved to files and not shown, so "
+                             "the analyzer can run without a display")
+    parser.add_argument("--formats", type=str, nargs="+", default=["png", "html"], choices=ReportWriter.FORMATS,
+                        help="Formats of files with charts")
+    parser.add_argument("--max_points", type=int, default=Analyzer.MAX_POINTS,
+                        help="Maximum number of points for each slot on a chart, longer histories are divided into "
+                             "time bins")
     args = parser.parse_args()
 
-    analyzer = Analyzer()
-    analyzer.run(args.log_file)
+    log_files = expand_log_files(args.log_files, not args.recheck)
+    if not log_files:
+        logging.error("No log files to analyze")
+        return
+
+    if args.follow:
+        LogFollower(log_files, args.refresh).run()
+        return
+
+    report = None
+    if args.output:
+        plt.switch_backend("Agg")
+        report = ReportWriter(args.output, args.formats, "Отвалы модулей в слотах БВВУ")
+    analyzer = Analyzer(not args.no_cache, report, args.max_points)
+    analyzer.run(log_files, args.jobs)
@@ -0,0 +1,93 @@
+import logging
+import os
+import pickle
+import zlib
+from typing import Optional, Tuple
+from analyzer.engine import LogEngine
+
+
+class EngineCache:
+    """
+    Class saves state of the engine after parsing the log file together with size, modification time of the file
+    and position up to which the file was parsed. If the log file was only appended since the last run, parsing
+    continues from the saved position. The cache files are stored in the folder next to the log file.
+    """
+
+    DIR_NAME: str = "analyzer_cache"
+    EXTENSION: str = ".pickle"
+    TAIL_SIZE: int = 4096
+    VERSION: int = 1
+
+    @staticmethod
+    def _get_cache_path(log_file: str) -> str:
+        """
+        :param log_file: name of file with logs.
+        :return: name of cache file for the log file.
+        """
+
+        dir_name, file_name = os.path.split(os.path.abspath(log_file))
+        return os.path.join(dir_name, EngineCache.DIR_NAME, file_name + EngineCache.EXTENSION)
+
+    @staticmethod
+    def _get_tail_checksum(log_file: str, offset: int) -> int:
+        """
+        :param log_file: name of file with logs;
+        :param offset: position in file.
+        :return: checksum of bytes before the given position. It is used to check that the parsed part of the file
+        has not been rewritten.
+        """
+
+        start = max(0, offset - EngineCache.TAIL_SIZE)
+        with open(log_file, "rb") as file:
+            file.seek(start)
+            return zlib.crc32(file.read(offset - start))
+
+    @staticmethod
+    def load(log_file: str) -> Tuple[Optional[LogEngine], int]:
+        """
+        :param log_file: name of file with logs.
+        :return: saved engine and position up to which the file was parsed. If the cache is missing or the parsed part
+        of the file has changed, None and 0 are returned.
+        """
+
+        try:
+            with open(EngineCache._get_cache_path(log_file), "rb") as file:
+                state = pickle.load(file)
+            stat = os.stat(log_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None, 0
+
+        if state.get("version") != EngineCache.VERSION:
+            return None, 0
+        if stat.st_size == state["size"] and stat.st_mtime_ns == state["mtime"]:
+            return state["engine"], state["offset"]
+        if stat.st_size < state["offset"] or \
+                EngineCache._get_tail_checksum(log_file, state["offset"]) != state["tail"]:
+            logging.info("Log file '%s' has changed, it will be parsed from the beginning", log_file)
+            return None, 0
+        return state["engine"], state["offset"]
+
+    @staticmethod
+    def save(log_file: str, engine: LogEngine, offset: int) -> None:
+        """
+        :param log_file: name of file with logs;
+        :param engine: engine with parsed log;
+        :param offset: position up to which the file was parsed.
+        """
+
+        cache_path = EngineCache._get_cache_path(log_file)
+        stat = os.stat(log_file)
+        state = {"version": EngineCache.VERSION,
+                 "size": stat.st_size,
+                 "mtime": stat.st_mtime_ns,
+                 "offset": offset,
+                 "tail": EngineCache._get_tail_checksum(log_file, offset),
+                 "engine": engine}
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as exc:
+            logging.warning("Failed to save analyzer cache for '%s' (%s)", log_file, exc)
@@ -0,0 +1,69 @@
+import zlib
+from typing import Any, BinaryIO, Dict, Generator, Optional, Tuple
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIONS: Dict[str, str] = {".gz": "gzip",
+                                ".zst": "zstd"}
+READ_SIZE: int = 64 * 1024
+
+
+def _create_decompressor(compression: str) -> Any:
+    """
+    :param compression: compression method ('zstd' or 'gzip').
+    :return: object that decompresses one frame. Its attributes eof and unused_data show the end of frame.
+    """
+
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard package is required to read zstd compressed logs")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(wbits=31)
+
+
+def get_compression(log_file: str) -> Optional[str]:
+    """
+    :param log_file: name of file with logs.
+    :return: compression method by the file extension or None if file is not compressed.
+    """
+
+    for extension, compression in COMPRESSIONS.items():
+        if log_file.endswith(extension):
+            return compression
+    return None
+
+
+def iter_frames(file: BinaryIO, compression: str, offset: int = 0) -> Generator[Tuple[int, bytes], None, None]:
+    """
+    Function reads compressed file frame by frame (gzip members or zstd frames). The frame boundaries are positions
+    from which reading can be continued, so only complete frames are returned: if the last frame is still being
+    written, it is skipped.
+    :param file: file opened in binary mode;
+    :param compression: compression method ('zstd' or 'gzip');
+    :param offset: position in file of the beginning of frame from which to start reading.
+    :return: generator with position in file after the frame and decompressed data of the frame.
+    """
+
+    file.seek(offset)
+    decompressor = _create_decompressor(compression)
+    parts = []
+    data = b""
+    while True:
+        if not data:
+            data = file.read(READ_SIZE)
+            if not data:
+                return
+        parts.append(decompressor.decompress(data))
+        if not decompressor.eof:
+            offset += len(data)
+            data = b""
+            continue
+
+        offset += len(data) - len(decompressor.unused_data)
+        data = decompressor.unused_data
+        yield offset, b"".join(parts)
+        decompressor = _create_decompressor(compression)
+        parts = []
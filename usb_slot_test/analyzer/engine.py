@@ -0,0 +1,303 @@
+import calendar
+import re
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from analyzer.compression import get_compression, iter_frames
+
+
+SLOT_NUMBER: int = 16
+ALL_SLOTS_MASK: int = (1 << SLOT_NUMBER) - 1
+SOURCES: Tuple[str, ...] = ("UIOB", "SSH_DEV", "SSH_DEV_XIMC", "SSH_BEFORE")
+
+
+class TimestampParser:
+    """
+    Class converts log timestamps in the format 'YYYY-MM-DD HH:MM:SS' to integer number of seconds. Dates are parsed
+    once and cached, so only hours, minutes and seconds are parsed for each record.
+    """
+
+    def __init__(self) -> None:
+        self._days: Dict[str, int] = {}
+
+    def parse(self, text: str) -> int:
+        """
+        :param text: timestamp from log.
+        :return: number of seconds since epoch (timestamp is treated as naive time).
+        """
+
+        date = text[:10]
+        day = self._days.get(date)
+        if day is None:
+            day = calendar.timegm((int(date[:4]), int(date[5:7]), int(date[8:10]), 0, 0, 0))
+            self._days[date] = day
+        return day + 3600 * int(text[11:13]) + 60 * int(text[14:16]) + int(text[17:19])
+
+
+class SlotHistory:
+    """
+    Class stores history of slots for one source of information. One row is stored for each check: time of the check
+    and 16-bit mask of slots in which modules were present.
+    """
+
+    def __init__(self) -> None:
+        self._masks: array = array("H")
+        self._times: array = array("q")
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def masks(self) -> np.ndarray:
+        """
+        :return: array with masks of present modules.
+        """
+
+        return np.frombuffer(self._masks, dtype=np.uint16) if self._masks else np.zeros(0, dtype=np.uint16)
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        :return: array with check times.
+        """
+
+        times = np.frombuffer(self._times, dtype=np.int64) if self._times else np.zeros(0, dtype=np.int64)
+        return times.astype("datetime64[s]")
+
+    def append(self, timestamp: int, mask: int) -> None:
+        """
+        :param timestamp: time of check in seconds;
+        :param mask: mask of slots in which modules were present.
+        """
+
+        self._times.append(timestamp)
+        self._masks.append(mask)
+
+    def extend(self, other: "SlotHistory") -> None:
+        """
+        :param other: history whose rows should be added to the end of this history.
+        """
+
+        self._times.extend(other._times)
+        self._masks.extend(other._masks)
+
+    def get_binned_presence(self, bin_number: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Method divides time range of the history into bins of equal width. Module is considered present in the bin if
+        it was present in at least one check in the bin, and missing if it was missing in at least one check. So
+        short drops are not lost when the history is reduced.
+        :param bin_number: maximum number of bins. If the history contains fewer checks, each check is a bin.
+        :return: times of bins that contain checks and boolean arrays of shape (number of bins, number of slots) with
+        presence and absence of modules in bins.
+        """
+
+        if len(self) <= bin_number:
+            presence = self.get_presence()
+            return self.times, presence, ~presence
+
+        times = np.frombuffer(self._times, dtype=np.int64)
+        masks = self.masks
+        start = int(times.min())
+        width = -(-(int(times.max()) - start + 1) // bin_number)
+        bins = (times - start) // width
+        bin_number = int(bins.max()) + 1
+        counts = np.bincount(bins, minlength=bin_number)
+        present_counts = np.empty((bin_number, SLOT_NUMBER), dtype=np.int64)
+        for index in range(SLOT_NUMBER):
+            present_counts[:, index] = np.bincount(bins, weights=(masks >> index) & 1, minlength=bin_number)
+        used = counts > 0
+        bin_times = (start + width * np.arange(bin_number) + width // 2)[used].astype("datetime64[s]")
+        present_counts = present_counts[used]
+        return bin_times, present_counts > 0, present_counts < counts[used, None]
+
+    def get_drop_percentages(self) -> np.ndarray:
+        """
+        :return: array with percentage of checks in which module was missing for each slot.
+        """
+
+        if not len(self):
+            return np.full(SLOT_NUMBER, np.nan)
+        return 100 * (~self.get_presence()).sum(axis=0) / len(self)
+
+    def get_presence(self) -> np.ndarray:
+        """
+        :return: boolean array of shape (number of checks, number of slots), True if module was present.
+        """
+
+        return ((self.masks[:, None] >> np.arange(SLOT_NUMBER, dtype=np.uint16)) & 1).astype(bool)
+
+
+class SlotCounters:
+    """
+    Class counts checks and missing modules in each slot for one source of information. Unlike SlotHistory, the size
+    of counters does not depend on the number of checks.
+    """
+
+    def __init__(self) -> None:
+        self.checks: int = 0
+        self.last_mask: Optional[int] = None
+        self.missing: np.ndarray = np.zeros(SLOT_NUMBER, dtype=np.int64)
+
+    def add(self, history: SlotHistory) -> None:
+        """
+        :param history: history with new checks.
+        """
+
+        if not len(history):
+            return
+        self.checks += len(history)
+        self.missing += (~history.get_presence()).sum(axis=0)
+        self.last_mask = int(history.masks[-1])
+
+    def get_drop_percentages(self) -> np.ndarray:
+        """
+        :return: array with percentage of checks in which module was missing for each slot.
+        """
+
+        if not self.checks:
+            return np.full(SLOT_NUMBER, np.nan)
+        return 100 * self.missing / self.checks
+
+    def get_missing_slots(self) -> List[int]:
+        """
+        :return: indexes of slots in which modules were missing during the last check.
+        """
+
+        if self.last_mask is None:
+            return []
+        return [index for index in range(SLOT_NUMBER) if not self.last_mask >> index & 1]
+
+    def merge(self, other: "SlotCounters") -> None:
+        """
+        :param other: counters to be added to these counters.
+        """
+
+        self.checks += other.checks
+        self.missing += other.missing
+
+
+class LogEngine:
+    """
+    Class parses records about missing modules from the test log into compact histories for each source.
+    """
+
+    MARKER: str = "Number of missing modules"
+    METRICS_EXTENSION: str = ".metrics.jsonl"
+    RESULTS_EXTENSION: str = ".sqlite"
+    PATTERN = re.compile(r"^\[(.*) INFO\] \[(UIOB|SSH_DEV|SSH_DEV_XIMC|SSH_BEFORE)\] Number of missing modules: (\d+), "
+                         r"missing modules: \[(.*)\]$")
+    TTY_PATTERN = re.compile(r"^'ttyACM(?P<index>\d+)'$")
+
+    def __init__(self) -> None:
+        self.histories: Dict[str, SlotHistory] = {source: SlotHistory() for source in SOURCES}
+        self._timestamp_parser: TimestampParser = TimestampParser()
+
+    @staticmethod
+    def _get_missing_mask(source: str, modules: str) -> int:
+        """
+        :param source: source of information about modules;
+        :param modules: list of missing modules from the record.
+        :return: mask of slots in which modules were missing.
+        """
+
+        mask = 0
+        for module in modules.split(", "):
+            if not module:
+                continue
+            if source == "SSH_DEV":
+                result = LogEngine.TTY_PATTERN.match(module)
+                index = int(result["index"]) if result else None
+            else:
+                index = int(module.strip("'")) - 1
+            if index is not None and 0 <= index < SLOT_NUMBER:
+                mask |= 1 << index
+        return mask
+
+    def merge(self, other: "LogEngine") -> None:
+        """
+        :param other: engine whose histories should be added to the histories of this engine.
+        """
+
+        for source, history in other.histories.items():
+            self.histories[source].extend(history)
+
+    def parse_file(self, log_file: str, offset: int = 0) -> int:
+        """
+        :param log_file: name of file with logs, it may be compressed by gzip or zstd;
+        :param offset: position in file from which to start parsing.
+        :return: position in file after the last parsed complete line. For compressed file it is position after the
+        last parsed complete frame.
+        """
+
+        compression = get_compression(log_file)
+        if compression is not None:
+            with open(log_file, "rb") as file:
+                for offset, data in iter_frames(file, compression, offset):
+                    for line in data.decode("utf-8", errors="replace").split("\n"):
+                        if line:
+                            self.parse_line(line.rstrip("\r"))
+            return offset
+
+        with open(log_file, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                self.parse_line(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        return offset
+
+    def parse_results(self, results_file: str, last_row: int = 0) -> int:
+        """
+        Method loads results of checks from database written by the testing system alongside the test log.
+        :param results_file: name of database file;
+        :param last_row: identifier of the last row loaded before, only rows added after it are loaded.
+        :return: identifier of the last loaded row.
+        """
+
+        connection = sqlite3.connect(f"file:{results_file}?mode=ro", uri=True)
+        try:
+            rows = connection.execute("SELECT rowid, checked_at, source, missing_mask FROM checks WHERE rowid > ? "
+                                      "ORDER BY rowid", (last_row,))
+            for last_row, checked_at, source, missing_mask in rows:
+                if source in self.histories:
+                    self.histories[source].append(checked_at, ALL_SLOTS_MASK & ~missing_mask)
+        finally:
+            connection.close()
+        return last_row
+
+    def parse_line(self, line: str) -> bool:
+        """
+        :param line: line from log.
+        :return: True if line contains information about missing modules.
+        """
+
+        if LogEngine.MARKER not in line:
+            return False
+        result = LogEngine.PATTERN.match(line)
+        if not result:
+            return False
+        source = result.group(2)
+        missing_mask = self._get_missing_mask(source, result.group(4))
+        self.histories[source].append(self._timestamp_parser.parse(result.group(1)),
+                                      ALL_SLOTS_MASK & ~missing_mask)
+        return True
+
+    def parse_lines(self, lines: Iterable[str]) -> int:
+        """
+        :param lines: lines from log.
+        :return: number of lines with information about missing modules.
+        """
+
+        return sum(self.parse_line(line) for line in lines)
+
+    def get_time_range(self) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """
+        :return: time of the first and the last check from all sources.
+        """
+
+        times = [history.times for history in self.histories.values() if len(history)]
+        if not times:
+            return None
+        return min(t.min() for t in times), max(t.max() for t in times)
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+from typing import Dict, List
+import matplotlib.pyplot as plt
+import numpy as np
+from analyzer.engine import LogEngine, SLOT_NUMBER, SlotCounters, SOURCES
+
+
+class LogFollower:
+    """
+    Class follows log files while the test is running. At each refresh only the records added to the files since
+    the previous refresh are parsed, they are added to counters of checks and missing modules, and bar charts with
+    drop percentages by slots are updated. So the work at each refresh does not depend on the size of the logs.
+    """
+
+    FIRST_INDEXES: Dict[str, int] = {"SSH_DEV": 0}
+    TITLES: Dict[str, str] = {"UIOB": "Модули в админке",
+                              "SSH_DEV": "Модули по ssh (/dev)",
+                              "SSH_DEV_XIMC": "Модули по ssh (/dev/ximc)",
+                              "SSH_BEFORE": "Модули по ssh до usbreset"}
+
+    def __init__(self, log_files: List[str], refresh: float) -> None:
+        """
+        :param log_files: names of files with logs or databases with results;
+        :param refresh: time in seconds between refreshes.
+        """
+
+        self._bars = {}
+        self._counters: Dict[str, Dict[str, SlotCounters]] = {log_file: self._create_counters()
+                                                               for log_file in log_files}
+        self._figure = None
+        self._positions: Dict[str, int] = {log_file: 0 for log_file in log_files}
+        self._refresh: float = refresh
+
+    @staticmethod
+    def _create_counters() -> Dict[str, SlotCounters]:
+        return {source: SlotCounters() for source in SOURCES}
+
+    def _create_figure(self) -> None:
+        self._figure, axs = plt.subplots(2, 2)
+        for ax, source in zip(axs.flat, SOURCES):
+            first_index = LogFollower.FIRST_INDEXES.get(source, 1)
+            self._bars[source] = ax.bar(np.arange(first_index, first_index + SLOT_NUMBER), np.zeros(SLOT_NUMBER))
+            ax.set_xticks(np.arange(first_index, first_index + SLOT_NUMBER))
+            ax.set_ylabel("Отвалы, %")
+            ax.set_ylim([0, 100])
+            ax.set_title(LogFollower.TITLES[source])
+
+    def _get_total_counters(self) -> Dict[str, SlotCounters]:
+        total_counters = self._create_counters()
+        for counters in self._counters.values():
+            for source, source_counters in counters.items():
+                total_counters[source].merge(source_counters)
+        return total_counters
+
+    def _read_new_records(self) -> int:
+        """
+        :return: number of new checks read from all files.
+        """
+
+        number = 0
+        for log_file, position in self._positions.items():
+            if not os.path.exists(log_file):
+                continue
+            engine = LogEngine()
+            if log_file.endswith(LogEngine.RESULTS_EXTENSION):
+                self._positions[log_file] = engine.parse_results(log_file, position)
+            else:
+                if os.path.getsize(log_file) < position:
+                    logging.info("Log file '%s' was truncated, it will be read from the beginning", log_file)
+                    self._counters[log_file] = self._create_counters()
+                    position = 0
+                self._positions[log_file] = engine.parse_file(log_file, position)
+            for source, history in engine.histories.items():
+                self._counters[log_file][source].add(history)
+                number += len(history)
+        return number
+
+    def _show(self) -> None:
+        total_counters = self._get_total_counters()
+        for source, counters in total_counters.items():
+            if not counters.checks:
+                continue
+            percentages = counters.get_drop_percentages()
+            for bar, percentage in zip(self._bars[source], percentages):
+                bar.set_height(percentage)
+            bar_ax = self._bars[source][0].axes
+            bar_ax.set_ylim([0, max(1, float(np.nanmax(percentages)) * 1.1)])
+            bar_ax.set_title(f"{LogFollower.TITLES[source]} ({counters.checks} проверок)")
+        self._figure.canvas.draw_idle()
+
+        for log_file, counters in self._counters.items():
+            for source in SOURCES:
+                if counters[source].checks:
+                    first_index = LogFollower.FIRST_INDEXES.get(source, 1)
+                    missing_slots = [index + first_index for index in counters[source].get_missing_slots()]
+                    percentages = ", ".join(f"{percentage:.2f}"
+                                            for percentage in counters[source].get_drop_percentages())
+                    logging.info("[%s] %s: %d checks, missing now: %s, drop percentage by slots: %s",
+                                 os.path.basename(log_file), source, counters[source].checks, missing_slots,
+                                 percentages)
+
+    def run(self) -> None:
+        logging.info("Following log files (refresh every %s s), close the chart window or press Ctrl+C to stop",
+                     self._refresh)
+        plt.ion()
+        self._create_figure()
+        try:
+            while plt.fignum_exists(self._figure.number):
+                start_time = time.monotonic()
+                if self._read_new_records():
+                    self._show()
+                plt.pause(max(0.01, self._refresh - (time.monotonic() - start_time)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            plt.ioff()
@@ -0,0 +1,71 @@
+import base64
+import html
+import io
+import logging
+import os
+from typing import List, Sequence, Tuple
+import matplotlib.pyplot as plt
+
+
+class ReportWriter:
+    """
+    Class saves charts to files instead of showing them in a window, so charts can be built without a display. Each
+    chart is saved in the given image formats, and in the 'html' format all charts are collected in one page.
+    """
+
+    FORMATS: Tuple[str, ...] = ("html", "png", "svg")
+    HTML_FILE: str = "report.html"
+
+    def __init__(self, output_dir: str, formats: Sequence[str] = ("png",), title: str = "") -> None:
+        """
+        :param output_dir: directory where to save files;
+        :param formats: formats of files (may be 'png', 'svg' and 'html');
+        :param title: title of html page.
+        """
+
+        unknown_formats = set(formats).difference(ReportWriter.FORMATS)
+        if unknown_formats:
+            raise ValueError(f"Unknown report formats: {', '.join(sorted(unknown_formats))}")
+        self._formats: List[str] = list(formats)
+        self._output_dir: str = output_dir
+        self._sections: List[str] = []
+        self._title: str = title
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add_figure(self, figure: plt.Figure, name: str, caption: str = "") -> None:
+        """
+        :param figure: chart to be saved, it is closed after saving;
+        :param name: name of files without extension;
+        :param caption: caption of chart in html page.
+        """
+
+        for image_format in self._formats:
+            if image_format != "html":
+                file_name = os.path.join(self._output_dir, f"{name}.{image_format}")
+                figure.savefig(file_name, format=image_format, bbox_inches="tight")
+                logging.info("Chart saved to '%s'", file_name)
+        if "html" in self._formats:
+            buffer = io.BytesIO()
+            figure.savefig(buffer, format="png", bbox_inches="tight")
+            image = base64.b64encode(buffer.getvalue()).decode("ascii")
+            self._sections.append(f"<h2>{html.escape(caption or name)}</h2>\n"
+                                  f"<img src=\"data:image/png;base64,{image}\" alt=\"{html.escape(name)}\">")
+        plt.close(figure)
+
+    def add_text(self, text: str) -> None:
+        """
+        :param text: text to be added to html page as preformatted block.
+        """
+
+        self._sections.append(f"<pre>{html.escape(text)}</pre>")
+
+    def save(self) -> None:
+        if "html" not in self._formats:
+            return
+
+        file_name = os.path.join(self._output_dir, ReportWriter.HTML_FILE)
+        with open(file_name, "w", encoding="utf-8") as file:
+            file.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+                       f"<title>{html.escape(self._title)}</title>\n</head>\n<body>\n"
+                       f"<h1>{html.escape(self._title)}</h1>\n" + "\n".join(self._sections) + "\n</body>\n</html>\n")
+        logging.info("Report saved to '%s'", file_name)
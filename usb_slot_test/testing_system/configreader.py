@@ -1,6 +1,6 @@
 import ipaddress
 from configparser import ConfigParser
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class MissingOption(Exception):
@@ -29,8 +29,30 @@ class ConfigReader:
                           "STOP": {"converter": bool,
                                    "default": False}},
                  "ENERGENIE": {"HOST": {"converter": ipaddress.ip_address},
+                               "PORT": {"converter": int,
+                                        "default": 80},
                                "PASSWORD": {"converter": str},
-                               "SOCKET": {"converter": int}}}
+                               "SOCKET": {"converter": int},
+                               "BACKEND": {"converter": str,
+                                           "default": "selenium"}}}
+    EXTRA_STRUCTURE = {"BVVU": {"HOST": {"converter": ipaddress.ip_address},
+                                "SSH_PORT": {"converter": int},
+                                "USERNAME": {},
+                                "PASSWORD": {},
+                                "ENERGENIE": {"converter": str,
+                                              "default": "ENERGENIE"},
+                                "SOCKET": {"converter": int,
+                                           "default": None},
+                                "LOG_FILE": {"converter": str,
+                                             "default": None}},
+                       "ENERGENIE": {"HOST": {"converter": ipaddress.ip_address},
+                                     "PORT": {"converter": int,
+                                              "default": 80},
+                                     "PASSWORD": {"converter": str},
+                                     "SOCKET": {"converter": int,
+                                                "default": None},
+                                     "BACKEND": {"converter": str,
+                                                 "default": "selenium"}}}
 
     def __init__(self) -> None:
         self._errors: List[Exception] = []
@@ -40,26 +62,83 @@ class ConfigReader:
             return
 
         missing_options = {}
+        error_info = []
         for error in self._errors:
             if isinstance(error, MissingOption):
                 if error.section not in missing_options:
                     missing_options[error.section] = set()
                 missing_options[error.section].add(error.option)
-        error_info = []
+            else:
+                error_info.append(str(error))
         for section, options in missing_options.items():
             info = f"It was not possible to read the options in the section '{section}': {', '.join(options)}"
             error_info.append(info)
         raise ValueError("\n".join(error_info))
 
-    def _parse_section(self, parser: ConfigParser, section: str) -> Dict[str, Any]:
+    def _get_devices(self, parser: ConfigParser, data: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Method collects all BVVUs to be tested. The main BVVU is described by the sections 'BVVU' and 'ENERGENIE'.
+        Additional BVVUs are described by the sections 'BVVU <name>', they can be connected to additional surge
+        protectors described by the sections 'ENERGENIE <name>'.
+        :param parser: config parser;
+        :param data: data from the main sections of the configuration file.
+        :return: list with data for each BVVU: options of BVVU, name of section with surge protector, socket number
+        and name of file for logs.
+        """
+
+        power_managers = {"ENERGENIE": data["ENERGENIE"]}
+        for section in parser.sections():
+            if section.startswith("ENERGENIE "):
+                structure = ConfigReader.EXTRA_STRUCTURE["ENERGENIE"]
+                power_managers[section] = self._parse_section(parser, section, structure)
+
+        devices = [{"BVVU": data["BVVU"],
+                    "ENERGENIE": "ENERGENIE",
+                    "SOCKET": data["ENERGENIE"]["SOCKET"],
+                    "LOG_FILE": data["TEST"]["LOG_FILE"]}]
+        for section in parser.sections():
+            if not section.startswith("BVVU "):
+                continue
+
+            device_data = self._parse_section(parser, section, ConfigReader.EXTRA_STRUCTURE["BVVU"])
+            power_manager = power_managers.get(device_data["ENERGENIE"])
+            if power_manager is None:
+                self._errors.append(ValueError(f"Section '{device_data['ENERGENIE']}' for BVVU from section "
+                                               f"'{section}' was not found"))
+                continue
+
+            socket = device_data["SOCKET"] if device_data["SOCKET"] is not None else power_manager["SOCKET"]
+            if socket is None:
+                self._errors.append(MissingOption(section, "SOCKET"))
+            devices.append({"BVVU": device_data,
+                            "ENERGENIE": device_data["ENERGENIE"],
+                            "SOCKET": socket,
+                            "LOG_FILE": device_data["LOG_FILE"]})
+
+        used_sockets = set()
+        for device in devices:
+            power_manager = power_managers[device["ENERGENIE"]]
+            key = (str(power_manager["HOST"]), power_manager["PORT"], device["SOCKET"])
+            if key in used_sockets:
+                self._errors.append(ValueError(f"Socket {device['SOCKET']} of EnerGenie {key[0]} is used for several "
+                                               f"BVVUs"))
+            used_sockets.add(key)
+        data["ENERGENIES"] = power_managers
+        return devices
+
+    def _parse_section(self, parser: ConfigParser, section: str,
+                       structure: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         :param parser: config parser;
-        :param section: section from which options need to be parsed.
+        :param section: section from which options need to be parsed;
+        :param structure: structure of section. By default structure from STRUCTURE is used.
         :return: dictionary with option values ​​from a given section.
         """
 
+        if structure is None:
+            structure = ConfigReader.STRUCTURE[section]
         data = {}
-        for item_name, item_data in ConfigReader.STRUCTURE[section].items():
+        for item_name, item_data in structure.items():
             try:
                 converter = item_data.get("converter", str)
                 if converter == int:
@@ -88,5 +167,6 @@ class ConfigReader:
         parser = ConfigParser()
         parser.read(config_path)
         data = {section: self._parse_section(parser, section) for section in ConfigReader.STRUCTURE}
+        data["DEVICES"] = self._get_devices(parser, data)
         self._check_errors()
         return data
@@ -1,6 +1,8 @@
 import logging
+import threading
 import time
 from enum import auto, Enum
+from typing import Optional
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
@@ -15,7 +17,8 @@ class Page(Enum):
 
 class EnerGenie:
     """
-    Class for remote power management of the EnerGenie surge protector.
+    Class for remote power management of the EnerGenie surge protector. One object can be shared between several
+    tests that control different sockets of the same surge protector.
     """
 
     ON_OFF_BUTTON: str = "onoffbtn"
@@ -23,18 +26,20 @@ class EnerGenie:
     SOCKET_ID: str = "stCont{}"
     TIMEOUT: float = 10
 
-    def __init__(self, ip_address: str, password: str, socket_number: int) -> None:
+    def __init__(self, ip_address: str, password: str, socket_number: int, port: int = 80) -> None:
         """
         :param ip_address: IP address of EnerGenie surge protector;
         :param password: password to connect to the surge protector through LAN;
-        :param socket_number: surge protector socket number to be controlled (a number from 1 to 4).
+        :param socket_number: surge protector socket number to be controlled (a number from 1 to 4);
+        :param port: port of the LAN web interface of the surge protector.
         """
 
         self._driver: webdriver.Chrome = None
         self._ip_address: str = ip_address
+        self._lock: threading.Lock = threading.Lock()
         self._password: str = password
-        if not isinstance(socket_number, int) or socket_number < 1 or socket_number > 4:
-            raise ValueError("The socket number must be an integer between 1 and 4 inclusive")
+        self._port: int = port
+        self._check_socket_number(socket_number)
         self._socket: int = socket_number
         self._socket_number: str = EnerGenie.SOCKET_ID.format(socket_number - 1)
 
@@ -44,7 +49,16 @@ class EnerGenie:
         :return: EnerGenie page address.
         """
 
-        return f"http://{self._ip_address}"
+        return f"http://{self._ip_address}:{self._port}"
+
+    @staticmethod
+    def _check_socket_number(socket_number: int) -> None:
+        """
+        :param socket_number: surge protector socket number.
+        """
+
+        if not isinstance(socket_number, int) or socket_number < 1 or socket_number > 4:
+            raise ValueError("The socket number must be an integer between 1 and 4 inclusive")
 
     def _check_logged_in(self) -> None:
         start_time = time.monotonic()
@@ -93,14 +107,20 @@ class EnerGenie:
             raise ConnectionError("Failed to load power management page")
         logging.info("EnerGenie power management page loaded %s, socket = %d", self.url, self._socket)
 
-    def turn_on_or_off_power(self, turn_on: bool) -> None:
+    def turn_on_or_off_power(self, turn_on: bool, socket_number: Optional[int] = None) -> None:
         """
-        :param turn_on: if True, the power will be turned on.
+        :param turn_on: if True, the power will be turned on;
+        :param socket_number: surge protector socket number to be controlled. By default the socket given at
+        creation is used.
         """
 
-        socket_element = self._driver.find_element(By.ID, self._socket_number)
-        on_off_button = socket_element.find_element(By.CLASS_NAME, EnerGenie.ON_OFF_BUTTON)
-        button_function = on_off_button.text.lower()
-        if (button_function == "on" and turn_on) or (button_function == "off" and not turn_on):
-            on_off_button.click()
-            logging.info("Power turned %s", button_function)
+        if socket_number is None:
+            socket_number = self._socket
+        self._check_socket_number(socket_number)
+        with self._lock:
+            socket_element = self._driver.find_element(By.ID, EnerGenie.SOCKET_ID.format(socket_number - 1))
+            on_off_button = socket_element.find_element(By.CLASS_NAME, EnerGenie.ON_OFF_BUTTON)
+            button_function = on_off_button.text.lower()
+            if (button_function == "on" and turn_on) or (button_function == "off" and not turn_on):
+                on_off_button.click()
+                logging.info("Power turned %s, socket = %d", button_function, socket_number)
@@ -0,0 +1,137 @@
+import http.client
+import logging
+import re
+import threading
+from typing import List, Optional
+from urllib.parse import urlencode
+
+
+class EnerGenieHttp:
+    """
+    Class for remote power management of the EnerGenie surge protector. Unlike EnerGenie class, it does not start
+    a browser, but sends requests to the LAN web interface of the surge protector directly over one HTTP connection.
+    """
+
+    CONTROL_PAGE: str = "/"
+    LOGIN_PAGE: str = "/login.html"
+    PASSWORD_NAME: str = "pw"
+    SOCKET_COMMAND: str = "cte{}"
+    SOCKET_STATES = re.compile(r"sockstates\s*=\s*\[([\d,\s]*)\]")
+    TIMEOUT: float = 10
+
+    def __init__(self, ip_address: str, password: str, socket_number: int, port: int = 80) -> None:
+        """
+        :param ip_address: IP address of EnerGenie surge protector;
+        :param password: password to connect to the surge protector through LAN;
+        :param socket_number: surge protector socket number to be controlled (a number from 1 to 4);
+        :param port: port of the LAN web interface of the surge protector.
+        """
+
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._ip_address: str = ip_address
+        self._lock: threading.Lock = threading.Lock()
+        self._password: str = password
+        self._port: int = port
+        self._check_socket_number(socket_number)
+        self._socket: int = socket_number
+        self._states: List[bool] = []
+
+    @property
+    def url(self) -> str:
+        """
+        :return: EnerGenie page address.
+        """
+
+        return f"http://{self._ip_address}:{self._port}"
+
+    @staticmethod
+    def _check_socket_number(socket_number: int) -> None:
+        """
+        :param socket_number: surge protector socket number.
+        """
+
+        if not isinstance(socket_number, int) or socket_number < 1 or socket_number > 4:
+            raise ValueError("The socket number must be an integer between 1 and 4 inclusive")
+
+    @staticmethod
+    def _get_states(page: str) -> Optional[List[bool]]:
+        """
+        :param page: text of the control page.
+        :return: list with power states of sockets or None if page is not a control page.
+        """
+
+        result = EnerGenieHttp.SOCKET_STATES.search(page)
+        if result is None:
+            return None
+        return [state.strip() == "1" for state in result.group(1).split(",") if state.strip()]
+
+    def _login(self) -> None:
+        page = self._request("POST", EnerGenieHttp.LOGIN_PAGE, {EnerGenieHttp.PASSWORD_NAME: self._password})
+        states = self._get_states(page)
+        if states is None:
+            raise RuntimeError("Failed to login")
+        self._states = states
+
+    def _request(self, method: str, path: str, data: Optional[dict] = None) -> str:
+        """
+        :param method: HTTP method;
+        :param path: page address;
+        :param data: form data to be sent.
+        :return: text of the received page.
+        """
+
+        body = urlencode(data) if data is not None else None
+        headers = {"Content-Type": "application/x-www-form-urlencoded"} if data is not None else {}
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self._ip_address, self._port,
+                                                              timeout=EnerGenieHttp.TIMEOUT)
+            try:
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                return response.read().decode("utf-8", errors="replace")
+            except (http.client.HTTPException, OSError):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+
+    def close_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                self._request("GET", EnerGenieHttp.LOGIN_PAGE)
+            finally:
+                self._connection.close()
+                self._connection = None
+        logging.info("Page closed")
+
+    def connect(self) -> None:
+        try:
+            self._login()
+        except (http.client.HTTPException, OSError) as exc:
+            raise ConnectionError("Failed to load power management page") from exc
+        logging.info("EnerGenie power management page loaded %s, socket = %d", self.url, self._socket)
+
+    def turn_on_or_off_power(self, turn_on: bool, socket_number: Optional[int] = None) -> None:
+        """
+        :param turn_on: if True, the power will be turned on;
+        :param socket_number: surge protector socket number to be controlled. By default the socket given at
+        creation is used.
+        """
+
+        if socket_number is None:
+            socket_number = self._socket
+        self._check_socket_number(socket_number)
+        with self._lock:
+            command = {EnerGenieHttp.SOCKET_COMMAND.format(socket_number): int(turn_on)}
+            page = self._request("POST", EnerGenieHttp.CONTROL_PAGE, command)
+            states = self._get_states(page)
+            if states is None:
+                logging.info("EnerGenie session expired, logging in again")
+                self._login()
+                page = self._request("POST", EnerGenieHttp.CONTROL_PAGE, command)
+                states = self._get_states(page)
+                if states is None:
+                    raise RuntimeError("Failed to control power of EnerGenie socket")
+            self._states = states
+            logging.info("Power turned %s, socket = %d", "on" if turn_on else "off", socket_number)
@@ -1,14 +1,136 @@
 import logging
+import os
+import threading
+import time
+import zlib
+from typing import List, Optional
+from analyzer.compression import get_compression
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
-def add_file_handler(file_path: str) -> None:
+class ThreadFilter(logging.Filter):
     """
-    :param file_path: path to the file where to save logs.
+    Filter passes only records made in the thread with the given name.
+    """
+
+    def __init__(self, thread_name: str) -> None:
+        """
+        :param thread_name: name of thread whose records are passed.
+        """
+
+        super().__init__()
+        self._thread_name: str = thread_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName == self._thread_name
+
+
+class CompressedFileHandler(logging.Handler):
+    """
+    Handler saves records to compressed file. Records are collected in buffer and appended to the file as independent
+    compressed frames (gzip members or zstd frames): when the buffer exceeds FRAME_SIZE, when FLUSH_INTERVAL seconds
+    have passed since the previous frame (it is checked by a background thread, so records reach the file even if
+    nothing is logged for a long time), and when the handler is flushed or closed. Each frame consists of whole lines,
+    so the analyzer can read the file while the test is running and continue from the end of the last frame.
+    """
+
+    FLUSH_INTERVAL: float = 10
+    FRAME_SIZE: int = 256 * 1024
+
+    def __init__(self, file_path: str) -> None:
+        """
+        :param file_path: path to the file where to save logs, compression method is determined by the extension.
+        """
+
+        super().__init__()
+        compression = get_compression(file_path)
+        if compression is None:
+            raise ValueError(f"Unknown compression method for file '{file_path}'")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstandard package is required for zstd compression")
+
+        self._buffer: List[bytes] = []
+        self._buffer_size: int = 0
+        self._compression: str = compression
+        self._file_path: str = os.path.abspath(file_path)
+        self._frame_time: float = time.monotonic()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._thread.start()
+
+    def _flush_periodically(self) -> None:
+        """
+        Method writes buffered records to the file when FLUSH_INTERVAL seconds have passed since the previous frame.
+        """
+
+        timeout = CompressedFileHandler.FLUSH_INTERVAL
+        while not self._stop_event.wait(timeout):
+            self.acquire()
+            try:
+                timeout = self._frame_time + CompressedFileHandler.FLUSH_INTERVAL - time.monotonic()
+                if timeout <= 0:
+                    timeout = CompressedFileHandler.FLUSH_INTERVAL
+                    self._write_frame()
+            except OSError:
+                # Records of the frame are lost, but the next frames can still be written
+                pass
+            finally:
+                self.release()
+
+    def _write_frame(self) -> None:
+        self._frame_time = time.monotonic()
+        if not self._buffer:
+            return
+
+        data = b"".join(self._buffer)
+        self._buffer = []
+        self._buffer_size = 0
+        compressor = zstandard.ZstdCompressor().compressobj() if self._compression == "zstd" else \
+            zlib.compressobj(wbits=31)
+        with open(self._file_path, "ab") as file:
+            file.write(compressor.compress(data) + compressor.flush())
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+        self.flush()
+        super().close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+            self._buffer.append(line)
+            self._buffer_size += len(line)
+            if self._buffer_size >= CompressedFileHandler.FRAME_SIZE:
+                self._write_frame()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._write_frame()
+        finally:
+            self.release()
+
+
+def add_file_handler(file_path: str, thread_name: Optional[str] = None) -> None:
+    """
+    :param file_path: path to the file where to save logs;
+    :param thread_name: if given, only records made in the thread with this name will be saved to the file.
     """
 
     logging.info("Logs will be saved to a file '%s'", file_path)
-    file_handler = logging.FileHandler(file_path)
+    if get_compression(file_path) is not None:
+        file_handler = CompressedFileHandler(file_path)
+    else:
+        file_handler = logging.FileHandler(file_path)
     file_handler.setLevel(logging.INFO)
+    if thread_name is not None:
+        file_handler.addFilter(ThreadFilter(thread_name))
     formatter = logging.Formatter(fmt="[%(asctime)s %(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
     file_handler.setFormatter(formatter)
     logger = logging.getLogger()
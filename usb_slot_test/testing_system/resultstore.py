@@ -0,0 +1,78 @@
+import calendar
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Union
+
+
+class ResultStore:
+    """
+    Class stores typed results of slot checks in SQLite database next to the test log. One row is written for each
+    source of information about modules in each test iteration, so the analyzer does not need to parse the log.
+    """
+
+    EXTENSION: str = ".sqlite"
+    SLOT_NUMBER: int = 16
+    TTY_PATTERN = re.compile(r"^ttyACM(?P<index>\d+)$")
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: path to database file.
+        """
+
+        self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock: threading.Lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS checks (host TEXT, iteration INTEGER, "
+                                     "checked_at INTEGER, source TEXT, missing TEXT, missing_mask INTEGER)")
+
+    @staticmethod
+    def get_path(log_file: str) -> str:
+        """
+        :param log_file: name of file with test logs.
+        :return: name of database file for the log file.
+        """
+
+        return os.path.splitext(log_file)[0] + ResultStore.EXTENSION
+
+    @staticmethod
+    def get_missing_mask(source: str, modules: Iterable[Union[int, str]]) -> int:
+        """
+        :param source: source of information about modules;
+        :param modules: missing modules (slot numbers starting from 1, names of ttyACM devices for source SSH_DEV or
+        serial numbers of XIMC devices).
+        :return: mask of slots in which modules were missing.
+        """
+
+        mask = 0
+        for module in modules:
+            if source == "SSH_DEV":
+                result = ResultStore.TTY_PATTERN.match(str(module))
+                index = int(result["index"]) if result else None
+            else:
+                index = int(module) - 1
+            if index is not None and 0 <= index < ResultStore.SLOT_NUMBER:
+                mask |= 1 << index
+        return mask
+
+    def add_check(self, host: str, iteration: int, source: str, modules: Iterable[Union[int, str]]) -> None:
+        """
+        :param host: IP address of BVVU;
+        :param iteration: test iteration number;
+        :param source: source of information about modules;
+        :param modules: missing modules.
+        """
+
+        modules = list(modules)
+        # Time is stored as number of seconds of local time, as it is written to the test log
+        checked_at = calendar.timegm(datetime.now().timetuple())
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?)",
+                                     (host, iteration, checked_at, source, ", ".join(map(str, modules)),
+                                      self.get_missing_mask(source, modules)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
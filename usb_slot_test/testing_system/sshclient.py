@@ -1,6 +1,7 @@
 import logging
 import re
-from typing import Optional, Set
+import time
+from typing import Dict, List, Optional, Set
 from paramiko import AutoAddPolicy, SSHClient
 
 
@@ -8,6 +9,11 @@ class SshClient:
 
     FILE_BEFORE_USBRESET: str = "/home/before_usbreset.txt"
     FILE_CUBIELORD_STATUS: str = "/home/cubielord_status.txt"
+    PROBE_MARKER: str = "@@@PROBE"
+    PROBES: Dict[str, str] = {"STATUS": f"cat {FILE_CUBIELORD_STATUS}",
+                              "SSH_BEFORE": f"cat {FILE_BEFORE_USBRESET}",
+                              "SSH_DEV": "ls /dev | grep ttyACM",
+                              "SSH_DEV_XIMC": "ls /dev/ximc"}
     SLOT_NUMBER: int = 16
 
     def __init__(self, host: str, port: int, username: str, password: str) -> None:
@@ -19,6 +25,7 @@ class SshClient:
         """
 
         self._host: str = host
+        self._missing_modules: Dict[str, List[str]] = {}
         self._password: str = password
         self._port: int = port
         self._ssh: SSHClient = SSHClient()
@@ -26,8 +33,15 @@ class SshClient:
         self._ssh.set_missing_host_key_policy(AutoAddPolicy())
         self._username: str = username
 
-    @staticmethod
-    def _check_missing(modules: Set[str], required_modules: Set[str], label: str) -> bool:
+    @property
+    def missing_modules(self) -> Dict[str, List[str]]:
+        """
+        :return: dictionary with missing modules found by the last check for each source.
+        """
+
+        return self._missing_modules
+
+    def _check_missing(self, modules: Set[str], required_modules: Set[str], label: str) -> bool:
         """
         :param modules: set of modules found on the system in the /dev directory;
         :param required_modules:
@@ -36,11 +50,25 @@ class SshClient:
         """
 
         missing_modules = sorted(required_modules.difference(modules))
+        self._missing_modules[label] = missing_modules
         missing_module_number = len(missing_modules)
         logging.info("[%s] Number of missing modules: %d, missing modules: %s", label, missing_module_number,
                      missing_modules)
         return len(missing_modules) != 0
 
+    @staticmethod
+    def _get_batch_command() -> str:
+        """
+        :return: command that runs all probes in one remote invocation. Output of each probe is preceded by a marker
+        line with probe name and time in nanoseconds. The marker starts with a line break, so that it is on its own
+        line even if output of the previous probe does not end with a line break.
+        """
+
+        marker = f"printf '\\n{SshClient.PROBE_MARKER} %s %s\\n' {{}} \"$(date +%s%N)\""
+        parts = [f"{marker.format(name)}; {command} 2>&1" for name, command in SshClient.PROBES.items()]
+        parts.append(marker.format("END"))
+        return "; ".join(parts)
+
     @staticmethod
     def _get_modules_from_command_output(command_output: str) -> Set[str]:
         """
@@ -74,6 +102,34 @@ class SshClient:
         logging.warning("'%s' file is not written correctly", SshClient.FILE_BEFORE_USBRESET)
         return None
 
+    @staticmethod
+    def _parse_batch_output(output: str) -> Dict[str, str]:
+        """
+        :param output: output of batch command.
+        :return: dictionary with output of each probe. Empty line before each marker is added by the batch command
+        and is not included in output of probe.
+        """
+
+        pattern = re.compile(rf"^{SshClient.PROBE_MARKER} (?P<name>\w+) (?P<time>\S*)$")
+        sections = {}
+        times = []
+        name = None
+        for line in output.replace("\r", "").split("\n"):
+            result = pattern.match(line)
+            if result:
+                if name is not None and sections[name] and not sections[name][-1]:
+                    sections[name].pop()
+                name = result["name"]
+                sections[name] = []
+                times.append((name, result["time"]))
+            elif name is not None:
+                sections[name].append(line)
+
+        for (name, start), (_, end) in zip(times, times[1:]):
+            if start.isdigit() and end.isdigit():
+                logging.info("[SSH] Probe '%s' took %.3f s", name, (int(end) - int(start)) / 1e9)
+        return {name: "\n".join(lines) for name, lines in sections.items() if name != "END"}
+
     @staticmethod
     def _get_reboot_number(line: str) -> Optional[int]:
         """
@@ -116,22 +172,26 @@ class SshClient:
         :return: True if there are missing modules in /dev or /dev/ximc.
         """
 
-        command_output = self.exec_command(f"cat {SshClient.FILE_CUBIELORD_STATUS}")
-        self._get_status_from_file(command_output)
+        self._missing_modules = {}
+        start_time = time.monotonic()
+        outputs = self._parse_batch_output(self.exec_command(self._get_batch_command(), get_pty=False))
+        logging.info("[SSH] All probes done in one request in %.3f s", time.monotonic() - start_time)
+        missing_probes = [name for name in SshClient.PROBES if name not in outputs]
+        if missing_probes:
+            logging.warning("[SSH] No output for probes: %s", ", ".join(missing_probes))
+
+        self._get_status_from_file(outputs.get("STATUS", ""))
 
-        command_output = self.exec_command(f"cat {SshClient.FILE_BEFORE_USBRESET}")
-        modules = self._get_modules_from_file(command_output)
+        modules = self._get_modules_from_file(outputs.get("SSH_BEFORE", ""))
         if modules is not None:
             required_modules = {f"{i:0>8}" for i in range(1, SshClient.SLOT_NUMBER + 1)}
             self._check_missing(modules, required_modules, "SSH_BEFORE")
 
-        command_output = self.exec_command("ls /dev | grep ttyACM")
-        modules = self._get_modules_from_command_output(command_output)
+        modules = self._get_modules_from_command_output(outputs.get("SSH_DEV", ""))
         required_modules = {f"ttyACM{i}" for i in range(SshClient.SLOT_NUMBER)}
         result_dev = self._check_missing(modules, required_modules, "SSH_DEV")
 
-        command_output = self.exec_command("ls /dev/ximc")
-        modules = self._get_modules_from_command_output(command_output)
+        modules = self._get_modules_from_command_output(outputs.get("SSH_DEV_XIMC", ""))
         required_modules = {f"{i:0>8}" for i in range(1, SshClient.SLOT_NUMBER + 1)}
         result_dev_ximc = self._check_missing(modules, required_modules, "SSH_DEV_XIMC")
         return result_dev or result_dev_ximc
@@ -139,15 +199,18 @@ class SshClient:
     def connect(self) -> None:
         self._ssh.connect(self._host, self._port, self._username, self._password)
 
-    def exec_command(self, command: str, sudo: bool = False) -> str:
+    def exec_command(self, command: str, sudo: bool = False, get_pty: bool = True) -> str:
         """
         :param command: command to be executed over ssh;
         :param sudo:
+        :param get_pty: if True, pseudo-terminal is requested for the command.
         :return: string command output.
         """
 
-        stdin, stdout, _ = self._ssh.exec_command(command, get_pty=True)
+        stdin, stdout, _ = self._ssh.exec_command(command, get_pty=get_pty)
         if sudo:
             stdin.write(self._password + "\n")
             stdin.flush()
+        if not get_pty:
+            return stdout.read().decode("utf-8", errors="replace")
         return "".join(iter(stdout.readline, ""))
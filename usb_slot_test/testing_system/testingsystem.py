@@ -1,11 +1,19 @@
 import argparse
 import logging
+import os
 import sys
+import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
 from testing_system.configreader import ConfigReader
 from testing_system.energenie import EnerGenie
+from testing_system.energeniehttp import EnerGenieHttp
+from analyzer.compression import get_compression
 from testing_system.logger import add_file_handler
+from testing_system.metrics import MetricsServer, PhaseMetrics
+from testing_system.rebootwaiter import RebootWaiter
+from testing_system.resultstore import ResultStore
 from testing_system.sshclient import SshClient
 from testing_system.uiob import NewUiob
 
@@ -14,6 +22,9 @@ class StopTestException(Exception):
     pass
 
 
+PowerManager = Union[EnerGenie, EnerGenieHttp]
+
+
 class TestingSystem:
     """
     Class for testing blades of USB hubs for slots.
@@ -21,65 +32,91 @@ class TestingSystem:
 
     WAITING_TIME: int = 30
 
-    def __init__(self, bvvu_host: str, ssh_port: int, ssh_username: str, ssh_password: str, energenie_host: str,
-                 energenie_password: str, energenie_socket: int, reboot_number: int, stop_if_fail: bool) -> None:
+    def __init__(self, bvvu_host: str, ssh_port: int, ssh_username: str, ssh_password: str, power_manager: PowerManager,
+                 energenie_socket: int, reboot_number: int, stop_if_fail: bool, result_file: Optional[str] = None,
+                 metrics_file: Optional[str] = None) -> None:
         """
         :param bvvu_host: IP address of the tested BVVU;
         :param ssh_port: port for connecting to BVVU via ssh;
         :param ssh_username: user login under which to connect to the BVVU via ssh;
         :param ssh_password: password for connecting to BVU via ssh;
-        :param energenie_host: IP address of EnerGenie surge protector;
-        :param energenie_password: password to connect to the surge protector through LAN;
+        :param power_manager: connected EnerGenie surge protector, it may be shared with other testing systems;
         :param energenie_socket: surge protector socket number to be controlled (a number from 1 to 4);
         :param reboot_number: number of required BVVU reboots;
-        :param stop_if_fail: True if testing needs to be stopped when a module fails.
+        :param stop_if_fail: True if testing needs to be stopped when a module fails;
+        :param result_file: name of database file where to save results of checks;
+        :param metrics_file: name of JSON lines file where to save durations of iteration phases.
         """
 
         self._device: NewUiob = NewUiob(bvvu_host)
-        self._power_manager: EnerGenie = EnerGenie(energenie_host, energenie_password, energenie_socket)
+        self._host: str = bvvu_host
+        self._metrics: PhaseMetrics = PhaseMetrics(bvvu_host, metrics_file)
+        self._power_manager: PowerManager = power_manager
         self._reboot_number: int = reboot_number
+        self._result_file: Optional[str] = result_file
+        self._reboot_waiter: RebootWaiter = RebootWaiter(bvvu_host, ssh_port, self._device.check_alive,
+                                                         60 * TestingSystem.WAITING_TIME)
+        self._socket: int = energenie_socket
         self._ssh_client: SshClient = SshClient(bvvu_host, ssh_port, ssh_username, ssh_password)
         self._stop_if_fail: bool = stop_if_fail
 
-    def _do_test(self, reboot: bool = True) -> None:
+    @property
+    def metrics(self) -> PhaseMetrics:
         """
-        :param reboot: if True, then it is required to turn off and turn on the power of the BVVU.
+        :return: durations of iteration phases.
         """
 
-        uiob_result = self._device.check_slots()
-        self._ssh_client.connect()
-        ssh_result = self._ssh_client.check_modules()
-        if self._stop_if_fail and (uiob_result or ssh_result):
-            raise StopTestException()
+        return self._metrics
+
+    def _do_test(self, results: Optional[ResultStore], test_index: int, reboot: bool = True) -> None:
+        """
+        :param results: database where to save results of checks;
+        :param test_index: test iteration number;
+        :param reboot: if True, then it is required to turn off and turn on the power of the BVVU.
+        """
 
-        if reboot:
-            self._power_manager.turn_on_or_off_power(False)
-            time.sleep(1)
-            self._power_manager.turn_on_or_off_power(True)
-            self._wait_for_reboot()
+        timer = self._metrics.start_iteration(test_index)
+        try:
+            with timer.measure("slot_check"):
+                uiob_result = self._device.check_slots()
+            with timer.measure("ssh_connect"):
+                self._ssh_client.connect()
+            with timer.measure("ssh_probes"):
+                ssh_result = self._ssh_client.check_modules()
+            if results is not None:
+                with timer.measure("save_results"):
+                    results.add_check(self._host, test_index, "UIOB", self._device.missing_modules)
+                    for source, missing_modules in self._ssh_client.missing_modules.items():
+                        results.add_check(self._host, test_index, source, missing_modules)
+            if self._stop_if_fail and (uiob_result or ssh_result):
+                raise StopTestException()
+
+            if reboot:
+                with timer.measure("power_toggle"):
+                    self._power_manager.turn_on_or_off_power(False, self._socket)
+                    time.sleep(1)
+                    self._power_manager.turn_on_or_off_power(True, self._socket)
+                with timer.measure("reboot_wait"):
+                    self._wait_for_reboot()
+        finally:
+            timer.finish()
 
     def _wait_for_reboot(self) -> None:
-        waiting_start_time = datetime.now()
-        while not self._device.check_alive():
-            if datetime.now() - waiting_start_time > timedelta(minutes=TestingSystem.WAITING_TIME):
-                raise TimeoutError(f"BVVU did not reboot within the maximum wait time {TestingSystem.WAITING_TIME} min."
-                                   f" Something went wrong. Tests will be completed")
-            time.sleep(10)
-
-    def run_tests(self) -> None:
         try:
-            self._power_manager.connect()
-        except Exception as exc:
-            logging.error("Failed to connect to EnerGenie", exc_info=exc)
-            return
+            self._reboot_waiter.wait()
+        except TimeoutError as exc:
+            raise TimeoutError(f"BVVU did not reboot within the maximum wait time {TestingSystem.WAITING_TIME} min. "
+                               f"Something went wrong. Tests will be completed") from exc
 
+    def run_tests(self) -> None:
         info = "stop when module is lost" if self._stop_if_fail else "testing will not stop if the module is lost"
         logging.info("Testing information: %d reboots, %s", self._reboot_number, info)
+        results = ResultStore(self._result_file) if self._result_file else None
         test_index = 1
         while test_index <= self._reboot_number:
             try:
                 logging.info("Test #%d", test_index)
-                self._do_test(test_index < self._reboot_number)
+                self._do_test(results, test_index, test_index < self._reboot_number)
                 test_index += 1
             except StopTestException:
                 logging.error("Test stopped")
@@ -87,12 +124,64 @@ class TestingSystem:
             except Exception as exc:
                 logging.error("An error occurred while running tests", exc_info=exc)
                 break
-        self._power_manager.close_connection()
+        if results is not None:
+            results.close()
+        for phase, duration in self._reboot_waiter.get_summary().items():
+            logging.info("Reboot phase '%s': mean %.1f s, min %.1f s, max %.1f s", phase, duration["mean"],
+                         duration["min"], duration["max"])
+        self._metrics.log_summary()
+
+
+def _create_power_manager(energenie_data: Dict[str, Any], socket: int) -> PowerManager:
+    """
+    :param energenie_data: data for EnerGenie surge protector from the configuration file;
+    :param socket: default socket number of surge protector.
+    :return: object to control the surge protector with the backend given in the configuration file.
+    """
+
+    backends = {"http": EnerGenieHttp,
+                "selenium": EnerGenie}
+    backend = backends.get(energenie_data["BACKEND"].lower())
+    if backend is None:
+        raise ValueError(f"Unknown EnerGenie backend '{energenie_data['BACKEND']}', available backends: "
+                         f"{', '.join(backends)}")
+    return backend(str(energenie_data["HOST"]), energenie_data["PASSWORD"], socket, energenie_data["PORT"])
+
+
+def _get_log_file(device: Dict[str, Any], default_log_file: str) -> str:
+    """
+    :param device: data for BVVU from the configuration file;
+    :param default_log_file: name of file for logs from the section 'TEST'.
+    :return: name of file for logs of the BVVU.
+    """
+
+    if device["LOG_FILE"]:
+        return device["LOG_FILE"]
+    root, ext = os.path.splitext(default_log_file)
+    if get_compression(default_log_file) is not None:
+        root, text_ext = os.path.splitext(root)
+        ext = text_ext + ext
+    return f"{root}_{device['BVVU']['HOST']}{ext}"
+
+
+def _run_device_tests(testing_system: TestingSystem, host: str) -> None:
+    """
+    :param testing_system: testing system for BVVU;
+    :param host: IP address of BVVU, it is used as thread name to separate logs of different BVVUs.
+    """
+
+    threading.current_thread().name = host
+    try:
+        testing_system.run_tests()
+    except Exception as exc:
+        logging.error("Testing of BVVU %s failed", host, exc_info=exc)
 
 
 def run_tests() -> None:
     parser = argparse.ArgumentParser("Script performs a multiple power off of BVVU and gets slot information")
     parser.add_argument("--config", type=str, default="config.ini", help="Configuration file")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="Port of local HTTP endpoint with metrics in Prometheus text format")
     args = parser.parse_args(sys.argv[1:])
     reader = ConfigReader()
     try:
@@ -101,20 +190,56 @@ def run_tests() -> None:
         logging.error("Failed to read configuration file '%s'.\n%s", args.config, exc)
         return
 
-    bvvu_host = str(data["BVVU"]["HOST"])
-    ssh_port = data["BVVU"]["SSH_PORT"]
-    ssh_username = data["BVVU"]["USERNAME"]
-    ssh_password = data["BVVU"]["PASSWORD"]
-
-    energenie_host = str(data["ENERGENIE"]["HOST"])
-    energenie_password = data["ENERGENIE"]["PASSWORD"]
-    energenie_socket = data["ENERGENIE"]["SOCKET"]
-
-    log_file = data["TEST"]["LOG_FILE"]
+    devices: List[Dict[str, Any]] = data["DEVICES"]
     reboots = data["TEST"]["REBOOTS"]
     stop = data["TEST"]["STOP"]
 
-    add_file_handler(log_file)
-    testing_system = TestingSystem(bvvu_host, ssh_port, ssh_username, ssh_password, energenie_host, energenie_password,
-                                   energenie_socket, reboots, stop)
-    testing_system.run_tests()
+    power_managers: Dict[str, PowerManager] = {}
+    try:
+        for device in devices:
+            if device["ENERGENIE"] not in power_managers:
+                power_managers[device["ENERGENIE"]] = _create_power_manager(data["ENERGENIES"][device["ENERGENIE"]],
+                                                                            device["SOCKET"])
+        for power_manager in power_managers.values():
+            power_manager.connect()
+    except Exception as exc:
+        logging.error("Failed to connect to EnerGenie", exc_info=exc)
+        return
+
+    testing_systems = {}
+    for device in devices:
+        bvvu_host = str(device["BVVU"]["HOST"])
+        if len(devices) == 1:
+            log_file = device["LOG_FILE"]
+            add_file_handler(log_file)
+        else:
+            log_file = _get_log_file(device, data["TEST"]["LOG_FILE"])
+            add_file_handler(log_file, bvvu_host)
+        testing_systems[bvvu_host] = TestingSystem(bvvu_host, device["BVVU"]["SSH_PORT"], device["BVVU"]["USERNAME"],
+                                                   device["BVVU"]["PASSWORD"], power_managers[device["ENERGENIE"]],
+                                                   device["SOCKET"], reboots, stop, ResultStore.get_path(log_file),
+                                                   PhaseMetrics.get_path(log_file))
+
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(args.metrics_port)
+        for testing_system in testing_systems.values():
+            metrics_server.add(testing_system.metrics)
+        metrics_server.start()
+
+    if len(testing_systems) == 1:
+        next(iter(testing_systems.values())).run_tests()
+    else:
+        with ThreadPoolExecutor(max_workers=len(testing_systems)) as executor:
+            futures = {host: executor.submit(_run_device_tests, testing_system, host)
+                       for host, testing_system in testing_systems.items()}
+        for host, future in futures.items():
+            try:
+                future.result()
+            except Exception as exc:
+                logging.error("Testing of BVVU %s failed", host, exc_info=exc)
+
+    for power_manager in power_managers.values():
+        power_manager.close_connection()
+    if metrics_server is not None:
+        metrics_server.stop()
@@ -1,4 +1,5 @@
 import logging
+from typing import List
 from uiobapi import Uiob
 
 
@@ -13,9 +14,18 @@ class NewUiob(Uiob):
         """
 
         self._ip_address: str = ip_address
+        self._missing_modules: List[int] = []
         super().__init__(self._ip_address)
         logging.info("IP address of the BVVU: %s", self._ip_address)
 
+    @property
+    def missing_modules(self) -> List[int]:
+        """
+        :return: numbers of slots in which modules were missing during the last check.
+        """
+
+        return self._missing_modules
+
     def check_slots(self) -> bool:
         """
         :return: True if there are missing modules.
@@ -26,6 +36,7 @@ class NewUiob(Uiob):
         for slot_index, info in enumerate(slot_info, start=1):
             if info is None:
                 missing_modules.append(slot_index)
+        self._missing_modules = missing_modules
         missing_module_number = len(missing_modules)
         logging.info("[UIOB] Number of missing modules: %d, missing modules: %s", missing_module_number,
                      missing_modules)